@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import random
+import logging
+import tracemalloc
+
+from Headless import HeadlessFrame, load_headless_script
+from ScriptHost import is_wx_script, script_options
+
+logger = logging.getLogger(__name__)
+
+# 默认测量的脚本：示例粒子、v2 示例、NumPy 粒子与近邻连线示例
+DEFAULT_SCRIPTS = [
+    os.path.join("resources", "example.py"),
+    os.path.join("resources", "example_v2.py"),
+    os.path.join("resources", "example_particles.py"),
+    os.path.join("resources", "example_links.py"),
+]
+
+# 参与回归比较的指标，超过基线 (1 + tolerance) 倍视为变慢
+COMPARED_METRICS = [
+    ("update_ms", "p95"), ("update_ms", "p99"),
+    ("draw_ms", "p95"), ("draw_ms", "p99"),
+    ("alloc_kb_per_frame", "p95"),
+    ("peak_memory_kb", None),
+]
+
+def percentiles(values, points=(50, 95, 99)):
+    """最近秩法计算百分位数"""
+    if not values:
+        return {f"p{p}": 0.0 for p in points}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        rank = max(int(-(-p * len(ordered) // 100)) - 1, 0)   # ceil(p/100 * n) - 1
+        result[f"p{p}"] = round(ordered[rank], 4)
+    return result
+
+def _seed(seed):
+    """固定 random 与 NumPy 全局随机数（ParticleSystem 未指定种子时从 random 取种子）"""
+    random.seed(seed)
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    np.random.seed(seed)
+
+def _load_frame(py_path, seed, width, height, rasterize):
+    """按 start_by_PY 的方式加载脚本，并在导入与 init 之前固定随机种子"""
+    _seed(seed)
+    module = load_headless_script(py_path)
+    if module is None or not is_wx_script(module):
+        raise ValueError(f"脚本未提供 init/update/draw：{py_path}")
+    _seed(seed)
+    return HeadlessFrame(module.update, module.init, module.draw,
+                         width=width, height=height, rasterize=rasterize,
+                         **script_options(module))
+
+def bench_script(py_path, frames=300, warmup=30, seed=0, width=1920, height=1080, rasterize=False):
+    """
+    测量一个脚本每帧的开销
+    第一遍只计时；第二遍开启 tracemalloc 统计内存（tracemalloc 会拖慢执行，因此分开跑）
+    :param rasterize: 是否包含软件光栅化的开销，默认只测脚本自身
+    :return: 结果字典
+    """
+    # ---------- 计时 ----------
+    frame = _load_frame(py_path, seed, width, height, rasterize)
+    frame.run(warmup)
+    update_times, draw_times = [], []
+    for _ in range(frames):
+        frame.step()
+        update_times.append(frame.update_time * 1000)
+        draw_times.append(frame.draw_time * 1000)
+
+    # ---------- 内存 ----------
+    tracemalloc.start()
+    frame = _load_frame(py_path, seed, width, height, rasterize)
+    frame.run(warmup)
+    alloc_kb, blocks = [], []
+    for _ in range(frames):
+        start_blocks = sys.getallocatedblocks()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame.step()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        alloc_kb.append((peak_bytes - start_bytes) / 1024)     # 帧内临时分配的峰值
+        blocks.append(sys.getallocatedblocks() - start_blocks)  # 帧结束后仍存活的新增内存块
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": frames,
+        "seed": seed,
+        "size": f"{width}x{height}",
+        "rasterize": rasterize,
+        "update_ms": percentiles(update_times),
+        "draw_ms": percentiles(draw_times),
+        "alloc_kb_per_frame": percentiles(alloc_kb),
+        "retained_blocks_per_frame": round(sum(blocks) / max(len(blocks), 1), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "draw_calls": dict(frame.gc.calls),
+    }
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    与基线比较
+    :return: 回归列表 [(脚本, 指标, 基线值, 当前值), ...]
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if (base.get("size"), base.get("rasterize")) != (current.get("size"), current.get("rasterize")):
+            logger.warning(f"{name} 的基线测量条件不同，跳过比较")
+            continue
+        for metric, point in COMPARED_METRICS:
+            old = base.get(metric)
+            new = current.get(metric)
+            if point is not None:
+                old = old.get(point) if old else None
+                new = new.get(point) if new else None
+            if old is None or new is None:
+                continue
+            # 基线极小时加一个绝对下限，避免计时抖动误报
+            if new > old * (1 + tolerance) and new - old > 0.05:
+                label = f"{metric}.{point}" if point else metric
+                regressions.append((name, label, old, new))
+    return regressions
+
+def load_baseline(path):
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"读取基线失败，将视为无基线: {e}")
+        return {}
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+
+def _format(name, r):
+    u, d, a = r["update_ms"], r["draw_ms"], r["alloc_kb_per_frame"]
+    return (f"{name}\n"
+            f"    update ms  p50={u['p50']:.3f}  p95={u['p95']:.3f}  p99={u['p99']:.3f}\n"
+            f"    draw   ms  p50={d['p50']:.3f}  p95={d['p95']:.3f}  p99={d['p99']:.3f}\n"
+            f"    alloc  KB/帧 p50={a['p50']:.1f}  p95={a['p95']:.1f}  "
+            f"留存块/帧={r['retained_blocks_per_frame']}  峰值内存={r['peak_memory_kb']}KB")
+
+# ========== 命令行 ==========
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="壁纸脚本每帧开销基准测试")
+    parser.add_argument("scripts", nargs="*", default=DEFAULT_SCRIPTS, help="脚本路径，默认测量内置示例")
+    parser.add_argument("--frames", type=int, default=300, help="测量帧数")
+    parser.add_argument("--warmup", type=int, default=30, help="预热帧数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--size", default="1920x1080", help="虚拟屏幕尺寸")
+    parser.add_argument("--raster", action="store_true", help="计入软件光栅化开销")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="基线 JSON 路径")
+    parser.add_argument("--update-baseline", action="store_true", help="将本次结果写入基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的变慢比例")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    results = {}
+    for script in args.scripts:
+        name = os.path.normpath(script).replace(os.sep, "/")
+        results[name] = bench_script(script, frames=args.frames, warmup=args.warmup, seed=args.seed,
+                                     width=w, height=h, rasterize=args.raster)
+        print(_format(name, results[name]))
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, old, new in regressions:
+        print(f"[变慢] {name} {metric}: {old} -> {new}")
+
+    if args.update_baseline or not baseline:
+        save_baseline(args.baseline, results)
+        print(f"基线已写入：{args.baseline}")
+
+    sys.exit(1 if regressions else 0)
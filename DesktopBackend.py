@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+窗口系统抽象层：WorkerW.py 中的查找、嵌入、结束进程等操作都通过 DesktopBackend 调用，
+Win32Backend 调用真实的 Windows API，FakeDesktopBackend 在内存中模拟桌面窗口，可在任意平台上运行和计时
+"""
+import sys
+import time
+import ctypes
+import logging
+import threading
+
+from WindowDiscovery import FakeWindowEventSource, FakeTopologyEventSource, EVENT_EXPLORER, EVENT_DISPLAY
+
+if sys.platform.startswith("win"):
+    import win32con
+    import win32gui
+    import win32api
+    import win32process
+
+logger = logging.getLogger(__name__)
+
+# 嵌入窗口用到的常量（与 win32con 相同，非 Windows 下也可使用）
+GWL_STYLE = -16
+GWL_EXSTYLE = -20
+WS_CHILD = 0x40000000
+WS_VISIBLE = 0x10000000
+WS_EX_DLGMODALFRAME = 0x00000001
+WS_EX_WINDOWEDGE = 0x00000100
+HWND_TOP = 0
+SWP_FRAMECHANGED = 0x0020
+SMTO_NORMAL = 0x0000
+WM_SPAWN_WORKERW = 0x052C   # 发给 Progman，让其在图标层后面创建 WorkerW
+
+# ========== 接口 ==========
+class DesktopBackend:
+    """窗口系统接口，方法与同名 Win32 API 一一对应"""
+    available = True   # 是否支持嵌入桌面（非 Windows 下的 Win32Backend 为 False）
+
+    def screen_size(self):
+        """主显示器的物理分辨率 (width, height)"""
+        raise NotImplementedError
+
+    def find_window(self, class_name, title):
+        """FindWindow：按类名和 / 或标题查找顶层窗口，未找到返回 0"""
+        raise NotImplementedError
+
+    def find_window_ex(self, parent, after, class_name, title=None):
+        """FindWindowEx：parent 为 0 时在顶层窗口中查找，从 after 之后开始"""
+        raise NotImplementedError
+
+    def enum_windows(self):
+        """EnumWindows：按 Z 序返回所有顶层窗口"""
+        raise NotImplementedError
+
+    def is_window(self, hwnd):
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd):
+        raise NotImplementedError
+
+    def show_window(self, hwnd, show):
+        """ShowWindow：show 为 True 时显示（不激活），否则隐藏"""
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd):
+        raise NotImplementedError
+
+    def get_window_pid(self, hwnd):
+        """GetWindowThreadProcessId：窗口所属进程，失败返回 0"""
+        raise NotImplementedError
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        raise NotImplementedError
+
+    def set_parent(self, hwnd, parent):
+        raise NotImplementedError
+
+    def get_window_long(self, hwnd, index):
+        raise NotImplementedError
+
+    def set_window_long(self, hwnd, index, value):
+        raise NotImplementedError
+
+    def set_window_pos(self, hwnd, insert_after, x, y, width, height, flags):
+        raise NotImplementedError
+
+    def terminate_process(self, pid):
+        """结束进程，成功返回 True"""
+        raise NotImplementedError
+
+    def suspend_process(self, pid, suspend):
+        """挂起（suspend=True）或恢复进程，成功返回 True"""
+        raise NotImplementedError
+
+    def refresh_wallpaper(self):
+        """让系统重新绘制桌面壁纸（退出时清除残留画面）"""
+        raise NotImplementedError
+
+# ========== Windows ==========
+class Win32Backend(DesktopBackend):
+    """通过 pywin32 / ctypes 调用 Windows API"""
+    PROCESS_SUSPEND_RESUME = 0x0800
+
+    def __init__(self):
+        self.available = sys.platform.startswith("win")
+        self._dpi_aware = False
+
+    def _set_dpi_aware(self):
+        """设置进程 DPI 感知，只需设置一次（推荐使用 2 = PROCESS_PER_MONITOR_DPI_AWARE）"""
+        if self._dpi_aware:
+            return
+        self._dpi_aware = True
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except Exception as e:
+            logger.debug(f"设置 DPI 感知失败（可能已设置或系统不支持）：\n\t {e}")
+
+    def screen_size(self):
+        if not self.available:
+            # 非 Windows 系统可添加其他实现（如 tkinter），这里简单返回默认值
+            logger.warning("非 Windows 系统，返回默认分辨率 1920x1080")
+            return 1920, 1080
+        self._set_dpi_aware()
+        try:
+            user32 = ctypes.windll.user32
+            screen_w = user32.GetSystemMetrics(0)  # SM_CXSCREEN
+            screen_h = user32.GetSystemMetrics(1)  # SM_CYSCREEN
+            logger.info(f"获取到 Windows 真实物理分辨率：{screen_w}x{screen_h}")
+            return screen_w, screen_h
+        except Exception as e:
+            logger.error(f"获取屏幕分辨率失败：\n\t {e}")
+            # 这里简单返回 1920x1080 避免崩溃
+            return 1920, 1080
+
+    def find_window(self, class_name, title):
+        return win32gui.FindWindow(class_name, title)
+
+    def find_window_ex(self, parent, after, class_name, title=None):
+        return win32gui.FindWindowEx(parent, after, class_name, title)
+
+    def enum_windows(self):
+        hwnds = []
+        win32gui.EnumWindows(lambda hwnd, _: hwnds.append(hwnd) or True, None)
+        return hwnds
+
+    def is_window(self, hwnd):
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd):
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def show_window(self, hwnd, show):
+        win32gui.ShowWindow(hwnd, win32con.SW_SHOWNOACTIVATE if show else win32con.SW_HIDE)
+
+    def get_window_text(self, hwnd):
+        return win32gui.GetWindowText(hwnd)
+
+    def get_window_pid(self, hwnd):
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        return win32gui.SendMessageTimeout(hwnd, msg, wparam, lparam, win32con.SMTO_NORMAL, timeout_ms)
+
+    def set_parent(self, hwnd, parent):
+        return win32gui.SetParent(hwnd, parent)
+
+    def get_window_long(self, hwnd, index):
+        return win32gui.GetWindowLong(hwnd, index)
+
+    def set_window_long(self, hwnd, index, value):
+        return win32gui.SetWindowLong(hwnd, index, value)
+
+    def set_window_pos(self, hwnd, insert_after, x, y, width, height, flags):
+        return win32gui.SetWindowPos(hwnd, insert_after, x, y, width, height, flags)
+
+    def terminate_process(self, pid):
+        handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, pid)
+        try:
+            win32api.TerminateProcess(handle, 0)
+        finally:
+            win32api.CloseHandle(handle)
+        return True
+
+    def suspend_process(self, pid, suspend):
+        """通过 ntdll 的 NtSuspendProcess / NtResumeProcess 挂起或恢复整个进程"""
+        if not self.available or not pid:
+            return False
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(self.PROCESS_SUSPEND_RESUME, False, pid)
+        if not handle:
+            logger.warning(f"打开进程失败 (PID: {pid})，无法{'挂起' if suspend else '恢复'}")
+            return False
+        try:
+            ntdll = ctypes.windll.ntdll
+            status = ntdll.NtSuspendProcess(handle) if suspend else ntdll.NtResumeProcess(handle)
+            if status != 0:
+                logger.warning(f"{'挂起' if suspend else '恢复'}进程失败 (PID: {pid})，NTSTATUS: 0x{status & 0xFFFFFFFF:08X}")
+                return False
+            return True
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def refresh_wallpaper(self):
+        if self.available:
+            win32gui.SystemParametersInfo(win32con.SPI_SETDESKWALLPAPER, None, win32con.SPIF_SENDCHANGE)
+
+# ========== 内存中的模拟桌面 ==========
+class FakeWindow:
+    def __init__(self, hwnd, class_name, title, pid, parent=0, visible=True):
+        self.hwnd = hwnd
+        self.class_name = class_name
+        self.title = title
+        self.pid = pid
+        self.parent = parent
+        self.visible = visible
+        self.style = WS_VISIBLE if visible else 0
+        self.ex_style = WS_EX_WINDOWEDGE
+        self.rect = (0, 0, 0, 0)
+
+class FakeDesktopBackend(DesktopBackend):
+    """
+    确定性的内存桌面：
+    - 初始只有 Progman（其下为图标层 SHELLDLL_DefView）；向 Progman 发送 0x052C 后，
+      图标层移到新建的 WorkerW 中，并在其后再建一个空的 WorkerW（壁纸窗口嵌入的位置），与 Windows 10/11 一致
+    - launch() 按虚拟时钟延迟创建窗口，创建时通过 events（FakeWindowEventSource）通知
+    - 虚拟时间只在 wait() 中前进，wait() 可作为 wait_for_window 的等待函数，运行时不真正休眠
+    - restart_explorer() / change_display() 模拟资源管理器重启与显示设置变化，并通过 topology_events 通知
+    - calls 记录每个方法的调用次数（如 enum_windows 即一次完整枚举）
+    """
+    def __init__(self, screen=(1920, 1080)):
+        self.screen = screen
+        self.now = 0.0
+        self.events = FakeWindowEventSource()
+        self.topology_events = FakeTopologyEventSource()
+        self.calls = {}
+        self.windows = {}     # hwnd -> FakeWindow
+        self.z_order = []     # 顶层窗口，前面的在上
+        self.processes = {}   # pid -> 是否挂起
+        self.wallpaper_refreshes = 0
+        self._pending = []    # (出现时刻, 类名, 标题, pid, 是否显示)
+        self._next_hwnd = 0x10000
+        self._next_pid = 1000
+        self._create_shell()
+
+    def _create_shell(self):
+        self.progman = self.create_window("Progman", "Program Manager", pid=1)
+        self.defview = self.create_window("SHELLDLL_DefView", "", pid=1, parent=self.progman)
+
+    def restart_explorer(self):
+        """资源管理器重启：Progman 与 WorkerW（连同嵌入其中的壁纸窗口）被销毁后重新创建，然后广播 TaskbarCreated"""
+        for hwnd in [w.hwnd for w in self.windows.values() if w.pid == 1 and not w.parent]:
+            self._destroy(hwnd)
+        self._create_shell()
+        self.topology_events.emit(EVENT_EXPLORER)
+
+    def change_display(self, screen):
+        """修改分辨率，然后广播 WM_DISPLAYCHANGE"""
+        self.screen = screen
+        self.topology_events.emit(EVENT_DISPLAY)
+
+    # ---------- 模拟 ----------
+    def clock(self):
+        return self.now
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def create_window(self, class_name, title, pid=None, parent=0, visible=True):
+        """立即创建窗口（顶层窗口放在 Z 序最前），返回句柄"""
+        if pid is None:
+            pid = self._next_pid
+            self._next_pid += 1
+        self.processes.setdefault(pid, False)
+        hwnd = self._next_hwnd
+        self._next_hwnd += 4
+        self.windows[hwnd] = FakeWindow(hwnd, class_name, title, pid, parent, visible)
+        if not parent:
+            self.z_order.insert(0, hwnd)
+        # 与 EVENT_OBJECT_CREATE 相同，隐藏的窗口创建时也通知
+        self.events.emit(hwnd)
+        return hwnd
+
+    def launch(self, title, delay=0.0, class_name="FakeApp", visible=True):
+        """
+        模拟启动程序：delay 秒（虚拟时间）后出现标题为 title 的窗口，返回进程 pid
+        :param visible: False 模拟以 SW_HIDE 启动，窗口创建后不显示
+        """
+        pid = self._next_pid
+        self._next_pid += 1
+        self.processes[pid] = False
+        self._pending.append((self.now + delay, class_name, title, pid, visible))
+        self._pending.sort(key=lambda item: item[0])
+        self._create_due()
+        return pid
+
+    def _create_due(self):
+        while self._pending and self._pending[0][0] <= self.now:
+            _, class_name, title, pid, visible = self._pending.pop(0)
+            if pid in self.processes:
+                self.create_window(class_name, title, pid=pid, visible=visible)
+
+    def wait(self, event, timeout):
+        """虚拟时间的 Event.wait：前进到下一个窗口出现或超时，返回 event 是否被设置"""
+        if event.is_set():
+            return True
+        target = self.now + timeout
+        if self._pending and self._pending[0][0] <= target:
+            self.now = max(self.now, self._pending[0][0])
+            self._create_due()
+        else:
+            self.now = target
+        return event.is_set()
+
+    def children(self, parent):
+        return [w.hwnd for w in self.windows.values() if w.parent == parent]
+
+    def _destroy(self, hwnd):
+        for child in self.children(hwnd):
+            self._destroy(child)
+        self.windows.pop(hwnd, None)
+        if hwnd in self.z_order:
+            self.z_order.remove(hwnd)
+
+    @staticmethod
+    def _matches(window, class_name, title):
+        return ((class_name is None or window.class_name == class_name)
+                and (title is None or window.title == title))
+
+    # ---------- DesktopBackend ----------
+    def screen_size(self):
+        self._count('screen_size')
+        return self.screen
+
+    def find_window(self, class_name, title):
+        self._count('find_window')
+        for hwnd in self.z_order:
+            if self._matches(self.windows[hwnd], class_name, title):
+                return hwnd
+        return 0
+
+    def find_window_ex(self, parent, after, class_name, title=None):
+        self._count('find_window_ex')
+        if parent:
+            candidates = self.children(parent)
+        else:
+            candidates = self.z_order
+        start = candidates.index(after) + 1 if after in candidates else 0
+        for hwnd in candidates[start:]:
+            if self._matches(self.windows[hwnd], class_name, title):
+                return hwnd
+        return 0
+
+    def enum_windows(self):
+        self._count('enum_windows')
+        return list(self.z_order)
+
+    def is_window(self, hwnd):
+        return hwnd in self.windows
+
+    def is_window_visible(self, hwnd):
+        window = self.windows.get(hwnd)
+        return bool(window and window.visible)
+
+    def show_window(self, hwnd, show):
+        self._count('show_window')
+        window = self.windows[hwnd]
+        shown = show and not window.visible
+        window.visible = bool(show)
+        # 与 ShowWindow 相同，样式中的 WS_VISIBLE 随之改变
+        if show:
+            window.style |= WS_VISIBLE
+        else:
+            window.style &= ~WS_VISIBLE
+        if shown:
+            self.events.emit(hwnd)
+
+    def get_window_text(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.title if window else ""
+
+    def get_window_pid(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.pid if window else 0
+
+    def send_message_timeout(self, hwnd, msg, wparam, lparam, timeout_ms):
+        self._count('send_message_timeout')
+        if hwnd == self.progman and msg == WM_SPAWN_WORKERW:
+            # 图标层所在的 WorkerW 在前，空的 WorkerW 紧随其后；空的 WorkerW 被销毁后再次发送会重新创建
+            icons = self.windows[self.defview].parent
+            if icons == self.progman:
+                icons = self.create_window("WorkerW", "", pid=1)
+                self.windows[self.defview].parent = icons
+            position = self.z_order.index(icons) + 1
+            after = self.z_order[position] if position < len(self.z_order) else 0
+            if not after or self.windows[after].class_name != "WorkerW":
+                background = self.create_window("WorkerW", "", pid=1)
+                self.z_order.remove(background)
+                self.z_order.insert(position, background)
+        return 0, 0
+
+    def set_parent(self, hwnd, parent):
+        self._count('set_parent')
+        window = self.windows[hwnd]
+        previous = window.parent
+        if hwnd in self.z_order:
+            self.z_order.remove(hwnd)
+        window.parent = parent
+        if not parent:
+            self.z_order.insert(0, hwnd)
+        return previous
+
+    def get_window_long(self, hwnd, index):
+        window = self.windows[hwnd]
+        return window.style if index == GWL_STYLE else window.ex_style
+
+    def set_window_long(self, hwnd, index, value):
+        window = self.windows[hwnd]
+        if index == GWL_STYLE:
+            previous, window.style = window.style, value
+            window.visible = bool(value & WS_VISIBLE)
+        else:
+            previous, window.ex_style = window.ex_style, value
+        return previous
+
+    def set_window_pos(self, hwnd, insert_after, x, y, width, height, flags):
+        self._count('set_window_pos')
+        self.windows[hwnd].rect = (x, y, width, height)
+        return True
+
+    def terminate_process(self, pid):
+        self._count('terminate_process')
+        if pid not in self.processes:
+            return False
+        del self.processes[pid]
+        for hwnd in [w.hwnd for w in self.windows.values() if w.pid == pid]:
+            self._destroy(hwnd)
+        return True
+
+    def suspend_process(self, pid, suspend):
+        if pid not in self.processes:
+            return False
+        self.processes[pid] = suspend
+        return True
+
+    def refresh_wallpaper(self):
+        self.wallpaper_refreshes += 1
+
+# ========== 当前后端 ==========
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> DesktopBackend:
+    """WorkerW.py 使用的后端，默认 Win32Backend"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = Win32Backend()
+    return _backend
+
+def set_backend(backend: DesktopBackend):
+    """替换后端（测试或基准测试时换成 FakeDesktopBackend），返回原来的后端"""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+# ========== 基准测试 ==========
+def benchmark_embed(delays=(0.0, 0.05, 0.3, 1.0, 3.0), switches=5, restart_at=None, out=sys.stdout):
+    """
+    在 FakeDesktopBackend 上测量切换壁纸的嵌入路径：启动程序（窗口延迟 delay 秒出现）→ 等待并嵌入 → 结束上一个壁纸
+    延迟为虚拟时间，“启动→嵌入”为虚拟时钟上窗口出现到嵌入完成的总耗时，CPU 为嵌入路径本身的真实耗时
+    :param restart_at: 在第几次切换之前模拟资源管理器重启（None 不重启），用于观察拓扑缓存失效后的重新枚举
+    """
+    # 通过模块名取 set_backend：作为脚本运行时本文件是 __main__，WorkerW 使用的是另一份模块
+    import DesktopBackend
+    from DesktopTopology import DesktopTopology, set_topology
+    from WorkerW import embed_window, kill_process_by_hwnd
+
+    out.write(f"{'窗口延迟 s':>10} {'启动→嵌入 ms':>13} {'尝试':>5} {'枚举/次':>7} {'FindWindow/次':>13} "
+              f"{'消息/次':>7} {'拓扑命中':>8} {'CPU ms':>7}\n")
+    for delay in delays:
+        fake = FakeDesktopBackend()
+        topology = DesktopTopology(events=fake.topology_events)
+        previous = DesktopBackend.set_backend(fake)
+        previous_topology = set_topology(topology)
+        topology.start()
+        try:
+            latency = cpu = 0.0
+            tries = 0
+            old_hwnd = 0
+            counts = {}
+            for index in range(switches):
+                title = f"WALLPAPER_{index}"
+                if index == restart_at:
+                    fake.restart_explorer()
+                fake.calls.clear()
+                t0 = fake.now
+                c0 = time.perf_counter()
+                fake.launch(title, delay, visible=False)   # 与壁纸程序相同，以隐藏窗口启动
+                hwnd, attempts = embed_window(title, fake.events, deadline=delay + 15.0,
+                                              clock=fake.clock, wait=fake.wait)
+                if old_hwnd:
+                    kill_process_by_hwnd(old_hwnd)
+                cpu += time.perf_counter() - c0
+                if not hwnd:
+                    raise RuntimeError(f"模拟窗口未能嵌入：{title}")
+                latency += fake.now - t0
+                tries += attempts
+                old_hwnd = hwnd
+                for name, count in fake.calls.items():
+                    counts[name] = counts.get(name, 0) + count
+        finally:
+            topology.events.stop()
+            set_topology(previous_topology)
+            DesktopBackend.set_backend(previous)
+        per = lambda name: counts.get(name, 0) / switches
+        hits, misses = sum(topology.hits.values()), sum(topology.misses.values())
+        out.write(f"{delay:>10g} {latency / switches * 1000:>13.1f} {tries / switches:>5.1f} "
+                  f"{per('enum_windows'):>7.1f} {per('find_window'):>13.1f} "
+                  f"{per('send_message_timeout'):>7.1f} {hits / max(hits + misses, 1):>8.0%} "
+                  f"{cpu / switches * 1000:>7.3f}\n")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="在模拟桌面上测量壁纸窗口的嵌入延迟与枚举次数")
+    parser.add_argument("--delays", default="0,0.05,0.3,1,3", help="窗口出现延迟（秒），逗号分隔")
+    parser.add_argument("--switches", type=int, default=5, help="每组切换次数")
+    parser.add_argument("--restart-at", type=int, default=None, help="在第几次切换之前模拟资源管理器重启")
+    args = parser.parse_args()
+    benchmark_embed([float(v) for v in args.delays.split(",")], switches=args.switches,
+                    restart_at=args.restart_at)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import sys
+import ctypes
+import logging
+import threading
+
+if sys.platform.startswith("win"):
+    import win32con
+    import win32gui
+
+logger = logging.getLogger(__name__)
+
+# ========== 桌面可见性检测 ==========
+class VisibilityDetector:
+    """桌面可见性检测接口：is_desktop_visible() 返回桌面（壁纸）当前是否可见"""
+    def is_desktop_visible(self) -> bool:
+        raise NotImplementedError
+
+class FakeVisibilityDetector(VisibilityDetector):
+    """测试用：可见性由 visible 属性直接指定，并记录被查询的次数"""
+    def __init__(self, visible=True):
+        self.visible = visible
+        self.queries = 0
+
+    def is_desktop_visible(self):
+        self.queries += 1
+        return self.visible
+
+class Win32VisibilityDetector(VisibilityDetector):
+    """
+    枚举顶层窗口：任一可见、未最小化、未被隐藏（cloaked）的窗口覆盖了主显示器的工作区
+    （最大化或全屏），即认为桌面被遮挡
+    分层（WS_EX_LAYERED）、鼠标穿透（WS_EX_TRANSPARENT）和工具窗口（WS_EX_TOOLWINDOW）
+    通常是置顶的半透明叠加层（弹幕、录屏、性能监视等），不算遮挡
+    """
+    # 桌面与任务栏本身不算遮挡
+    IGNORED_CLASSES = {"Progman", "WorkerW", "Shell_TrayWnd", "Shell_SecondaryTrayWnd"}
+    OVERLAY_EX_STYLES = 0x00080000 | 0x00000020 | 0x00000080   # WS_EX_LAYERED | WS_EX_TRANSPARENT | WS_EX_TOOLWINDOW
+    DWMWA_CLOAKED = 14
+
+    def is_desktop_visible(self):
+        if not sys.platform.startswith("win"):
+            return True
+        left, top, right, bottom = win32gui.SystemParametersInfo(win32con.SPI_GETWORKAREA)
+        covering = []
+
+        def callback(hwnd, _):
+            if covering or not win32gui.IsWindowVisible(hwnd) or win32gui.IsIconic(hwnd):
+                return True
+            class_name = win32gui.GetClassName(hwnd)
+            ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+            # DWM 查询较慢，其他条件都满足时才查询
+            if (self.covers(class_name, ex_style, win32gui.GetWindowRect(hwnd), (left, top, right, bottom))
+                    and not self._is_cloaked(hwnd)):
+                covering.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(callback, None)
+        return not covering
+
+    def covers(self, class_name, ex_style, rect, work_area):
+        """
+        可见且未最小化的窗口是否遮挡桌面：不是桌面 / 任务栏、不是叠加层，且覆盖整个工作区
+        :param rect, work_area: (left, top, right, bottom)
+        """
+        if class_name in self.IGNORED_CLASSES or ex_style & self.OVERLAY_EX_STYLES:
+            return False
+        l, t, r, b = rect
+        left, top, right, bottom = work_area
+        return l <= left and t <= top and r >= right and b >= bottom
+
+    def _is_cloaked(self, hwnd):
+        """其他虚拟桌面上的窗口、挂起的 UWP 应用等“可见但未显示”的窗口"""
+        cloaked = ctypes.c_int(0)
+        try:
+            ctypes.windll.dwmapi.DwmGetWindowAttribute(
+                hwnd, self.DWMWA_CLOAKED, ctypes.byref(cloaked), ctypes.sizeof(cloaked))
+        except Exception:
+            return False
+        return cloaked.value != 0
+
+# ========== 监视器 ==========
+class DesktopVisibilityMonitor:
+    """
+    后台线程定期查询检测器，可见性改变时调用 on_change(visible)
+    遮挡需连续确认 pause_after 次才通知（避免切换窗口时短暂最大化引起的抖动），
+    恢复可见只需 resume_after 次，尽快恢复壁纸
+    """
+    def __init__(self, detector: VisibilityDetector, on_change, interval=0.5, pause_after=2, resume_after=1,
+                 wait=None):
+        """
+        :param detector:  VisibilityDetector 实现
+        :param on_change: 回调 on_change(visible)，在监视线程中调用
+        :param interval:  查询间隔（秒）
+        :param wait:      wait(event, timeout) 两次查询之间的等待，默认 event.wait；测试时可传入虚拟时钟
+        """
+        self.detector = detector
+        self.on_change = on_change
+        self.interval = interval
+        self.pause_after = pause_after
+        self.resume_after = resume_after
+        self.visible = True
+        self._pending = 0
+        self._wait = wait or (lambda event, timeout: event.wait(timeout))
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """查询一次，需要时触发回调；返回当前（已确认的）可见性"""
+        try:
+            visible = bool(self.detector.is_desktop_visible())
+        except Exception as e:
+            logger.warning(f"检测桌面可见性失败，按可见处理：\n\t {e}")
+            visible = True
+
+        if visible == self.visible:
+            self._pending = 0
+            return self.visible
+        self._pending += 1
+        if self._pending >= (self.resume_after if visible else self.pause_after):
+            self._pending = 0
+            self.visible = visible
+            logger.info(f"桌面{'恢复可见' if visible else '被遮挡'}")
+            try:
+                self.on_change(visible)
+            except Exception:
+                logger.exception("处理桌面可见性变化时出错")
+        return self.visible
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._wait(self._stop_event, self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2 + 1)
+            self._thread = None
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+桌面拓扑缓存：WorkerW 句柄和屏幕尺寸只在第一次使用时查询，之后直接返回缓存；
+资源管理器重启（TaskbarCreated）或显示设置变化（WM_DISPLAYCHANGE / WM_DPICHANGED）时才失效
+"""
+import logging
+import threading
+
+from DesktopBackend import get_backend, WM_SPAWN_WORKERW
+from WindowDiscovery import TopologyEventSource, Win32TopologyEventSource, EVENT_EXPLORER
+
+logger = logging.getLogger(__name__)
+
+# ========== 拓扑缓存 ==========
+class DesktopTopology:
+    """
+    WorkerW 句柄与屏幕尺寸的长期缓存，可在任意线程使用
+    WorkerW 句柄每次使用前用 IsWindow 校验，没收到事件就被销毁时也会重新查找；
+    后端被替换（set_backend）时全部重新查询
+    """
+    KEYS = ('workerw', 'screen')
+
+    def __init__(self, events: TopologyEventSource = None):
+        """
+        :param events: 拓扑事件源，None 使用 Win32TopologyEventSource
+        """
+        self.events = events or Win32TopologyEventSource()
+        self._lock = threading.Lock()
+        self._values = {}
+        self._backend = None
+        self.hits = dict.fromkeys(self.KEYS, 0)
+        self.misses = dict.fromkeys(self.KEYS, 0)
+        self.invalidations = 0
+
+    def start(self):
+        self.events.start(self.on_event)
+
+    def stop(self):
+        self.events.stop()
+        logger.info(f"桌面拓扑缓存：{self.format_summary()}")
+
+    def on_event(self, event):
+        """事件源的回调：资源管理器重启时 WorkerW 失效，显示变化时屏幕尺寸失效"""
+        logger.info(f"桌面拓扑变化（{event}），缓存失效")
+        if event == EVENT_EXPLORER:
+            self.invalidate('workerw')
+        else:
+            self.invalidate('screen')
+
+    def invalidate(self, *keys):
+        """使指定的缓存失效，不传参数表示全部"""
+        with self._lock:
+            for key in keys or self.KEYS:
+                self._values.pop(key, None)
+            self.invalidations += 1
+
+    def _get(self, key, query, valid=None):
+        backend = get_backend()
+        with self._lock:
+            if backend is not self._backend:
+                self._values.clear()
+                self._backend = backend
+            value = self._values.get(key)
+            if value is not None and (valid is None or valid(backend, value)):
+                self.hits[key] += 1
+                return value
+            self.misses[key] += 1
+            value = query(backend)
+            if value is not None:
+                self._values[key] = value
+            return value
+
+    def workerw(self):
+        """壁纸所在的 WorkerW 句柄，找不到返回 None"""
+        return self._get('workerw', _discover_workerw, lambda backend, hwnd: backend.is_window(hwnd))
+
+    def screen_size(self):
+        """主显示器的物理分辨率 (width, height)"""
+        return self._get('screen', lambda backend: backend.screen_size())
+
+    def format_summary(self):
+        parts = [f"{key} 命中 {self.hits[key]} / 未命中 {self.misses[key]}" for key in self.KEYS]
+        return "，".join(parts) + f"，失效 {self.invalidations} 次"
+
+def _discover_workerw(backend):
+    """向 Progman 发送 0x052C 并枚举顶层窗口，找到图标层之后的 WorkerW"""
+    if not backend.available:
+        logger.error("get_workerw 仅在 Windows 下有效")
+        return None
+
+    progman = backend.find_window("Progman", None)
+    if progman == 0:
+        logger.error("未找到 Progman 窗口")
+        return None
+
+    # 向 Progman 发送 0x052C，触发创建 WorkerW
+    backend.send_message_timeout(progman, WM_SPAWN_WORKERW, 0, 0, 1000)
+
+    for hwnd in backend.enum_windows():
+        # 查找包含 SHELLDLL_DefView 的窗口
+        shellview = backend.find_window_ex(hwnd, 0, "SHELLDLL_DefView", None)
+        if shellview != 0:
+            # 其后的 WorkerW 即壁纸所在的窗口
+            worker = backend.find_window_ex(0, hwnd, "WorkerW", None)
+            if worker != 0:
+                logger.info(f"找到 WorkerW 窗口句柄：0x{worker:08X}")
+                return worker
+
+    logger.error("未找到 WorkerW 窗口")
+    return None
+
+# ========== 全局实例 ==========
+_topology = None
+_topology_lock = threading.Lock()
+
+def get_topology() -> DesktopTopology:
+    global _topology
+    if _topology is None:
+        with _topology_lock:
+            if _topology is None:
+                _topology = DesktopTopology()
+    return _topology
+
+def set_topology(topology: DesktopTopology):
+    """替换全局实例（测试或基准测试时传入使用 FakeTopologyEventSource 的实例），返回原来的实例"""
+    global _topology
+    previous, _topology = _topology, topology
+    return previous
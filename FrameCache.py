@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+把 Python 脚本壁纸预先渲染为循环播放的帧缓存
+
+文件结构（小端）：
+    文件头  magic 'PWFC' | 版本 H | 压缩方式 H | 宽 I | 高 I | 帧率 f | 时长 f | 目标屏幕宽 I | 高 I | 依赖长度 I
+    依赖    JSON [[路径, mtime_ns, 大小], ...]：脚本及其导入的本地模块，任一改变即需重新预渲染
+    帧数据  每帧 RGBA，按压缩方式存放；连续相同的帧只保存一次
+    索引    每帧 (偏移 Q, 长度 Q)
+    文件尾  索引偏移 Q | 帧数 I | magic 'PWFC'
+播放时用 mmap 打开，未压缩的帧直接从映射中读取，不复制
+"""
+import os
+import sys
+import mmap
+import zlib
+import json
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PWFC'
+VERSION = 2
+COMPRESS_NONE = 0
+COMPRESS_ZLIB = 1
+_HEADER = struct.Struct('<4sHHIIffIII')
+_ENTRY = struct.Struct('<QQ')
+_TRAILER = struct.Struct('<QI4s')
+
+def cache_path_for(py_path: str):
+    """脚本对应的帧缓存路径：与脚本同目录同名，扩展名 .frames"""
+    return os.path.splitext(py_path)[0] + ".frames"
+
+def fingerprint(paths):
+    """源文件的 [路径, mtime_ns, 大小]，文件不存在时记为 [路径, 0, -1]"""
+    result = []
+    for path in sorted(set(os.path.abspath(p) for p in paths)):
+        try:
+            stat = os.stat(path)
+            result.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            result.append([path, 0, -1])
+    return result
+
+def local_sources(py_path: str):
+    """脚本本身，以及已导入的、位于脚本目录或程序目录下的模块（如 ParticleEngine），不含标准库和第三方包"""
+    roots = [os.path.dirname(os.path.abspath(py_path)), os.path.dirname(os.path.abspath(__file__))]
+    paths = [py_path]
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if not path or not path.endswith('.py'):
+            continue
+        path = os.path.abspath(path)
+        if any(os.path.dirname(path) == root for root in roots):
+            paths.append(path)
+    return paths
+
+def read_info(cache_path: str):
+    """只读取文件头：{'width', 'height', 'fps', 'seconds', 'target', 'sources'}，不是有效的帧缓存时抛出 ValueError"""
+    with open(cache_path, "rb") as f:
+        head = f.read(_HEADER.size)
+        if len(head) < _HEADER.size:
+            raise ValueError(f"不是有效的帧缓存文件：{cache_path}")
+        info = _unpack_header(head, cache_path)
+        info['sources'] = _unpack_sources(f.read(info.pop('sources_size')), cache_path)
+    return info
+
+def _unpack_header(data, path):
+    magic, version, compression, width, height, fps, seconds, target_w, target_h, sources_size = \
+        _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"不是有效的帧缓存文件：{path}")
+    return {'compression': compression, 'width': width, 'height': height, 'fps': fps, 'seconds': seconds,
+            'target': (target_w, target_h), 'sources_size': sources_size}
+
+def _unpack_sources(data, path):
+    try:
+        return json.loads(bytes(data).decode('utf-8'))
+    except ValueError:
+        raise ValueError(f"帧缓存的依赖信息损坏：{path}")
+
+def is_fresh(cache_path: str, py_path: str, seconds=None, width=None, height=None, target=None):
+    """
+    帧缓存可以直接播放：脚本与预渲染时导入的本地模块都没有改变，且预渲染参数与传入的一致（None 表示不比较）
+    :param target: 目标屏幕尺寸 (width, height)
+    """
+    try:
+        info = read_info(cache_path)
+    except (OSError, ValueError, struct.error):
+        return False
+    expected = {'seconds': seconds, 'width': width, 'height': height, 'target': target}
+    for key, value in expected.items():
+        if value is None:
+            continue
+        current = tuple(value) if key == 'target' else value
+        if (abs(info[key] - current) > 1e-3) if key == 'seconds' else info[key] != current:
+            return False
+    recorded = [path for path, _, _ in info['sources']]
+    if os.path.abspath(py_path) not in recorded:
+        return False
+    return fingerprint(recorded) == info['sources']
+
+# ========== 写入 ==========
+class FrameCacheWriter:
+    """逐帧写入帧缓存（先写到临时文件，close 时替换目标文件，中途失败不会留下残缺的缓存）"""
+    def __init__(self, path, width, height, fps, compress=True, seconds=0.0, target=None, sources=()):
+        """
+        :param seconds: 预渲染时长
+        :param target:  目标屏幕尺寸，None 与渲染尺寸相同
+        :param sources: 脚本及其依赖的源文件路径（记录当前的修改时间与大小）
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.seconds = seconds
+        self.target = tuple(target) if target else (width, height)
+        self.compression = COMPRESS_ZLIB if compress else COMPRESS_NONE
+        self.frame_size = width * height * 4
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        sources = json.dumps(fingerprint(sources)).encode('utf-8')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self.compression, width, height, fps, seconds,
+                                      self.target[0], self.target[1], len(sources)))
+        self._file.write(sources)
+        self._index = []
+        self.bytes_written = 0
+
+    def add(self, pixels, changed=True):
+        """
+        追加一帧
+        :param pixels:  width * height * 4 字节的 RGBA 数据
+        :param changed: False 表示与上一帧相同，只增加索引项
+        """
+        if not changed and self._index:
+            self._index.append(self._index[-1])
+            return
+        if len(pixels) != self.frame_size:
+            raise ValueError(f"帧大小不符：{len(pixels)}，应为 {self.frame_size}")
+        data = zlib.compress(pixels, 1) if self.compression == COMPRESS_ZLIB else pixels
+        offset = self._file.tell()
+        self._file.write(data)
+        self._index.append((offset, len(data)))
+        self.bytes_written += len(data)
+
+    def close(self):
+        index_offset = self._file.tell()
+        for offset, size in self._index:
+            self._file.write(_ENTRY.pack(offset, size))
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+# ========== 读取 ==========
+class FrameCacheReader:
+    """以 mmap 打开帧缓存，按下标取帧"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            if len(self._mmap) < _HEADER.size + _TRAILER.size:
+                raise ValueError(f"不是有效的帧缓存文件：{path}")
+            info = _unpack_header(self._mmap, path)
+            index_offset, count, tail = _TRAILER.unpack_from(self._mmap, len(self._mmap) - _TRAILER.size)
+            if tail != MAGIC:
+                raise ValueError(f"不是有效的帧缓存文件：{path}")
+            self.sources = _unpack_sources(self._view[_HEADER.size:_HEADER.size + info['sources_size']], path)
+        except ValueError:
+            self.close()
+            raise
+        self.compression, self.width, self.height = info['compression'], info['width'], info['height']
+        self.fps, self.seconds, self.target = info['fps'], info['seconds'], info['target']
+        self.index = [_ENTRY.unpack_from(self._mmap, index_offset + i * _ENTRY.size) for i in range(count)]
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def same_frame(self, a, b):
+        """两个下标是否指向同一份帧数据（写入时相同的帧共用存储）"""
+        return 0 <= a < self.count and 0 <= b < self.count and self.index[a] == self.index[b]
+
+    def frame(self, i):
+        """第 i 帧的 RGBA 数据；未压缩时返回映射上的 memoryview（不复制）"""
+        offset, size = self.index[i]
+        data = self._view[offset:offset + size]
+        if self.compression == COMPRESS_ZLIB:
+            return zlib.decompress(data)
+        return data
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            logger.warning(f"帧缓存仍有未释放的引用，稍后由垃圾回收关闭：{self.path}")
+
+# ========== 预渲染 ==========
+def bake(py_path, out_path=None, seconds=10.0, width=960, height=540, fps=None, compress=True, strict=True,
+         target=None):
+    """
+    无窗口运行脚本 seconds 秒，把每一帧写入帧缓存
+    HeadlessWx 不渲染文字等调用（见 RasterGraphicsContext.unrendered），缓存会与实时画面不同：
+    strict 时遇到这类调用立即放弃预渲染（抛出 ValueError，不写入缓存），否则照常写入并记录警告
+    :param fps:    缓存帧率，None 使用脚本的 FPS
+    :param target: 缓存对应的屏幕尺寸（记录在文件头中，由 is_fresh 比较），None 与渲染尺寸相同
+    :return: 帧缓存路径
+    """
+    from Headless import HeadlessFrame, load_headless_script
+    from ScriptHost import is_wx_script, script_options
+
+    out_path = out_path or cache_path_for(py_path)
+    module = load_headless_script(py_path)
+    if module is None or not is_wx_script(module):
+        raise ValueError(f"脚本未提供 init/update/draw：{py_path}")
+    options = script_options(module)
+    if fps:
+        options['fps'] = fps
+    frame = HeadlessFrame(module.update, module.init, module.draw, width=width, height=height, **options)
+
+    count = max(int(seconds * options['fps']), 1)
+    # 脚本在模块级导入的本地模块此时都已加载，一并记录为依赖
+    writer = FrameCacheWriter(out_path, width, height, options['fps'], compress=compress, seconds=seconds,
+                              target=target, sources=local_sources(py_path))
+    try:
+        for _ in range(count):
+            drawn = frame.step()
+            if strict and frame.gc.unrendered:
+                raise ValueError(f"脚本使用了无窗口渲染不支持的绘图调用 {_format_unrendered(frame.gc.unrendered)}，"
+                                 f"预渲染的画面会与实时运行不同，放弃生成帧缓存：{py_path}")
+            writer.add(frame.pixels, changed=drawn)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    if frame.gc.unrendered:
+        logger.warning(f"帧缓存中缺少无窗口渲染不支持的内容 {_format_unrendered(frame.gc.unrendered)}：{out_path}")
+    logger.info(f"帧缓存已生成：{out_path}（{count} 帧，{width}x{height}@{options['fps']}，"
+                f"{writer.bytes_written / 1024 / 1024:.1f}MB）")
+    return out_path
+
+def _format_unrendered(counter):
+    return "、".join(f"{name}（{count} 次）" for name, count in counter.most_common())
+
+# ========== 播放 ==========
+def playback_functions(reader: FrameCacheReader):
+    """
+    生成循环播放帧缓存的 init / update / draw，交给 WallpaperFrame 按普通脚本运行
+    update 只推进播放位置，与上一帧相同时返回 False 跳过绘制；draw 把当前帧复制到复用的位图后一次贴图（按窗口尺寸拉伸）
+    """
+    def init(target):
+        target.position = 0.0
+        target.shown_index = -1
+        target.bitmap = None
+
+    def update(target):
+        # 按缓存帧率推进，帧率被限制时跳帧而不是放慢
+        target.position = (target.position + reader.fps * target.scheduler.interval) % reader.count
+        index = int(target.position)
+        if index == target.shown_index or reader.same_frame(index, target.shown_index):
+            return False
+        target.shown_index = index
+        target.publish(index)
+        return True
+
+    def draw(gc, width, height, target):
+        index = target.snapshot
+        if index is None:
+            return
+        wx = target.resources.wx
+        data = reader.frame(index)
+        if target.bitmap is None:
+            target.bitmap = wx.Bitmap.FromBufferRGBA(reader.width, reader.height, data)
+        else:
+            target.bitmap.CopyFromBuffer(data, wx.BitmapBufferFormat_RGBA)
+        gc.DrawBitmap(target.bitmap, 0, 0, width, height)
+
+    return init, update, draw
+
+# ========== 命令行 ==========
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description="把壁纸脚本预渲染为循环播放的帧缓存")
+    parser.add_argument("script", help="壁纸脚本路径")
+    parser.add_argument("--seconds", type=float, default=10.0, help="渲染时长（秒）")
+    parser.add_argument("--size", default="960x540", help="渲染尺寸，播放时拉伸到屏幕")
+    parser.add_argument("--target", default=None,
+                        help="缓存对应的屏幕尺寸，如 1920x1080（壁纸只播放与当前屏幕一致的缓存），默认与 --size 相同")
+    parser.add_argument("--fps", type=int, default=None, help="缓存帧率，默认使用脚本的 FPS")
+    parser.add_argument("--raw", action="store_true", help="不压缩（文件更大，播放时不需要解压）")
+    parser.add_argument("--out", default=None, help="输出路径，默认与脚本同名的 .frames")
+    parser.add_argument("--allow-unrendered", action="store_true",
+                        help="脚本使用了文字等无窗口不渲染的调用时仍然生成（缓存中缺少这些内容）")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    target = tuple(int(v) for v in args.target.lower().split("x")) if args.target else None
+    bake(args.script, args.out, seconds=args.seconds, width=w, height=h, fps=args.fps, compress=not args.raw,
+         strict=not args.allow_unrendered, target=target)
+    sys.exit(0)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FrameScheduler:
+    """
+    基于绝对截止时间的帧调度器
+    每帧的截止时间 = 起始时间 + n * 帧间隔，不会因 sleep 误差而累积漂移；
+    落后时直接跳过错过的帧（对齐到下一个截止时间），而不是排队补帧
+    """
+    def __init__(self, fps=60, clock=time.perf_counter, sleep=time.sleep):
+        """
+        :param fps:   目标帧率（如 30/60/144）
+        :param clock: 单调时钟函数，返回秒
+        :param sleep: 休眠函数，接收秒
+        """
+        self._clock = clock
+        self._sleep = sleep
+        self.set_fps(fps)
+
+        self._deadline = None
+        self.frame_index = 0      # 已调度的帧序号（包含跳过的帧）
+        self.missed_frames = 0    # 累计错过截止时间而被跳过的帧数
+        self._last_report = 0.0
+        self._unreported = 0
+
+    def set_fps(self, fps):
+        """修改目标帧率，从下一帧开始生效"""
+        if fps <= 0:
+            raise ValueError(f"帧率必须大于 0：{fps}")
+        self.fps = fps
+        self.interval = 1.0 / fps
+
+    def start(self):
+        """开始调度，以当前时刻作为第 0 帧"""
+        self._deadline = self._clock() + self.interval
+        self.frame_index = 0
+
+    def wait(self):
+        """
+        休眠到下一帧的截止时间
+        :return: 本次跳过的帧数（0 表示按时完成）
+        """
+        if self._deadline is None:
+            self.start()
+
+        now = self._clock()
+        skipped = 0
+        if now < self._deadline:
+            self._sleep(self._deadline - now)
+        else:
+            # 已经落后：跳过所有错过的截止时间，对齐到未来最近的一个
+            skipped = int((now - self._deadline) / self.interval) + 1
+            self._deadline += skipped * self.interval
+            self.missed_frames += skipped
+            self._report(skipped, now)
+            remain = self._deadline - now
+            if remain > 0:
+                self._sleep(remain)
+
+        self._deadline += self.interval
+        self.frame_index += skipped + 1
+        return skipped
+
+    def _report(self, skipped, now):
+        """汇总报告错过的帧，每秒最多写一次日志，避免刷屏"""
+        self._unreported += skipped
+        if now - self._last_report >= 1.0:
+            logger.warning(f"帧调度落后（目标 {self.fps} FPS），"
+                           f"近期跳过 {self._unreported} 帧，累计 {self.missed_frames} 帧")
+            self._unreported = 0
+            self._last_report = now
+
+class FixedTimestep:
+    """
+    固定步长的模拟时钟（v2 脚本协议使用）
+    按真实经过的时间累积，每累计满一个 dt 执行一次 update，
+    渲染帧被跳过时模拟速度不受影响；剩余的不足一步的时间作为插值系数 alpha 交给 draw
+    """
+    # 累加浮点帧间隔的舍入误差（如 4 x 0.025 = 0.09999...），差这么一点也算满一步
+    _EPSILON = 1e-9
+
+    def __init__(self, hz=60, max_steps=5, clock=time.perf_counter):
+        """
+        :param hz:        模拟频率（每秒 update 次数）
+        :param max_steps: 每帧最多补跑的步数，防止 update 过慢时越追越落后
+        :param clock:     单调时钟函数，返回秒
+        """
+        if hz <= 0:
+            raise ValueError(f"模拟频率必须大于 0：{hz}")
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self._clock = clock
+        self._last = None
+        self._accumulator = 0.0
+        self.dropped_time = 0.0   # 因超出 max_steps 而丢弃的模拟时间（秒）
+
+    def advance(self):
+        """
+        累积自上次调用以来的真实时间
+        :return: 本帧需要执行的 update 次数
+        """
+        now = self._clock()
+        if self._last is None:
+            self._last = now
+            return 1   # 第一帧先执行一步，保证 draw 前已有状态
+        self._accumulator += now - self._last
+        self._last = now
+
+        steps = int(self._accumulator / self.dt + self._EPSILON)
+        if steps > self.max_steps:
+            dropped = (steps - self.max_steps) * self.dt
+            self.dropped_time += dropped
+            logger.debug(f"模拟落后，丢弃 {dropped * 1000:.1f}ms 模拟时间")
+            steps = self.max_steps
+            self._accumulator -= dropped
+        self._accumulator -= steps * self.dt
+        return steps
+
+    def resume(self):
+        """暂停后恢复时调用：丢弃暂停期间经过的时间，保留未消耗的累积量（插值不跳变）"""
+        if self._last is not None:
+            self._last = self._clock()
+
+    @property
+    def alpha(self):
+        """当前时刻位于上一步与下一步之间的比例，范围 [0, 1)"""
+        return min(max(self._accumulator / self.dt, 0.0), 1.0)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class RollingHistogram:
+    """保留最近 size 个样本的滚动统计"""
+    def __init__(self, size=600):
+        self.samples = deque(maxlen=size)
+
+    def add(self, value):
+        self.samples.append(value)
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(-(-p * len(ordered) // 100) - 1, 0)
+        return ordered[int(rank)]
+
+    def mean(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def buckets(self, edges=(4, 8, 16, 33, 66)):
+        """
+        按区间统计样本数
+        :param edges: 区间上界（毫秒），最后一个区间为 >= edges[-1]
+        :return: [(标签, 数量), ...]
+        """
+        counts = [0] * (len(edges) + 1)
+        for v in self.samples:
+            for i, edge in enumerate(edges):
+                if v < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<{e}ms" for e in edges] + [f">={edges[-1]}ms"]
+        return list(zip(labels, counts))
+
+class FrameStats:
+    """
+    WallpaperFrame 的逐帧计时统计：update 耗时、绘制耗时、帧间隔和丢帧数
+    未启用时所有记录方法直接返回，调用方也应先判断 enabled 以省去计时
+    """
+    def __init__(self, enabled=False, window=600, log_interval=60.0, clock=time.perf_counter):
+        """
+        :param enabled:      是否启用
+        :param window:       滚动窗口的样本数
+        :param log_interval: 向日志写入汇总的间隔（秒），<= 0 表示不写
+        """
+        self.enabled = enabled
+        self.log_interval = log_interval
+        self._clock = clock
+        self.update_ms = RollingHistogram(window)
+        self.paint_ms = RollingHistogram(window)
+        self.interval_ms = RollingHistogram(window)
+        self.dropped = 0
+        self.frames = 0
+        self._last_frame = None
+        self._last_log = clock()
+
+    def reset(self):
+        window = self.update_ms.samples.maxlen
+        self.update_ms = RollingHistogram(window)
+        self.paint_ms = RollingHistogram(window)
+        self.interval_ms = RollingHistogram(window)
+        self.dropped = 0
+        self.frames = 0
+        self._last_frame = None
+
+    def resume(self):
+        """暂停后恢复时调用：暂停期间的帧间隔不计入统计"""
+        self._last_frame = None
+
+    def record_update(self, seconds):
+        if self.enabled:
+            self.update_ms.add(seconds * 1000)
+
+    def record_paint(self, seconds):
+        if self.enabled:
+            self.paint_ms.add(seconds * 1000)
+
+    def record_frame(self, dropped=0):
+        """每帧调用一次，记录帧间隔与本帧之前跳过的帧数，并按间隔写日志"""
+        if not self.enabled:
+            return
+        now = self._clock()
+        if self._last_frame is not None:
+            self.interval_ms.add((now - self._last_frame) * 1000)
+        self._last_frame = now
+        self.frames += 1
+        self.dropped += dropped
+        if self.log_interval > 0 and now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(f"帧统计：{self.format_summary()}")
+
+    @property
+    def fps(self):
+        mean = self.interval_ms.mean()
+        return 1000.0 / mean if mean > 0 else 0.0
+
+    def summary(self):
+        def describe(hist):
+            return {'p50': round(hist.percentile(50), 3),
+                    'p95': round(hist.percentile(95), 3),
+                    'p99': round(hist.percentile(99), 3)}
+        return {
+            'fps': round(self.fps, 1),
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'update_ms': describe(self.update_ms),
+            'paint_ms': describe(self.paint_ms),
+            'interval_ms': describe(self.interval_ms),
+        }
+
+    def format_summary(self):
+        """单行汇总，用于日志和叠加层"""
+        s = self.summary()
+        return (f"FPS {s['fps']:.1f} | update p50 {s['update_ms']['p50']:.2f}ms p99 {s['update_ms']['p99']:.2f}ms"
+                f" | paint p50 {s['paint_ms']['p50']:.2f}ms p99 {s['paint_ms']['p99']:.2f}ms"
+                f" | 丢帧 {s['dropped']}/{s['frames']}")
+
+    def format_report(self):
+        """多行报告，包含帧间隔分布，用于托盘的统计窗口"""
+        if not self.enabled:
+            return "帧统计未启用"
+        lines = [self.format_summary(), "", "帧间隔分布："]
+        for label, count in self.interval_ms.buckets():
+            lines.append(f"  {label:>8}  {count}")
+        lines.append("")
+        lines.append("paint 耗时分布：")
+        for label, count in self.paint_ms.buckets():
+            lines.append(f"  {label:>8}  {count}")
+        return "\n".join(lines)
@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import re
+import sys
+import math
+import time
+import zlib
+import struct
+import logging
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None   # 没有 NumPy 时线段逐条按多边形扫描线描边
+
+import HeadlessWx
+from ScriptHost import ScriptHost, load_script, is_wx_script, script_options
+from RenderSurface import DirtyRegion, BatchContext
+
+logger = logging.getLogger(__name__)
+
+# ========== 软件光栅化 ==========
+_OPAQUE_RUN = re.compile(rb'[^\x00]+')   # alpha 通道中连续的非透明像素
+
+def _px(v):
+    """坐标取整到像素边界（四舍五入，避免 round 的银行家舍入导致 1 像素线段消失）"""
+    return int(math.floor(v + 0.5))
+
+def _expand(starts, counts):
+    """把每段 [start, start + count) 展开：返回 (所属段下标, 值) 两个数组"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.cumsum(counts) - counts
+    return owner, np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+
+def _shallow_segment_pixels(ax, ay, bx, by, half, clip_x, clip_y):
+    """
+    一批平缓线段（|dx| >= |dy|）覆盖的像素，NumPy 向量化
+    逐列取像素中心，求该列与线段两侧各 half 的矩形相交的 y 区间；
+    取整规则与 _fill_polygon_device 相同，水平线段（含退化成点的）两端各延长 half
+    :return: (xs, ys) 像素坐标数组，已裁剪到 clip_x / clip_y（[lo, hi)）
+    """
+    flip = bx < ax   # 统一为从左到右
+    ax, bx, ay, by = np.where(flip, bx, ax), np.where(flip, ax, bx), np.where(flip, by, ay), np.where(flip, ay, by)
+    flat = ay == by
+    ax = np.where(flat, ax - half, ax)
+    bx = np.where(flat, bx + half, bx)
+    length = np.hypot(bx - ax, by - ay)
+    ux, uy = (bx - ax) / length, (by - ay) / length
+
+    spread = half * np.abs(uy)
+    x0 = np.clip(np.floor(ax - spread + 0.5), *clip_x).astype(np.int64)
+    x1 = np.clip(np.floor(bx + spread + 0.5), *clip_x).astype(np.int64)
+
+    # 第 x 列（像素中心 x + 0.5）的 y 区间由两组约束相交得到，都是 x 的一次函数；
+    # 系数按线段先算好（已加上取整用的 0.5），逐列只做乘加
+    # 垂直于线段：中心线两侧各 half
+    slope = uy / ux
+    lo_w = ay + (0.5 - ax) * slope - half / ux + 0.5
+    hi_w = lo_w + 2 * half / ux
+    # 沿线段：投影落在 [0, length] 内（水平线段由列范围保证，不设约束）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = np.where(flat, 0.0, ux / uy)
+        t0 = ay - (0.5 - ax) * inv + 0.5
+        t1 = t0 + length / uy
+    lo_s = np.where(flat, -np.inf, np.minimum(t0, t1))
+    hi_s = np.where(flat, np.inf, np.maximum(t0, t1))
+
+    seg, xs = _expand(x0, np.maximum(x1 - x0, 0))
+    y0 = np.maximum(lo_w[seg] + slope[seg] * xs, lo_s[seg] - inv[seg] * xs)
+    y1 = np.minimum(hi_w[seg] + slope[seg] * xs, hi_s[seg] - inv[seg] * xs)
+    y0 = np.clip(np.floor(y0), *clip_y).astype(np.int64)
+    y1 = np.clip(np.floor(y1), *clip_y).astype(np.int64)
+    column, ys = _expand(y0, np.maximum(y1 - y0, 0))
+    return xs[column], ys
+
+class _Paint:
+    """一种颜色的填充方式：不透明时整段复制，半透明时按通道查表混合"""
+    def __init__(self, rgba):
+        r, g, b, a = rgba
+        self.visible = a > 0
+        self.opaque = a == 255
+        self.pattern = bytes((r, g, b, a))
+        if not self.opaque and self.visible:
+            inv = 255 - a
+            self.luts = [bytes((s * a + d * inv + 127) // 255 for d in range(256)) for s in (r, g, b)]
+            self.luts.append(bytes(a + (d * inv + 127) // 255 for d in range(256)))
+
+class RasterPath:
+    """GraphicsPath 的替身：记录子图形，在 FillPath / StrokePath 时按当前变换光栅化"""
+    def __init__(self):
+        self.shapes = []
+        self._points = None
+
+    def MoveToPoint(self, x, y=None):
+        if y is None:
+            x, y = x
+        self._points = [(x, y)]
+        self.shapes.append(('poly', self._points, False))
+
+    def AddLineToPoint(self, x, y=None):
+        if y is None:
+            x, y = x
+        if self._points is None:
+            self.MoveToPoint(x, y)
+        else:
+            self._points.append((x, y))
+
+    def CloseSubpath(self):
+        if self._points is not None:
+            self.shapes[-1] = ('poly', self._points, True)
+            self._points = None
+
+    def AddCircle(self, x, y, r):
+        self.shapes.append(('ellipse', x - r, y - r, 2 * r, 2 * r))
+        self._points = None
+
+    def AddEllipse(self, x, y, w, h):
+        self.shapes.append(('ellipse', x, y, w, h))
+        self._points = None
+
+    def AddRectangle(self, x, y, w, h):
+        self.shapes.append(('rect', x, y, w, h))
+        self._points = None
+
+    def AddPath(self, path):
+        self.shapes.extend(path.shapes)
+        self._points = None
+
+class RasterGraphicsContext:
+    """
+    与 wx.GraphicsContext 接口兼容的记录器 / 光栅器
+    绘制到内存中的 RGBA 缓冲（self.pixels，行优先，每像素 4 字节）；
+    支持矩形、椭圆、线段、路径、平移缩放与矩形裁剪，文字只记录不渲染
+    """
+    def __init__(self, width, height, background=(0, 0, 0, 255), rasterize=True):
+        """
+        :param rasterize: False 时只记录调用次数，不产生像素（用于测量脚本自身开销）
+        """
+        self.width = width
+        self.height = height
+        self.rasterize = rasterize
+        self.pixels = bytearray(bytes(background) * (width * height)) if rasterize else bytearray()
+        self.calls = Counter()   # 各绘图调用的次数
+        self.unrendered = Counter()   # 只记录、没有按 wx 的效果画出的调用（文字、非 OVER 的合成模式）
+
+        self._pen = HeadlessWx.BLACK_PEN
+        self._brush = HeadlessWx.TRANSPARENT_BRUSH
+        self._font = None
+        self._transform = (1.0, 1.0, 0.0, 0.0)   # (sx, sy, tx, ty)
+        self._clip = (0, 0, width, height)
+        self._stack = []
+        self._paints = {}
+
+    # ---------- 状态 ----------
+    def SetPen(self, pen):
+        self._pen = pen
+
+    def SetBrush(self, brush):
+        self._brush = brush
+
+    def SetFont(self, font, colour=None):
+        self._font = font
+
+    def CreatePen(self, pen):
+        return pen
+
+    def CreateBrush(self, brush):
+        return brush
+
+    def CreateFont(self, font, colour=None):
+        return font
+
+    def CreatePath(self):
+        return RasterPath()
+
+    def PushState(self):
+        self._stack.append((self._transform, self._clip))
+
+    def PopState(self):
+        if self._stack:
+            self._transform, self._clip = self._stack.pop()
+
+    def Translate(self, dx, dy):
+        sx, sy, tx, ty = self._transform
+        self._transform = (sx, sy, tx + dx * sx, ty + dy * sy)
+
+    def Scale(self, xScale, yScale):
+        sx, sy, tx, ty = self._transform
+        self._transform = (sx * xScale, sy * yScale, tx, ty)
+
+    def Clip(self, x, y=None, w=None, h=None):
+        """接受 (x, y, w, h) 或带 GetBox() 的区域对象"""
+        if y is None:
+            box = x.GetBox()
+            x, y, w, h = box.x, box.y, box.width, box.height
+        x0, y0 = self._to_device(x, y)
+        x1, y1 = self._to_device(x + w, y + h)
+        cx0, cy0, cx1, cy1 = self._clip
+        self._clip = (max(cx0, _px(x0)), max(cy0, _px(y0)),
+                      min(cx1, _px(x1)), min(cy1, _px(y1)))
+
+    def ResetClip(self):
+        self._clip = (0, 0, self.width, self.height)
+
+    def SetAntialiasMode(self, mode):
+        return True
+
+    def SetCompositionMode(self, mode):
+        if mode != HeadlessWx.COMPOSITION_OVER:
+            self.unrendered['SetCompositionMode'] += 1
+        return True
+
+    def Flush(self):
+        pass
+
+    def GetSize(self):
+        return self.width, self.height
+
+    def GetTextExtent(self, text):
+        size = self._font.GetPointSize() if self._font else 10
+        lines = str(text).split('\n')
+        return max(len(line) for line in lines) * size * 0.6, len(lines) * size * 1.2
+
+    # ---------- 绘图 ----------
+    def DrawRectangle(self, x, y, w, h):
+        self.calls['DrawRectangle'] += 1
+        self._fill_shape(('rect', x, y, w, h))
+        self._stroke_shape(('rect', x, y, w, h))
+
+    def DrawRoundedRectangle(self, x, y, w, h, radius):
+        self.calls['DrawRoundedRectangle'] += 1
+        self._fill_shape(('rect', x, y, w, h))
+        self._stroke_shape(('rect', x, y, w, h))
+
+    def DrawEllipse(self, x, y, w, h):
+        self.calls['DrawEllipse'] += 1
+        self._fill_shape(('ellipse', x, y, w, h))
+        self._stroke_shape(('ellipse', x, y, w, h))
+
+    def StrokeLine(self, x1, y1, x2, y2):
+        self.calls['StrokeLine'] += 1
+        self._stroke_shape(('poly', [(x1, y1), (x2, y2)], False))
+
+    def StrokeLines(self, points):
+        self.calls['StrokeLines'] += 1
+        self._stroke_shape(('poly', [tuple(p) for p in points], False))
+
+    def DrawLines(self, points):
+        self.calls['DrawLines'] += 1
+        self._fill_shape(('poly', [tuple(p) for p in points], True))
+        self._stroke_shape(('poly', [tuple(p) for p in points], False))
+
+    def FillPath(self, path):
+        self.calls['FillPath'] += 1
+        for shape in path.shapes:
+            self._fill_shape(shape)
+
+    def StrokePath(self, path):
+        self.calls['StrokePath'] += 1
+        self._stroke_shapes(path.shapes)
+
+    def DrawPath(self, path):
+        self.calls['DrawPath'] += 1
+        # 与 wx 相同：先填充整条路径，再描边整条路径
+        for shape in path.shapes:
+            self._fill_shape(shape)
+        self._stroke_shapes(path.shapes)
+
+    def DrawText(self, text, x, y, *args):
+        self.calls['DrawText'] += 1
+        self.unrendered['DrawText'] += 1
+
+    def DrawBitmap(self, bitmap, x, y, w, h):
+        self.calls['DrawBitmap'] += 1
+        if not self.rasterize or bitmap is None or not bitmap.IsOk():
+            return
+        x0, y0 = self._to_device(x, y)
+        x1, y1 = self._to_device(x + w, y + h)
+        self._blit_device(bitmap, _px(x0), _px(y0), _px(x1), _px(y1))
+
+    # ---------- 光栅化实现 ----------
+    def _to_device(self, x, y):
+        sx, sy, tx, ty = self._transform
+        return x * sx + tx, y * sy + ty
+
+    def _paint(self, colour):
+        rgba = colour.Get(True)
+        paint = self._paints.get(rgba)
+        if paint is None:
+            paint = self._paints[rgba] = _Paint(rgba)
+        return paint
+
+    def _span(self, y, x0, x1, paint):
+        """填充第 y 行 [x0, x1) 的像素"""
+        cx0, cy0, cx1, cy1 = self._clip
+        if y < cy0 or y >= cy1:
+            return
+        x0 = max(x0, cx0)
+        x1 = min(x1, cx1)
+        if x1 <= x0:
+            return
+        i0 = (y * self.width + x0) * 4
+        i1 = (y * self.width + x1) * 4
+        buf = self.pixels
+        if paint.opaque:
+            buf[i0:i1] = paint.pattern * (x1 - x0)
+        else:
+            for c in range(4):
+                buf[i0 + c:i1:4] = buf[i0 + c:i1:4].translate(paint.luts[c])
+
+    def _fill_rect_device(self, x0, y0, x1, y1, paint):
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        ix0, ix1 = _px(x0), _px(x1)
+        for y in range(max(_px(y0), self._clip[1]), min(_px(y1), self._clip[3])):
+            self._span(y, ix0, ix1, paint)
+
+    def _fill_ellipse_device(self, cx, cy, rx, ry, paint, inner=None):
+        """填充椭圆；inner=(rx, ry) 时只填充内外椭圆之间的环"""
+        if rx <= 0 or ry <= 0:
+            return
+        y_start = max(int(math.floor(cy - ry)), self._clip[1])
+        y_end = min(int(math.ceil(cy + ry)), self._clip[3])
+        for y in range(y_start, y_end):
+            dy = (y + 0.5 - cy) / ry
+            if dy * dy >= 1.0:
+                continue
+            dx = rx * math.sqrt(1.0 - dy * dy)
+            left, right = _px(cx - dx), _px(cx + dx)
+            if inner is not None and inner[0] > 0 and inner[1] > 0:
+                iy = (y + 0.5 - cy) / inner[1]
+                if iy * iy < 1.0:
+                    idx = inner[0] * math.sqrt(1.0 - iy * iy)
+                    self._span(y, left, _px(cx - idx), paint)
+                    self._span(y, _px(cx + idx), right, paint)
+                    continue
+            self._span(y, left, right, paint)
+
+    def _fill_polygon_device(self, points, paint):
+        """扫描线填充多边形（奇偶规则）"""
+        if len(points) < 3:
+            return
+        ys = [p[1] for p in points]
+        y_start = max(int(math.floor(min(ys))), self._clip[1])
+        y_end = min(int(math.ceil(max(ys))), self._clip[3])
+        edges = list(zip(points, points[1:] + points[:1]))
+        for y in range(y_start, y_end):
+            yc = y + 0.5
+            xs = []
+            for (ax, ay), (bx, by) in edges:
+                if (ay <= yc < by) or (by <= yc < ay):
+                    xs.append(ax + (yc - ay) * (bx - ax) / (by - ay))
+            xs.sort()
+            for i in range(0, len(xs) - 1, 2):
+                self._span(y, _px(xs[i]), _px(xs[i + 1]), paint)
+
+    def _blit_device(self, bitmap, x0, y0, x1, y1):
+        """
+        把位图按最近邻缩放复制到 [x0, x1) x [y0, y1)
+        带 alpha 的位图只复制不透明度非 0 的像素（不做混合），不带 alpha 的直接覆盖
+        """
+        dw, dh = x1 - x0, y1 - y0
+        if dw <= 0 or dh <= 0:
+            return
+        bw, bh = bitmap.width, bitmap.height
+        cx0, cy0, cx1, cy1 = self._clip
+        left, right = max(x0, cx0), min(x1, cx1)
+        if right <= left:
+            return
+        src = memoryview(bitmap.data)
+        columns = None
+        if dw != bw:
+            columns = [(x - x0) * bw // dw for x in range(left, right)]
+        for y in range(max(y0, cy0), min(y1, cy1)):
+            row = (y - y0) * bh // dh * bw
+            if columns is None:
+                line = src[(row + left - x0) * 4:(row + right - x0) * 4]
+            else:
+                line = b''.join(src[(row + c) * 4:(row + c + 1) * 4] for c in columns)
+            i0 = (y * self.width + left) * 4
+            if not bitmap.HasAlpha():
+                self.pixels[i0:i0 + len(line)] = line
+                continue
+            for run in _OPAQUE_RUN.finditer(bytes(line[3::4])):
+                a, b = run.start() * 4, run.end() * 4
+                self.pixels[i0 + a:i0 + b] = line[a:b]
+
+    def _fill_shape(self, shape):
+        if not self.rasterize or self._brush is None or self._brush.IsTransparent():
+            return
+        paint = self._paint(self._brush.GetColour())
+        if not paint.visible:
+            return
+        kind = shape[0]
+        if kind == 'rect':
+            _, x, y, w, h = shape
+            x0, y0 = self._to_device(x, y)
+            x1, y1 = self._to_device(x + w, y + h)
+            self._fill_rect_device(x0, y0, x1, y1, paint)
+        elif kind == 'ellipse':
+            _, x, y, w, h = shape
+            x0, y0 = self._to_device(x, y)
+            x1, y1 = self._to_device(x + w, y + h)
+            self._fill_ellipse_device((x0 + x1) / 2, (y0 + y1) / 2, abs(x1 - x0) / 2, abs(y1 - y0) / 2, paint)
+        elif kind == 'poly':
+            self._fill_polygon_device([self._to_device(*p) for p in shape[1]], paint)
+
+    def _stroke_shape(self, shape):
+        self._stroke_shapes((shape,))
+
+    def _stroke_shapes(self, shapes):
+        """描边一组子图形；有 NumPy 时所有折线的线段合成一批光栅化，重叠处只混合一次（与 wx 描边整条路径一致）"""
+        if not self.rasterize or self._pen is None or self._pen.IsTransparent():
+            return
+        paint = self._paint(self._pen.GetColour())
+        if not paint.visible:
+            return
+        sx, sy = abs(self._transform[0]), abs(self._transform[1])
+        half = max(self._pen.GetWidth() * (sx + sy) / 2, 1.0) / 2
+        starts, ends = [], []
+        for shape in shapes:
+            kind = shape[0]
+            if kind == 'rect':
+                _, x, y, w, h = shape
+                x0, y0 = self._to_device(x, y)
+                x1, y1 = self._to_device(x + w, y + h)
+                self._fill_rect_device(x0 - half, y0 - half, x1 + half, y0 + half, paint)
+                self._fill_rect_device(x0 - half, y1 - half, x1 + half, y1 + half, paint)
+                self._fill_rect_device(x0 - half, y0 + half, x0 + half, y1 - half, paint)
+                self._fill_rect_device(x1 - half, y0 + half, x1 + half, y1 - half, paint)
+            elif kind == 'ellipse':
+                _, x, y, w, h = shape
+                x0, y0 = self._to_device(x, y)
+                x1, y1 = self._to_device(x + w, y + h)
+                rx, ry = abs(x1 - x0) / 2, abs(y1 - y0) / 2
+                self._fill_ellipse_device((x0 + x1) / 2, (y0 + y1) / 2, rx + half, ry + half, paint,
+                                          inner=(rx - half, ry - half))
+            elif kind == 'poly':
+                points = shape[1]
+                if shape[2] and len(points) > 2:
+                    points = list(points) + [points[0]]
+                starts.extend(points[:-1])
+                ends.extend(points[1:])
+        if not starts:
+            return
+        if np is None:
+            for a, b in zip(starts, ends):
+                self._stroke_segment_device(*self._to_device(*a), *self._to_device(*b), half, paint)
+            return
+        sx, sy, tx, ty = self._transform
+        a = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        b = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        self._stroke_segments_device(a[:, 0] * sx + tx, a[:, 1] * sy + ty,
+                                     b[:, 0] * sx + tx, b[:, 1] * sy + ty, half, paint)
+
+    def _stroke_segment_device(self, ax, ay, bx, by, half, paint):
+        if ax == bx or ay == by:
+            # 水平 / 竖直线段直接按矩形填充
+            self._fill_rect_device(min(ax, bx) - half, min(ay, by) - half,
+                                   max(ax, bx) + half, max(ay, by) + half, paint)
+            return
+        length = math.hypot(bx - ax, by - ay)
+        nx, ny = -(by - ay) / length * half, (bx - ax) / length * half
+        self._fill_polygon_device([(ax + nx, ay + ny), (bx + nx, by + ny),
+                                   (bx - nx, by - ny), (ax - nx, ay - ny)], paint)
+
+    def _stroke_segments_device(self, ax, ay, bx, by, half, paint):
+        """NumPy 版的 _stroke_segment_device：一次描边一批线段（坐标为设备坐标数组）"""
+        cx0, cy0, cx1, cy1 = self._clip
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        steep = np.abs(by - ay) > np.abs(bx - ax)
+        shallow = ~steep
+        xs, ys = _shallow_segment_pixels(ax[shallow], ay[shallow], bx[shallow], by[shallow], half,
+                                         (cx0, cx1), (cy0, cy1))
+        # 陡峭线段交换 x / y 后按平缓线段处理
+        ys2, xs2 = _shallow_segment_pixels(ay[steep], ax[steep], by[steep], bx[steep], half,
+                                           (cy0, cy1), (cx0, cx1))
+        mask = np.zeros(self.width * self.height, dtype=bool)
+        mask[ys * self.width + xs] = True
+        mask[ys2 * self.width + xs2] = True
+        index = np.flatnonzero(mask)
+        pixels = np.frombuffer(self.pixels, dtype=np.uint8).reshape(-1, 4)
+        if paint.opaque:
+            pixels[index] = np.frombuffer(paint.pattern, dtype=np.uint8)
+        else:
+            for c in range(4):
+                lut = np.frombuffer(paint.luts[c], dtype=np.uint8)
+                pixels[index, c] = lut[pixels[index, c]]
+
+    # ---------- 输出 ----------
+    def save_png(self, path):
+        """将当前缓冲保存为 PNG（RGBA8）"""
+        raw = b''.join(b'\x00' + bytes(self.pixels[y * self.width * 4:(y + 1) * self.width * 4])
+                       for y in range(self.height))
+
+        def chunk(tag, data):
+            body = tag + data
+            return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xFFFFFFFF)
+
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 6, 0, 0, 0)))
+            f.write(chunk(b'IDAT', zlib.compress(raw, 6)))
+            f.write(chunk(b'IEND', b''))
+
+# ========== 无窗口宿主 ==========
+class HeadlessFrame(ScriptHost):
+    """
+    WallpaperFrame 的无窗口替身
+    在同一线程中按虚拟时钟逐帧执行 init/update/draw，画面输出到 RasterGraphicsContext
+    """
+    def __init__(self, update_func, init_func=None, draw_func=None, fps=60,
+                 script_version=1, sim_hz=60, accumulate=False,
+                 width=1920, height=1080, rasterize=True, stats=False):
+        """
+        参数与 WallpaperFrame 相同，另外：
+        :param width:     虚拟屏幕宽度
+        :param height:    虚拟屏幕高度
+        :param rasterize: 是否真正生成像素，False 时只记录绘图调用
+        """
+        self.width = width
+        self.height = height
+        self.time = 0.0   # 虚拟时钟（秒），每帧前进 1/fps
+        self._setup_host(update_func, draw_func, width, height, fps=fps,
+                         script_version=script_version, sim_hz=sim_hz, clock=lambda: self.time,
+                         stats=stats, wx_module=HeadlessWx)
+        self.accumulate = accumulate
+        self.gc = RasterGraphicsContext(width, height, rasterize=rasterize)
+        self.frame_index = 0
+        self.frames_drawn = 0
+        self.update_time = 0.0   # 最近一帧 update 耗时（秒）
+        self.draw_time = 0.0     # 最近一帧 draw 耗时（秒）
+
+        if callable(init_func):
+            init_func(self)
+
+    # WallpaperFrame 上脚本常用的接口
+    def GetSize(self):
+        return self.width, self.height
+
+    GetClientSize = GetSize
+
+    def GetHandle(self):
+        return 0
+
+    def step(self):
+        """
+        执行一帧：update，需要时 draw
+        :return: 本帧是否绘制
+        """
+        t0 = time.perf_counter()
+        need_redraw = True
+        if callable(self.update_func):
+            need_redraw = self._run_update()
+        t1 = time.perf_counter()
+        if need_redraw:
+            self.draw()
+        self.update_time = t1 - t0
+        self.draw_time = time.perf_counter() - t1
+        if self.stats.enabled:
+            self.stats.record_frame()
+            self.stats.record_update(self.update_time)
+            self.stats.record_paint(self.draw_time)
+        self.frame_index += 1
+        self.time += self.scheduler.interval
+        return need_redraw
+
+    def draw(self):
+        """在光栅缓冲上绘制一帧（只绘制脏区域）"""
+        rects = self.dirty.take()
+        box = (0, 0, self.width, self.height) if rects is None else DirtyRegion.bounding_box(rects)
+        self.update_rect = box
+        gc = self.gc
+        gc.PushState()
+        if rects is not None:
+            gc.Clip(*box)
+        if not self.accumulate and self.layers.base is None:
+            gc.SetPen(HeadlessWx.TRANSPARENT_PEN)
+            gc.SetBrush(HeadlessWx.BLACK_BRUSH)
+            gc.DrawRectangle(*box)
+        if callable(self.draw_func):
+            self._run_draw(gc, self.width, self.height)
+        gc.PopState()
+        self.frames_drawn += 1
+
+    def _render_layer(self, layer, width, height, opaque):
+        """static 图层绘制到单独的光栅缓冲，转换为位图缓存"""
+        background = (0, 0, 0, 255) if opaque else (0, 0, 0, 0)
+        gc = RasterGraphicsContext(width, height, background, rasterize=self.gc.rasterize)
+        layer.draw_func(BatchContext(gc, self.resources), width, height, self)
+        self.gc.unrendered.update(gc.unrendered)
+        if not gc.rasterize:
+            return HeadlessWx.Bitmap()
+        bitmap = HeadlessWx.Bitmap.FromBufferRGBA(width, height, gc.pixels)
+        bitmap.UseAlpha(not opaque)
+        return bitmap
+
+    def run(self, frames):
+        """连续执行 frames 帧"""
+        for _ in range(frames):
+            self.step()
+        return self
+
+    @property
+    def pixels(self):
+        return self.gc.pixels
+
+def load_headless_script(py_path: str):
+    """用 HeadlessWx 代替 wx 导入脚本"""
+    return load_script(py_path, overrides={'wx': HeadlessWx})
+
+def run_headless(py_path: str, frames=60, width=1920, height=1080, rasterize=True):
+    """
+    无窗口运行壁纸脚本
+    :param py_path: 脚本路径
+    :param frames:  运行帧数
+    :return: HeadlessFrame，可读取 pixels / gc.calls 等结果
+    """
+    module = load_headless_script(py_path)
+    if module is None or not is_wx_script(module):
+        raise ValueError(f"脚本未提供 init/update/draw：{py_path}")
+    frame = HeadlessFrame(module.update, module.init, module.draw,
+                          width=width, height=height, rasterize=rasterize,
+                          **script_options(module))
+    return frame.run(frames)
+
+# ========== 命令行 ==========
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="无窗口运行壁纸脚本并输出最后一帧")
+    parser.add_argument("script", help="壁纸脚本路径")
+    parser.add_argument("--frames", type=int, default=60, help="运行帧数")
+    parser.add_argument("--size", default="640x360", help="虚拟屏幕尺寸，如 1920x1080")
+    parser.add_argument("--out", default=None, help="最后一帧保存为 PNG 的路径")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    result = run_headless(args.script, frames=args.frames, width=w, height=h)
+    print(f"已运行 {result.frame_index} 帧，绘制 {result.frames_drawn} 帧，绘图调用：{dict(result.gc.calls)}")
+    if args.out:
+        result.gc.save_png(args.out)
+        print(f"已保存：{args.out}")
+    sys.exit(0)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无窗口运行时代替 wx 的最小模块
+只提供壁纸脚本绘图常用的 Colour / Pen / Brush / Font 等值对象和常量，
+由 Headless.RasterGraphicsContext 解释；不依赖 wxPython 和显示器
+"""
+
+# ========== 常量 ==========
+NO_BORDER = 0
+PENSTYLE_SOLID = 100
+PENSTYLE_TRANSPARENT = 106
+BRUSHSTYLE_SOLID = 100
+BRUSHSTYLE_TRANSPARENT = 106
+FONTFAMILY_DEFAULT = 70
+FONTFAMILY_SWISS = 74
+FONTFAMILY_MODERN = 75
+FONTSTYLE_NORMAL = 90
+FONTSTYLE_ITALIC = 93
+FONTWEIGHT_NORMAL = 400
+FONTWEIGHT_BOLD = 700
+ANTIALIAS_NONE = 0
+ANTIALIAS_DEFAULT = 1
+COMPOSITION_OVER = 3
+COMPOSITION_SOURCE = 2
+COMPOSITION_CLEAR = 0
+BG_STYLE_PAINT = 2
+BitmapBufferFormat_RGBA = 1
+
+# ========== 值对象 ==========
+class Colour:
+    def __init__(self, red=0, green=0, blue=0, alpha=255):
+        if isinstance(red, Colour):
+            red, green, blue, alpha = red.Get(True)
+        elif isinstance(red, (tuple, list)):
+            red, green, blue, alpha = (tuple(red) + (255,))[:4]
+        self._rgba = (int(red) & 0xFF, int(green) & 0xFF, int(blue) & 0xFF, int(alpha) & 0xFF)
+
+    def Red(self):
+        return self._rgba[0]
+
+    def Green(self):
+        return self._rgba[1]
+
+    def Blue(self):
+        return self._rgba[2]
+
+    def Alpha(self):
+        return self._rgba[3]
+
+    def Get(self, includeAlpha=True):
+        return self._rgba if includeAlpha else self._rgba[:3]
+
+    def IsOk(self):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, Colour) and self._rgba == other._rgba
+
+    def __hash__(self):
+        return hash(self._rgba)
+
+    def __repr__(self):
+        return f"Colour{self._rgba}"
+
+class Pen:
+    def __init__(self, colour=None, width=1, style=PENSTYLE_SOLID):
+        self._colour = Colour(colour) if colour is not None else Colour(0, 0, 0)
+        self._width = width
+        self._style = style
+
+    def GetColour(self):
+        return self._colour
+
+    def GetWidth(self):
+        return self._width
+
+    def GetStyle(self):
+        return self._style
+
+    def IsTransparent(self):
+        return self._style == PENSTYLE_TRANSPARENT or self._colour.Alpha() == 0
+
+    def IsOk(self):
+        return True
+
+class Brush:
+    def __init__(self, colour=None, style=BRUSHSTYLE_SOLID):
+        self._colour = Colour(colour) if colour is not None else Colour(0, 0, 0)
+        self._style = style
+
+    def GetColour(self):
+        return self._colour
+
+    def GetStyle(self):
+        return self._style
+
+    def IsTransparent(self):
+        return self._style == BRUSHSTYLE_TRANSPARENT or self._colour.Alpha() == 0
+
+    def IsOk(self):
+        return True
+
+class Font:
+    def __init__(self, pointSize=10, family=FONTFAMILY_DEFAULT, style=FONTSTYLE_NORMAL,
+                 weight=FONTWEIGHT_NORMAL, underline=False, faceName=""):
+        self._size = pointSize
+        self.family = family
+        self.style = style
+        self.weight = weight
+        self.faceName = faceName
+
+    def GetPointSize(self):
+        return self._size
+
+    def IsOk(self):
+        return True
+
+class Rect:
+    def __init__(self, x=0, y=0, width=0, height=0):
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+    def Get(self):
+        return self.x, self.y, self.width, self.height
+
+class Bitmap:
+    """RGBA 位图，像素保存在 self.data（行优先，每像素 4 字节）"""
+    def __init__(self, width=0, height=0, depth=32):
+        self.width = width
+        self.height = height
+        self.data = bytearray(width * height * 4)
+        self._alpha = False
+
+    @classmethod
+    def FromBufferRGBA(cls, width, height, data):
+        bitmap = cls(width, height)
+        bitmap.CopyFromBuffer(data)
+        return bitmap
+
+    def CopyFromBuffer(self, data, format=BitmapBufferFormat_RGBA, stride=-1):
+        # 通过 memoryview 原地复制（bytearray 的切片赋值会先复制一份源数据）
+        memoryview(self.data)[:] = memoryview(data).cast('B')
+
+    def GetWidth(self):
+        return self.width
+
+    def GetHeight(self):
+        return self.height
+
+    def GetSize(self):
+        return self.width, self.height
+
+    def UseAlpha(self, use=True):
+        self._alpha = use
+        return True
+
+    def HasAlpha(self):
+        return self._alpha
+
+    def IsOk(self):
+        return self.width > 0 and self.height > 0
+
+class Frame:
+    """占位基类，使 WallpaperFrame.py 这类定义了窗口类的脚本也能被导入"""
+    pass
+
+class App:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def MainLoop(self):
+        pass
+
+def MilliSleep(milliseconds):
+    import time
+    time.sleep(milliseconds / 1000)
+
+def CallAfter(func, *args, **kwargs):
+    func(*args, **kwargs)
+
+# ========== 预定义对象 ==========
+BLACK = Colour(0, 0, 0)
+WHITE = Colour(255, 255, 255)
+RED = Colour(255, 0, 0)
+GREEN = Colour(0, 255, 0)
+BLUE = Colour(0, 0, 255)
+YELLOW = Colour(255, 255, 0)
+CYAN = Colour(0, 255, 255)
+LIGHT_GREY = Colour(192, 192, 192)
+TransparentColour = Colour(0, 0, 0, 0)
+TRANSPARENT_PEN = Pen(BLACK, 1, PENSTYLE_TRANSPARENT)
+TRANSPARENT_BRUSH = Brush(BLACK, BRUSHSTYLE_TRANSPARENT)
+BLACK_PEN = Pen(BLACK)
+WHITE_PEN = Pen(WHITE)
+BLACK_BRUSH = Brush(BLACK)
+WHITE_BRUSH = Brush(WHITE)
+NullBitmap = None
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import random
+
+import numpy as np
+
+class ParticleSnapshot:
+    """绘制所需的粒子数据副本，预分配后在三缓冲中循环复用"""
+    def __init__(self, capacity):
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.radius = np.zeros(capacity, np.float32)
+        self.color = np.zeros(capacity, np.uint8)
+        self.count = 0
+
+class ParticleSystem:
+    """
+    结构数组（SoA）存储的粒子系统：每个属性一个 NumPy 数组，存活粒子连续存放在 [0, count)
+    积分、边界反弹、大小脉动和寿命全部向量化，运行中不再分配数组（发射与回收复用预分配的空间）
+    """
+    def __init__(self, capacity, palette, seed=None, age_max=1000.0, pulse=0.5):
+        """
+        :param capacity: 最大粒子数
+        :param palette:  颜色表 [(r, g, b, a), ...]，粒子保存的是颜色下标
+        :param seed:     随机种子，便于复现；None 时从 random 模块取种子，固定 random.seed 后结果同样可复现
+        :param age_max:  age 在 [0, age_max] 之间往返，用于大小脉动
+        :param pulse:    age 到达 age_max 时直径增大的比例
+        """
+        self.capacity = capacity
+        self.palette = np.array([tuple(c) + (255,) * (4 - len(c)) for c in palette], np.uint8)
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self.age_max = age_max
+        self.pulse = pulse
+        self.count = 0
+
+        f = np.float32
+        self.x = np.zeros(capacity, f)
+        self.y = np.zeros(capacity, f)
+        self.vx = np.zeros(capacity, f)
+        self.vy = np.zeros(capacity, f)
+        self.size = np.zeros(capacity, f)
+        self.age = np.zeros(capacity, f)
+        self.age_dir = np.ones(capacity, f)
+        self.life = np.full(capacity, np.inf, f)   # 剩余寿命，inf 表示永生
+        self.color = np.zeros(capacity, np.uint8)
+        self._float_arrays = [self.x, self.y, self.vx, self.vy, self.size, self.age, self.age_dir, self.life]
+
+        # 预分配的临时数组
+        self._tmp = np.empty(capacity, f)
+        self._tmp2 = np.empty(capacity, f)
+        self._mask = np.empty(capacity, bool)
+        self._mask2 = np.empty(capacity, bool)
+        self._scratch_u8 = np.empty(capacity, np.uint8)
+        self._fade_buf = None   # render 的拖尾临时图像，只在绘制线程使用
+        self._render_bufs = None   # render 的排序键、下标等临时数组，第一次 render 时分配
+        # 按本机字节序把 RGBA 颜色看作 uint32，render 中整像素写入
+        self._palette_u32 = self.palette.view(np.uint32).reshape(-1)
+        self._rgb_unit = int(np.array([1, 1, 1, 0], np.uint8).view(np.uint32)[0])
+        self._alpha_bits = np.array([0, 0, 0, 255], np.uint8).view(np.uint32)[0]
+
+    # ---------- 发射 ----------
+    def _uniform(self, out, low, high):
+        """把 [low, high) 的均匀随机数写入 out，不分配新数组"""
+        self.rng.random(out=out, dtype=np.float32)
+        if high != low:
+            out *= high - low
+        out += low
+
+    def emit(self, n, x, y, speed=(1.0, 3.0), size=(2.0, 4.0), life=None, age=None):
+        """
+        发射 n 个粒子，容量不足时只发射剩余部分
+        :param x, y:  位置，标量或 (low, high) 区间
+        :param speed: 速度大小区间，方向随机
+        :param size:  大小区间
+        :param life:  寿命区间（与 step 的 dt 同单位），None 表示永生
+        :param age:   初始 age 区间，None 表示 [0, age_max)
+        :return: 实际发射的数量
+        """
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return 0
+        s = slice(self.count, self.count + n)
+
+        for arr, value in ((self.x, x), (self.y, y)):
+            low, high = value if isinstance(value, (tuple, list)) else (value, value)
+            self._uniform(arr[s], low, high)
+
+        angle, spd = self._tmp[:n], self._tmp2[:n]
+        self._uniform(angle, 0.0, 2 * np.pi)
+        self._uniform(spd, *speed)
+        np.cos(angle, out=self.vx[s])
+        np.sin(angle, out=self.vy[s])
+        self.vx[s] *= spd
+        self.vy[s] *= spd
+
+        self._uniform(self.size[s], *size)
+        self._uniform(self.age[s], *(age or (0.0, self.age_max)))
+        self.age_dir[s] = 1.0
+        if life is None:
+            self.life[s] = np.inf
+        else:
+            self._uniform(self.life[s], *life)
+        self.color[s] = self.rng.integers(0, len(self.palette), n, dtype=np.uint8)
+        self.count += n
+        return n
+
+    # ---------- 更新 ----------
+    def step(self, dt, width, height, age_rate=50.0):
+        """
+        推进一步：位置积分、边界反弹、age 往返、寿命递减并回收死亡粒子
+        :param dt: 步长（v1 脚本每帧传 1 即与原先“每次 update 移动 v”一致）
+        """
+        n = self.count
+        if n == 0:
+            return
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        tmp, m, m2 = self._tmp[:n], self._mask[:n], self._mask2[:n]
+
+        np.multiply(vx, dt, out=tmp)
+        x += tmp
+        np.multiply(vy, dt, out=tmp)
+        y += tmp
+
+        # 越界的粒子速度取反
+        np.less(x, 0, out=m)
+        np.logical_or(m, np.greater(x, width, out=m2), out=m)
+        np.negative(vx, out=vx, where=m)
+        np.less(y, 0, out=m)
+        np.logical_or(m, np.greater(y, height, out=m2), out=m)
+        np.negative(vy, out=vy, where=m)
+
+        # age 在 [0, age_max] 之间往返：(age - half) * dir >= half 时到达边界并掉头
+        age, age_dir = self.age[:n], self.age_dir[:n]
+        np.multiply(age_dir, age_rate * dt, out=tmp)
+        age += tmp
+        half = self.age_max / 2
+        np.subtract(age, half, out=tmp)
+        tmp *= age_dir
+        np.greater_equal(tmp, half, out=m)
+        np.negative(age_dir, out=age_dir, where=m)
+
+        # 寿命
+        life = self.life[:n]
+        life -= dt
+        np.less_equal(life, 0, out=m)
+        if m.any():
+            self._compact(m)
+
+    def _compact(self, dead):
+        """回收死亡粒子：把存活粒子压紧到数组前部（借助预分配的临时数组，不新建数组）"""
+        n = self.count
+        keep = self._mask2[:n]
+        np.logical_not(dead, out=keep)
+        k = int(np.count_nonzero(keep))
+        for arr in self._float_arrays:
+            np.compress(keep, arr[:n], out=self._tmp[:k])
+            arr[:k] = self._tmp[:k]
+        np.compress(keep, self.color[:n], out=self._scratch_u8[:k])
+        self.color[:k] = self._scratch_u8[:k]
+        self.count = k
+
+    def radius(self, out):
+        """当前绘制半径：直径 size 随 age 在 [1, 1 + pulse] 倍之间脉动"""
+        n = self.count
+        r = out[:n]
+        np.multiply(self.age[:n], self.pulse / self.age_max, out=r)
+        r += 1.0
+        r *= self.size[:n]
+        r *= 0.5
+        return r
+
+    # ---------- 与绘制线程交换 ----------
+    def snapshot_into(self, snap):
+        """把绘制需要的数据复制到 snap（复用其预分配的数组）"""
+        n = self.count
+        snap.x[:n] = self.x[:n]
+        snap.y[:n] = self.y[:n]
+        self.radius(snap.radius)
+        snap.color[:n] = self.color[:n]
+        snap.count = n
+        return snap
+
+    def publish(self, target):
+        """
+        在 update 中调用：把当前状态写入 target 三缓冲的写端槽并发布，
+        槽中的 ParticleSnapshot 第一次使用时创建，之后循环复用
+        """
+        snap = target.frame_state.back()
+        if not isinstance(snap, ParticleSnapshot) or len(snap.x) < self.capacity:
+            snap = ParticleSnapshot(self.capacity)
+        target.publish(self.snapshot_into(snap))
+
+    # ---------- 批量绘制 ----------
+    def draw_paths(self, gc, brushes, snap):
+        """
+        按颜色分组，每种颜色只构建一条路径、调用一次 FillPath（适合几千个以内的大粒子）
+        :param brushes: 与 palette 一一对应的画刷
+        """
+        n = snap.count
+        colors = snap.color[:n]
+        for index, brush in enumerate(brushes):
+            sel = np.flatnonzero(colors == index)
+            if sel.size == 0:
+                continue
+            path = gc.CreatePath()
+            for x, y, r in zip(snap.x[sel].tolist(), snap.y[sel].tolist(), snap.radius[sel].tolist()):
+                path.AddCircle(x, y, r)
+            gc.SetBrush(brush)
+            gc.FillPath(path)
+
+    def render(self, image, snap, fade_shift=3):
+        """
+        直接光栅化到 RGBA 图像（H x W x 4 的连续 uint8 数组），适合数万个小粒子，
+        之后由脚本一次性贴图到屏幕
+        :param fade_shift: 每帧把旧画面亮度减去 1/2^fade_shift 形成拖尾，None 表示清空
+        """
+        h, w = image.shape[:2]
+        pixels = image.view(np.uint32).reshape(h, w)   # 每个像素一个 uint32，按整数批量读写
+        if fade_shift is None:
+            pixels[...] = self._alpha_bits
+        else:
+            # 四个通道一起右移，再用掩码去掉相邻通道移进来的位（alpha 通道不衰减）
+            if self._fade_buf is None or self._fade_buf.shape != pixels.shape:
+                self._fade_buf = np.empty(pixels.shape, np.uint32)
+            np.right_shift(pixels, fade_shift, out=self._fade_buf)
+            self._fade_buf &= np.uint32((0xFF >> fade_shift) * self._rgb_unit)
+            pixels -= self._fade_buf
+
+        n = snap.count
+        if n == 0:
+            return
+        keys, order, tmp_i, xi, base, tmp_c, colors, index, negative_radius, coord = self._render_buffers(n)
+
+        # 按半径从大到小排序，这样“半径覆盖到某个偏移”的粒子总是一段前缀
+        # 非负 float32 的位模式与数值同序：高 32 位放取反的半径位、低 32 位放下标，原地排序不分配数组
+        np.copyto(keys, snap.radius[:n].view(np.int32))
+        np.subtract(0x7FFFFFFF, keys, out=keys)
+        np.left_shift(keys, 32, out=keys)
+        keys |= self._render_index[:n]
+        keys.sort()
+        np.bitwise_and(keys, 0xFFFFFFFF, out=order)
+        np.right_shift(keys, 32, out=tmp_i)
+        np.subtract(0x7FFFFFFF, tmp_i, out=tmp_i)
+        np.copyto(negative_radius.view(np.int32), tmp_i, casting='unsafe')
+        r_max = max(int(np.ceil(negative_radius[0])), 0)
+        if w <= 2 * r_max or h <= 2 * r_max:
+            return
+        np.negative(negative_radius, out=negative_radius)
+        # 圆心限制在离边缘 r_max 以内，盖章时不必逐个偏移做越界判断
+        np.clip(snap.y[:n], r_max, h - 1 - r_max, out=coord)
+        np.copyto(tmp_i, coord, casting='unsafe')
+        tmp_i *= w
+        np.clip(snap.x[:n], r_max, w - 1 - r_max, out=coord)
+        np.copyto(xi, coord, casting='unsafe')
+        tmp_i += xi
+        # 下标都有效；mode='clip' 时 take 直接写入 out，默认的 'raise' 会先写到临时数组
+        np.take(tmp_i, order, out=base, mode='clip')
+        np.copyto(xi, snap.color[:n])   # 先转成 int64 下标，take 不再临时转换
+        np.take(self._palette_u32, xi, out=tmp_c, mode='clip')
+        np.take(tmp_c, order, out=colors, mode='clip')
+        flat = pixels.reshape(-1)
+
+        # 按圆盘内的偏移逐个“盖章”，每个偏移只画半径覆盖到它的那段前缀
+        for dy in range(-r_max, r_max + 1):
+            for dx in range(-r_max, r_max + 1):
+                d = (dx * dx + dy * dy) ** 0.5
+                # 用 float32 比较，否则 searchsorted 会把整个数组转换成 float64
+                k = int(np.searchsorted(negative_radius, np.float32(-d), side='right'))
+                if k == 0:
+                    continue
+                stamp = index[:k]
+                np.add(base[:k], dy * w + dx, out=stamp)
+                flat[stamp] = colors[:k]
+
+    def _render_buffers(self, n):
+        """render 的临时数组按容量分配一次，返回长度为 n 的视图"""
+        if self._render_bufs is None:
+            c = self.capacity
+            self._render_index = np.arange(c, dtype=np.int64)
+            self._render_bufs = (np.empty(c, np.int64), np.empty(c, np.int64), np.empty(c, np.int64),
+                                 np.empty(c, np.int64), np.empty(c, np.int64), np.empty(c, np.uint32),
+                                 np.empty(c, np.uint32), np.empty(c, np.int64), np.empty(c, np.float32),
+                                 np.empty(c, np.float32))
+        return [buf[:n] for buf in self._render_bufs]
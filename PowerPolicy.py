@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import glob
+import ctypes
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ========== 数据源 ==========
+class Source:
+    """策略数据源接口：read() 返回当前值"""
+    def read(self):
+        raise NotImplementedError
+
+class FakeSource(Source):
+    """测试用：返回 value 属性的值"""
+    def __init__(self, value):
+        self.value = value
+
+    def read(self):
+        return self.value
+
+class ProcCpuSource(Source):
+    """从 /proc/stat 计算两次读取之间的系统 CPU 占用率（%），第一次读取返回 0"""
+    def __init__(self, path="/proc/stat"):
+        self.path = path
+        self._last = None
+
+    def read(self):
+        with open(self.path, "r") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)   # idle + iowait
+        return self._percent(sum(fields), idle)
+
+    def _percent(self, total, idle):
+        last, self._last = self._last, (total, idle)
+        if last is None or total <= last[0]:
+            return 0.0
+        return 100.0 * (1.0 - (idle - last[1]) / (total - last[0]))
+
+class WindowsCpuSource(ProcCpuSource):
+    """通过 GetSystemTimes 计算系统 CPU 占用率（%）"""
+    def read(self):
+        idle, kernel, user = (ctypes.c_ulonglong() for _ in range(3))
+        ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user))
+        # kernel 时间已包含 idle 时间
+        return self._percent(kernel.value + user.value, idle.value)
+
+class SysfsBatterySource(Source):
+    """读取 /sys/class/power_supply：存在电池且外接电源均未接通时返回 True"""
+    def __init__(self, root="/sys/class/power_supply"):
+        self.root = root
+
+    def read(self):
+        has_battery, on_mains = False, False
+        for supply in glob.glob(os.path.join(self.root, "*")):
+            kind = self._read_file(os.path.join(supply, "type"))
+            if kind == "Battery":
+                has_battery = True
+            elif kind in ("Mains", "USB") and self._read_file(os.path.join(supply, "online")) == "1":
+                on_mains = True
+        return has_battery and not on_mains
+
+    @staticmethod
+    def _read_file(path):
+        try:
+            with open(path, "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+class _SystemPowerStatus(ctypes.Structure):
+    _fields_ = [("ACLineStatus", ctypes.c_ubyte), ("BatteryFlag", ctypes.c_ubyte),
+                ("BatteryLifePercent", ctypes.c_ubyte), ("SystemStatusFlag", ctypes.c_ubyte),
+                ("BatteryLifeTime", ctypes.c_ulong), ("BatteryFullLifeTime", ctypes.c_ulong)]
+
+class WindowsBatterySource(Source):
+    """GetSystemPowerStatus：使用电池供电（ACLineStatus == 0）时返回 True"""
+    def read(self):
+        status = _SystemPowerStatus()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            return False
+        return status.ACLineStatus == 0
+
+class _LastInputInfo(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_ulong)]
+
+class WindowsIdleSource(Source):
+    """GetLastInputInfo：距离最后一次键盘鼠标输入的秒数"""
+    def read(self):
+        info = _LastInputInfo()
+        info.cbSize = ctypes.sizeof(info)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            return 0.0
+        elapsed = (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+        return elapsed / 1000.0
+
+def default_sources():
+    """按平台选择数据源：{'cpu': CPU 占用率 %, 'on_battery': 是否电池供电, 'idle': 空闲秒数}"""
+    if sys.platform.startswith("win"):
+        return {'cpu': WindowsCpuSource(), 'on_battery': WindowsBatterySource(), 'idle': WindowsIdleSource()}
+    return {'cpu': ProcCpuSource(), 'on_battery': SysfsBatterySource(), 'idle': FakeSource(0.0)}
+
+# ========== 规则与决策 ==========
+class Rule:
+    """
+    一条策略规则：when(sample) 为真时生效，之后直到 until(sample) 为真才解除（未指定 until 时 when 为假即解除）
+    生效时的动作：fps 限制帧率上限，freeze 冻结为静止画面
+    enabled 为 False 的规则不生效（由用户开关的规则，如电池供电冻结）
+    """
+    def __init__(self, name, when, fps=None, freeze=False, until=None, enabled=True):
+        self.name = name
+        self.when = when
+        self.until = until
+        self.fps = fps
+        self.freeze = freeze
+        self.enabled = enabled
+        self.active = False
+
+    def evaluate(self, sample):
+        if not self.enabled:
+            self.active = False
+        elif not self.active:
+            self.active = bool(self.when(sample))
+        elif self.until is not None:
+            self.active = not self.until(sample)
+        else:
+            self.active = bool(self.when(sample))
+        return self.active
+
+class Decision:
+    """规则合并后的结果：fps 为各生效规则中最低的帧率上限（None 表示不限制），freeze 任一规则要求即冻结"""
+    def __init__(self, fps=None, freeze=False, rules=()):
+        self.fps = fps
+        self.freeze = freeze
+        self.rules = tuple(rules)
+
+    def __eq__(self, other):
+        return isinstance(other, Decision) and (self.fps, self.freeze) == (other.fps, other.freeze)
+
+    def __repr__(self):
+        return f"Decision(fps={self.fps}, freeze={self.freeze}, rules={list(self.rules)})"
+
+BATTERY_FREEZE = "电池供电冻结"
+
+def default_rules(battery_freeze=False):
+    """
+    :param battery_freeze: 使用电池时冻结壁纸，默认关闭（托盘菜单中开启）
+    """
+    return [
+        # CPU 占用回落到 55% 以下才解除，避免限帧后负载下降又立刻恢复
+        Rule("高负载限帧", lambda s: s['cpu'] >= 70, fps=30, until=lambda s: s['cpu'] < 55),
+        Rule(BATTERY_FREEZE, lambda s: s['on_battery'], freeze=True, enabled=battery_freeze),
+        Rule("长时间空闲降帧", lambda s: s['idle'] >= 300, fps=15),
+    ]
+
+# ========== 策略引擎 ==========
+class PolicyEngine:
+    """
+    后台线程定期读取数据源、评估规则，决策变化时调用 on_change(decision)
+    新决策需连续保持 confirm 次才生效，避免在阈值附近反复切换
+    """
+    def __init__(self, sources: dict, rules, on_change, interval=2.0, confirm=2):
+        """
+        :param sources:   {名称: Source}，读取结果组成 sample 字典交给规则
+        :param rules:     Rule 列表
+        :param on_change: 回调 on_change(decision)，在策略线程中调用
+        :param interval:  采样间隔（秒）
+        """
+        self.sources = sources
+        self.rules = rules
+        self.on_change = on_change
+        self.interval = interval
+        self.confirm = confirm
+        self.decision = Decision()
+        self.sample = {}
+        self._candidate = None
+        self._count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def set_enabled(self, name, enabled):
+        """开关名为 name 的规则，下一次采样时生效；没有该规则返回 False"""
+        found = False
+        for rule in self.rules:
+            if rule.name == name:
+                rule.enabled = enabled
+                found = True
+        return found
+
+    def read_sample(self):
+        sample = {}
+        for name, source in self.sources.items():
+            try:
+                sample[name] = source.read()
+            except Exception as e:
+                logger.debug(f"读取策略数据源 {name} 失败：\n\t {e}")
+                sample[name] = 0
+        return sample
+
+    def evaluate(self, sample):
+        """按 sample 评估所有规则，返回合并后的决策"""
+        fps, freeze, names = None, False, []
+        for rule in self.rules:
+            if not rule.evaluate(sample):
+                continue
+            names.append(rule.name)
+            if rule.fps is not None:
+                fps = rule.fps if fps is None else min(fps, rule.fps)
+            freeze = freeze or rule.freeze
+        return Decision(fps, freeze, names)
+
+    def poll(self):
+        """采样并评估一次，需要时触发回调；返回当前生效的决策"""
+        self.sample = self.read_sample()
+        decision = self.evaluate(self.sample)
+        if decision == self.decision:
+            self._candidate, self._count = None, 0
+            return self.decision
+        if decision == self._candidate:
+            self._count += 1
+        else:
+            self._candidate, self._count = decision, 1
+        if self._count >= self.confirm:
+            self._candidate, self._count = None, 0
+            self.decision = decision
+            logger.info(f"功耗策略变化：{decision}，采样 {self.sample}")
+            try:
+                self.on_change(decision)
+            except Exception:
+                logger.exception("应用功耗策略时出错")
+        return self.decision
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2 + 1)
+            self._thread = None
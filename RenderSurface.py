@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import threading
+import logging
+import numbers
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class DirtyRegion:
+    """
+    脏矩形收集器：后台线程登记变化区域，主线程取走后只刷新这些区域
+    矩形过多或合并后面积过大时退化为整屏刷新
+    """
+    def __init__(self, width, height, max_rects=32, full_ratio=0.5, padding=2):
+        """
+        :param width:      画面宽度
+        :param height:     画面高度
+        :param max_rects:  超过该数量时合并为一个包围盒
+        :param full_ratio: 脏区域占整屏比例超过该值时直接整屏刷新
+        :param padding:    每个矩形向外扩展的像素（覆盖抗锯齿边缘）
+        """
+        self.width = width
+        self.height = height
+        self.max_rects = max_rects
+        self.full_ratio = full_ratio
+        self.padding = padding
+        self._lock = threading.Lock()
+        self._rects = []
+        self._full = False
+
+    def resize(self, width, height):
+        """画面尺寸变化，下一次必须整屏刷新"""
+        with self._lock:
+            self.width, self.height = width, height
+            self._full = True
+
+    def add(self, x, y, w, h):
+        """登记一个脏矩形（左上角坐标 + 宽高），自动裁剪到画面内"""
+        p = self.padding
+        x0 = max(int(x) - p, 0)
+        y0 = max(int(y) - p, 0)
+        x1 = min(int(x + w) + p + 1, self.width)
+        y1 = min(int(y + h) + p + 1, self.height)
+        if x1 <= x0 or y1 <= y0:
+            return
+        with self._lock:
+            self._rects.append((x0, y0, x1 - x0, y1 - y0))
+
+    def add_full(self):
+        """登记整屏刷新"""
+        with self._lock:
+            self._full = True
+
+    def take(self):
+        """
+        取走并清空已登记的区域
+        :return: None 表示整屏刷新（包括没有登记任何区域的情况），否则为矩形列表
+        """
+        with self._lock:
+            rects, full = self._rects, self._full
+            self._rects, self._full = [], False
+
+        if full or not rects:
+            return None
+
+        if len(rects) > self.max_rects:
+            rects = [self.bounding_box(rects)]
+
+        area = sum(w * h for _, _, w, h in rects)
+        if area >= self.full_ratio * self.width * self.height:
+            return None
+        return rects
+
+    @staticmethod
+    def bounding_box(rects):
+        """多个矩形的包围盒"""
+        x0 = min(r[0] for r in rects)
+        y0 = min(r[1] for r in rects)
+        x1 = max(r[0] + r[2] for r in rects)
+        y1 = max(r[1] + r[3] for r in rects)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+class ScaleController:
+    """
+    按帧耗时动态调整渲染分辨率：
+    最近 window 帧的平均耗时超过预算时降一档，低于 预算 * up_ratio 时升一档；
+    每次切换后重新采样 window 帧，升降阈值之间留有余量，避免来回抖动
+    """
+    def __init__(self, budget, levels=(1.0, 0.75, 0.5), window=30, up_ratio=0.5):
+        """
+        :param budget:   每帧绘制的时间预算（秒），通常为 1 / fps
+        :param levels:   可选的缩放比例，从高到低
+        :param window:   判断所需的帧数
+        :param up_ratio: 平均耗时低于 budget * up_ratio 时才升档
+                         （升一档像素数约增加 1.8 倍，阈值须明显低于 1 / 1.8）
+        """
+        self.budget = budget
+        self.levels = tuple(levels)
+        self.window = window
+        self.up_ratio = up_ratio
+        self.level = 0
+        self.changes = 0
+        self._total = 0.0
+        self._count = 0
+
+    @property
+    def scale(self):
+        return self.levels[self.level]
+
+    def record(self, seconds):
+        """
+        记录一帧的绘制耗时
+        :return: 缩放比例是否改变
+        """
+        self._total += seconds
+        self._count += 1
+        if self._count < self.window:
+            return False
+        average = self._total / self._count
+        self._total, self._count = 0.0, 0
+        if average > self.budget and self.level < len(self.levels) - 1:
+            self.level += 1
+        elif average < self.budget * self.up_ratio and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+        self.changes += 1
+        logger.info(f"渲染缩放调整为 {self.scale:.2f}（最近 {self.window} 帧平均绘制 "
+                    f"{average * 1000:.1f}ms，预算 {self.budget * 1000:.1f}ms）")
+        return True
+
+    def reset(self):
+        self.level = 0
+        self._total, self._count = 0.0, 0
+
+class ResourceCache:
+    """
+    画笔、画刷、字体、颜色的缓存（LRU，容量有限），通过 target.resources 提供给脚本：
+        gc.SetPen(target.resources.pen((255, 255, 255), 2))
+    相同样式只创建一次，避免每帧每个图形都新建 GDI 对象
+    """
+    def __init__(self, wx_module, max_size=256):
+        """
+        :param wx_module: 用于创建对象的 wx 模块（无窗口运行时为 HeadlessWx）
+        :param max_size:  最多缓存的对象个数，超出时淘汰最久未使用的
+        """
+        self.wx = wx_module
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, factory):
+        """按 key 取缓存对象，未命中时调用 factory() 创建"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item
+            self.misses += 1
+        item = factory()
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return item
+
+    @staticmethod
+    def rgba(colour):
+        """颜色统一为 (r, g, b, a) 元组作为 key；接受元组或 wx.Colour"""
+        if isinstance(colour, (tuple, list)):
+            return (tuple(colour) + (255,))[:4]
+        return tuple(colour.Get(True))
+
+    def colour(self, colour):
+        rgba = self.rgba(colour)
+        return self.get(('colour', rgba), lambda: self.wx.Colour(*rgba))
+
+    def pen(self, colour, width=1, style=None):
+        rgba = self.rgba(colour)
+        style = self.wx.PENSTYLE_SOLID if style is None else style
+        return self.get(('pen', rgba, width, style),
+                        lambda: self.wx.Pen(self.colour(rgba), width, style))
+
+    def brush(self, colour, style=None):
+        rgba = self.rgba(colour)
+        style = self.wx.BRUSHSTYLE_SOLID if style is None else style
+        return self.get(('brush', rgba, style),
+                        lambda: self.wx.Brush(self.colour(rgba), style))
+
+    def font(self, size, family=None, style=None, weight=None, face_name=""):
+        wx = self.wx
+        family = wx.FONTFAMILY_DEFAULT if family is None else family
+        style = wx.FONTSTYLE_NORMAL if style is None else style
+        weight = wx.FONTWEIGHT_NORMAL if weight is None else weight
+        return self.get(('font', size, family, style, weight, face_name),
+                        lambda: wx.Font(size, family, style, weight, False, face_name))
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def format_summary(self):
+        return (f"资源缓存 {len(self)}/{self.max_size}  命中 {self.hits}  未命中 {self.misses}  "
+                f"淘汰 {self.evictions}  命中率 {self.hit_rate:.1%}")
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+def _as_list(values, n):
+    """标量扩展为长度 n 的列表；NumPy 数组等序列转换为 Python 列表"""
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    if isinstance(values, (list, tuple)):
+        return values
+    return [values] * n
+
+class BatchContext:
+    """
+    传给 draw 的 gc：包装 GraphicsContext，除原有方法外提供批量绘制
+        gc.draw_circles(xs, ys, rs, colors)
+        gc.draw_rects(xs, ys, ws, hs, colors)
+        gc.draw_lines(segments, colors, width)
+    参数可以是列表或 NumPy 数组；按样式分组，每种样式只构建一条路径、调用一次填充/描边，
+    不再为每个图形往返一次 wx
+    """
+    def __init__(self, gc, resources):
+        self.gc = gc
+        self.resources = resources
+
+    def __getattr__(self, name):
+        # 其余方法转发给原 gc，并缓存绑定方法，之后的调用没有额外开销
+        value = getattr(self.gc, name)
+        setattr(self, name, value)
+        return value
+
+    def _groups(self, colors, n):
+        """
+        按颜色把下标分组
+        :return: [(rgba 或 None, [下标...]), ...]；colors 为 None 时沿用当前画笔/画刷
+        """
+        if colors is None:
+            return [(None, range(n))]
+        if hasattr(colors, 'tolist'):
+            colors = colors.tolist()
+        # 第一个元素本身是颜色（元组、列表、wx.Colour）时为逐个颜色的序列，否则整体是一个颜色
+        if not isinstance(colors, (list, tuple)) or (colors and isinstance(colors[0], numbers.Real)):
+            return [(self.resources.rgba(colors), range(n))]
+        groups = {}
+        rgba = self.resources.rgba
+        for i, colour in enumerate(colors):
+            key = colour if type(colour) is tuple else rgba(colour)
+            groups.setdefault(key, []).append(i)
+        return list(groups.items())
+
+    def _fill(self, colors, n, pen, add_shapes):
+        gc, res = self.gc, self.resources
+        if pen is not None:
+            gc.SetPen(pen)
+        elif colors is not None:
+            gc.SetPen(res.wx.TRANSPARENT_PEN)
+        for rgba, indices in self._groups(colors, n):
+            path = gc.CreatePath()
+            add_shapes(path, indices)
+            if rgba is not None:
+                gc.SetBrush(res.brush(rgba))
+            if pen is None and colors is not None:
+                gc.FillPath(path)
+            else:
+                gc.DrawPath(path)
+
+    def draw_circles(self, xs, ys, rs, colors=None, pen=None):
+        """
+        批量绘制实心圆
+        :param rs:     半径，标量或与 xs 等长的序列
+        :param colors: 单个颜色、与 xs 等长的颜色序列，None 表示使用当前画笔和画刷
+        :param pen:    描边画笔，None 时只填充
+        """
+        xs = _as_list(xs, 0)
+        n = len(xs)
+        ys, rs = _as_list(ys, n), _as_list(rs, n)
+
+        def add_shapes(path, indices):
+            add = path.AddCircle
+            for i in indices:
+                add(xs[i], ys[i], rs[i])
+        self._fill(colors, n, pen, add_shapes)
+
+    def draw_rects(self, xs, ys, ws, hs, colors=None, pen=None):
+        """批量绘制矩形，参数含义同 draw_circles"""
+        xs = _as_list(xs, 0)
+        n = len(xs)
+        ys, ws, hs = _as_list(ys, n), _as_list(ws, n), _as_list(hs, n)
+
+        def add_shapes(path, indices):
+            add = path.AddRectangle
+            for i in indices:
+                add(xs[i], ys[i], ws[i], hs[i])
+        self._fill(colors, n, pen, add_shapes)
+
+    def draw_lines(self, segments, colors=None, width=1):
+        """
+        批量绘制线段
+        :param segments: [(x1, y1, x2, y2), ...] 或 N x 4 数组
+        :param colors:   单个颜色、每条线段一个颜色，None 表示使用当前画笔
+        :param width:    线宽（colors 为 None 时忽略）
+        """
+        segments = _as_list(segments, 0)
+        gc, res = self.gc, self.resources
+        for rgba, indices in self._groups(colors, len(segments)):
+            path = gc.CreatePath()
+            move, line = path.MoveToPoint, path.AddLineToPoint
+            for i in indices:
+                x1, y1, x2, y2 = segments[i]
+                move(x1, y1)
+                line(x2, y2)
+            if rgba is not None:
+                gc.SetPen(res.pen(rgba, width))
+            gc.StrokePath(path)
+
+class Layer:
+    """
+    合成器中的一层
+    static 层只在失效（invalidate）或尺寸变化时重绘到缓存位图，之后每帧直接贴图
+    """
+    def __init__(self, name, draw_func, static=True, z=-1):
+        self.name = name
+        self.draw_func = draw_func   # draw(gc, width, height, target)
+        self.static = static
+        self.z = z
+        self.valid = False   # 缓存是否可用（只对 static 层有意义）
+        self.cache = None    # 宿主创建的缓存位图
+        self.drawable = None # 由 cache 转换的可直接贴图的对象（如 wx.GraphicsBitmap），随 cache 失效
+        self.renders = 0     # 缓存重绘次数
+
+class LayerStack:
+    """
+    按 z 从下到上排列的命名图层，脚本本身的 draw 位于 z = 0
+    z < 0 的层画在脚本 draw 之下（如静态背景），z > 0 的层画在其上
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._layers = {}
+        self._order = []       # 按 z 排序（z 相同按添加顺序）的图层列表，绘制线程直接遍历
+        self._changed = False  # 有图层增删或失效，需要重绘
+
+    def add(self, name, draw_func, static=True, z=-1):
+        """添加（或替换同名）图层"""
+        layer = Layer(name, draw_func, static, z)
+        with self._lock:
+            old = self._layers.pop(name, None)
+            self._layers[name] = layer
+            self._sort()
+            self._changed = True
+        return old
+
+    def remove(self, name):
+        """移除图层，返回被移除的图层（宿主据此释放缓存），不存在时返回 None"""
+        with self._lock:
+            layer = self._layers.pop(name, None)
+            if layer is not None:
+                self._sort()
+                self._changed = True
+        return layer
+
+    def _sort(self):
+        self._order = sorted(self._layers.values(), key=lambda layer: layer.z)
+
+    def get(self, name):
+        return self._layers.get(name)
+
+    def invalidate(self, name=None):
+        """标记图层需要重绘缓存，name 为 None 表示全部（如尺寸变化）；不存在的图层忽略"""
+        if name is None:
+            layers = self._order
+        else:
+            layer = self._layers.get(name)
+            if layer is None:
+                logger.warning(f"图层 {name!r} 不存在，忽略 invalidate")
+                return
+            layers = [layer]
+        for layer in layers:
+            layer.valid = False
+        self._changed = True
+
+    def take_changed(self):
+        """取走“需要重绘”的标记"""
+        changed, self._changed = self._changed, False
+        return changed
+
+    def below(self):
+        """画在脚本 draw 之下的图层"""
+        return [layer for layer in self._order if layer.z < 0]
+
+    def above(self):
+        """画在脚本 draw 之上的图层"""
+        return [layer for layer in self._order if layer.z >= 0]
+
+    @property
+    def base(self):
+        """
+        位于最底层的 static 层（没有则为 None）：其缓存不透明、覆盖整屏，
+        宿主绘制时可以跳过清空背景
+        """
+        order = self._order
+        if order and order[0].z < 0 and order[0].static:
+            return order[0]
+        return None
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import logging
+import numbers
+import threading
+import importlib.util
+
+from FrameScheduler import FrameScheduler, FixedTimestep
+from RenderSurface import DirtyRegion, ResourceCache, BatchContext, LayerStack
+from FrameStats import FrameStats
+from StateBuffer import TripleBuffer
+
+logger = logging.getLogger(__name__)
+
+# ========== 脚本加载 ==========
+def load_script(py_path: str, overrides=None):
+    """
+    按 WallpaperProc.start_by_PY 的方式导入壁纸脚本
+    :param py_path:   脚本路径
+    :param overrides: {模块名: 替身模块}，仅在执行脚本代码期间替换 sys.modules 中的模块
+                      （例如无窗口运行时用 HeadlessWx 代替 wx）
+    :return: 模块对象，加载失败返回 None
+    """
+    module_name = os.path.splitext(os.path.basename(py_path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, py_path)
+    if spec is None:
+        logger.error(f"无法加载脚本: {py_path}")
+        return None
+    module = importlib.util.module_from_spec(spec)
+
+    saved = {}
+    for name, replacement in (overrides or {}).items():
+        saved[name] = sys.modules.get(name)
+        sys.modules[name] = replacement
+    try:
+        spec.loader.exec_module(module)  # type: ignore
+    finally:
+        for name, original in saved.items():
+            if original is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = original
+    return module
+
+def is_wx_script(module):
+    """脚本是否提供了 init/update/draw 三个函数"""
+    return all(callable(getattr(module, name, None)) for name in ('init', 'update', 'draw'))
+
+def script_options(module):
+    """读取脚本中的可选配置，作为 WallpaperFrame 的关键字参数"""
+    return {
+        'fps': getattr(module, 'FPS', 60),
+        'script_version': getattr(module, 'SCRIPT_VERSION', 1),
+        'sim_hz': getattr(module, 'SIM_HZ', 60),
+    }
+
+def _is_rect(value):
+    """是否为 (x, y, w, h) 形式的矩形"""
+    return (isinstance(value, (list, tuple)) and len(value) == 4
+            and all(isinstance(v, numbers.Real) for v in value))
+
+# ========== 脚本宿主 ==========
+class ScriptHost:
+    """
+    脚本宿主的公共逻辑（WallpaperFrame 与无窗口的 HeadlessFrame 共用）
+    负责帧调度、v1/v2 协议的 update/draw 调用以及脏矩形收集
+    """
+    def _setup_host(self, update_func, draw_func, width, height, fps=60,
+                    script_version=1, sim_hz=60, clock=None, stats=False, wx_module=None):
+        """
+        :param clock:     时钟函数，None 使用真实时钟；无窗口运行时传入虚拟时钟以保证结果可复现
+        :param stats:     是否启用逐帧计时统计
+        :param wx_module: 创建画笔、画刷等对象的 wx 模块（无窗口运行时为 HeadlessWx）
+        """
+        self.update_func = update_func
+        self.draw_func = draw_func
+        # 热重载：替换 update/draw 时与正在执行的 update 互斥；
+        # 新代码第一次 update / draw 出错时退回 _fallback 中的旧函数
+        self._script_lock = threading.RLock()
+        self._fallback = None
+        self._probation = set()
+
+        clock_kwargs = {'clock': clock} if clock is not None else {}
+        # 帧调度器（取代固定的 16ms sleep 和定时器）
+        self.scheduler = FrameScheduler(fps, **clock_kwargs)
+        self.base_fps = fps   # 脚本要求的帧率，set_fps_cap 在此基础上限制
+        self.fps_cap = None
+        # v2 协议：固定步长模拟，与渲染帧率解耦
+        self.script_version = script_version
+        self.timestep = FixedTimestep(sim_hz, **clock_kwargs) if script_version >= 2 else None
+        self.alpha = 0.0
+
+        # 脏矩形：只刷新变化的区域，未登记时整屏刷新
+        self.dirty = DirtyRegion(width, height)
+        self.update_rect = (0, 0, width, height)   # 本次绘制的区域，draw 可据此裁剪
+
+        # 逐帧计时统计（脚本也可读取 target.stats.fps）
+        self.stats = FrameStats(enabled=stats, **clock_kwargs)
+
+        # 画笔、画刷、字体、颜色缓存（脚本通过 target.resources 使用）
+        self.resources = ResourceCache(wx_module) if wx_module is not None else None
+        self._batch = None   # 包装当前 gc 的 BatchContext，gc 不变时复用
+
+        # 命名图层：static 层缓存为位图，只在失效或尺寸变化时重绘
+        self.layers = LayerStack()
+
+        # update 通过 publish() 发布状态快照，draw 通过 self.snapshot 读取，互不阻塞
+        self.frame_state = TripleBuffer()
+        self.snapshot = None
+
+        # 变化检测：invalidate() 递增 generation，update 返回 False 时据此判断是否仍需重绘
+        self.generation = 0
+        self._last_step_changed = True
+        self._first_frame = True   # 第一帧总是绘制，即使 update 报告没有变化
+        self._warned_dirty = False   # 无效脏矩形只警告一次
+
+    def _run_update(self):
+        """
+        执行一帧的更新：v1 调用一次，v2 按累积的真实时间补跑固定步长
+        :return: 是否需要重绘
+        """
+        generation = self.generation
+        with self._script_lock:
+            if self._fallback is None:
+                need_redraw, _ = self._step_update()
+            else:
+                try:
+                    need_redraw, ran = self._step_update()
+                except Exception:
+                    self._restore_fallback('update')
+                    need_redraw = True
+                else:
+                    # v2 的帧可能没有模拟步，新 update 真正执行过才算通过
+                    if ran:
+                        self._passed_probation('update')
+        # update 中调用过 invalidate，或图层增删、失效时，即使 update 报告没有变化也要重绘
+        first, self._first_frame = self._first_frame, False
+        return self.layers.take_changed() or need_redraw or generation != self.generation or first
+
+    def _step_update(self):
+        """:return: (是否需要重绘, 本帧是否调用了脚本的 update)"""
+        if self.timestep is None:
+            return self._collect_dirty(self.update_func(self)), True
+        steps = self.timestep.advance()
+        # 没有模拟步时 alpha 仍在变化，只要上一步有变化就需要重绘插值画面
+        need_redraw = steps == 0 and self._last_step_changed
+        for _ in range(steps):
+            self._last_step_changed = self._collect_dirty(self.update_func(self, self.timestep.dt))
+            need_redraw |= self._last_step_changed
+        self.alpha = self.timestep.alpha
+        return need_redraw, steps > 0
+
+    def replace_script(self, update_func, draw_func, migrate=None):
+        """
+        热重载：替换 update / draw，窗口、后台缓冲、图层和 target 上的状态都保留
+        应在绘制线程（wx 主线程）中调用，期间不会有 update 在执行
+        :param migrate: migrate(target)，在替换前调用；抛出异常时不替换
+        """
+        with self._script_lock:
+            if migrate is not None:
+                migrate(self)
+            self._fallback = (self.update_func, self.draw_func)
+            self._probation = {'update', 'draw'}
+            self.update_func = update_func
+            self.draw_func = draw_func
+        self.invalidate()
+
+    def _passed_probation(self, stage):
+        """新代码的 update 与 draw 都成功执行过一次后，不再保留旧函数"""
+        self._probation.discard(stage)
+        if not self._probation:
+            self._fallback = None
+
+    def _restore_fallback(self, stage):
+        """在 except 块中调用：记录异常并换回重载前的 update / draw"""
+        logger.exception(f"重载后的 {stage} 出错，恢复旧代码")
+        with self._script_lock:
+            if self._fallback is not None:
+                self.update_func, self.draw_func = self._fallback
+                self._fallback = None
+                self._probation = set()
+        self.dirty.add_full()
+
+    def set_fps_cap(self, cap=None):
+        """限制帧率上限（如功耗策略），None 恢复脚本要求的帧率；可在任意线程调用"""
+        self.fps_cap = cap
+        fps = self.base_fps if cap is None else min(self.base_fps, cap)
+        if fps != self.scheduler.fps:
+            self.scheduler.set_fps(fps)
+
+    def _resume_timing(self):
+        """暂停后恢复：从当前时刻重新调度，暂停期间的时间不补跑模拟、不计入统计"""
+        self.scheduler.start()
+        if self.timestep is not None:
+            self.timestep.resume()
+        self.stats.resume()
+
+    def _collect_dirty(self, result):
+        """
+        处理 update 的返回值
+        :param result: None 或 True 整屏重绘（None 为原行为）；False 表示画面没有变化，不绘制；
+                       单个脏矩形 (x, y, w, h) 或脏矩形列表则登记这些区域，空列表同 False；
+                       无法识别的矩形记录警告并整屏重绘
+        :return: 是否需要重绘
+        """
+        if result is False:
+            return False
+        if isinstance(result, (list, tuple)):
+            rects = [result] if _is_rect(result) else result
+            for rect in rects:
+                if not _is_rect(rect):
+                    if not self._warned_dirty:
+                        self._warned_dirty = True
+                        logger.warning(f"update 返回了无效的脏矩形 {rect!r}，应为 (x, y, w, h)，改为整屏重绘")
+                    self.dirty.add_full()
+                    return True
+                self.dirty.add(*rect)
+            return len(rects) > 0
+        return True
+
+    def _run_draw(self, gc, width, height):
+        """按脚本协议版本调用 draw_func"""
+        # 绘制期间 self.snapshot 保持不变，不受 update 线程影响
+        self.snapshot = self.frame_state.consume()
+        gc = self._batch_context(gc)
+        for layer in self.layers.below():
+            self._draw_layer(gc, width, height, layer)
+        if self._fallback is None:
+            self._call_draw(gc, width, height)
+        else:
+            try:
+                self._call_draw(gc, width, height)
+            except Exception:
+                self._restore_fallback('draw')
+                self._call_draw(gc, width, height)
+            else:
+                self._passed_probation('draw')
+        for layer in self.layers.above():
+            self._draw_layer(gc, width, height, layer)
+
+    def _call_draw(self, gc, width, height):
+        if self.timestep is None:
+            self.draw_func(gc, width, height, self)
+        else:
+            self.draw_func(gc, width, height, self, self.alpha)
+
+    # ---------- 图层 ----------
+    def add_layer(self, name, draw_func, static=True, z=-1):
+        """
+        添加命名图层
+        :param draw_func: draw(gc, width, height, target)
+        :param static:    True 时绘制结果缓存为位图，只在 invalidate_layer 或尺寸变化后重绘；
+                          False 时每帧绘制
+        :param z:         层次，< 0 在脚本 draw 之下，>= 0 在其上
+        """
+        old = self.layers.add(name, draw_func, static, z)
+        if old is not None:
+            self._release_layer(old)
+        self.dirty.add_full()
+
+    def remove_layer(self, name):
+        layer = self.layers.remove(name)
+        if layer is not None:
+            self._release_layer(layer)
+            self.dirty.add_full()
+
+    def invalidate_layer(self, name=None):
+        """标记图层需要重绘，可在 update 中调用；name 为 None 表示全部图层"""
+        self.layers.invalidate(name)
+        self.dirty.add_full()
+
+    def _draw_layer(self, gc, width, height, layer):
+        if not layer.static:
+            layer.draw_func(gc, width, height, self)
+            return
+        if not layer.valid or layer.cache is None:
+            # 最底层的缓存不透明（带背景色），其余层透明，叠加时保留下层内容
+            opaque = layer is self.layers.base
+            layer.cache = self._render_layer(layer, width, height, opaque)
+            layer.drawable = None
+            layer.valid = True
+            layer.renders += 1
+            logger.debug(f"图层 {layer.name} 已重绘缓存（第 {layer.renders} 次）")
+        if layer.drawable is None:
+            layer.drawable = self._layer_drawable(gc, layer.cache)
+        gc.DrawBitmap(layer.drawable, 0, 0, width, height)
+
+    def _render_layer(self, layer, width, height, opaque):
+        """
+        由宿主实现：把 static 层绘制到 width x height 的位图并返回
+        （可复用 layer.cache 中尺寸相同的旧位图）
+        """
+        raise NotImplementedError
+
+    def _layer_drawable(self, gc, bitmap):
+        """
+        由宿主按需实现：把缓存位图转换为 gc 可直接贴图的对象，只在缓存重绘后转换一次
+        （wx 的 GraphicsContext 每次 DrawBitmap(wx.Bitmap) 都要重新转换整张位图）
+        """
+        return bitmap
+
+    def _release_layer(self, layer):
+        """由宿主按需实现：释放图层的缓存位图"""
+        layer.cache = None
+        layer.drawable = None
+
+    def _batch_context(self, gc):
+        """给 gc 加上批量绘制方法（draw_circles / draw_lines / draw_rects）"""
+        if self.resources is None:
+            return gc
+        if self._batch is None or self._batch.gc is not gc:
+            self._batch = BatchContext(gc, self.resources)
+        return self._batch
+
+    def publish(self, state):
+        """
+        在 update 中调用：发布一份绘制所需的状态快照（发布后不应再修改）
+        draw 中通过 target.snapshot 读取最新快照
+        """
+        self.frame_state.publish(state)
+
+    def invalidate(self, x=None, y=None, w=None, h=None):
+        """
+        登记需要重绘的区域，可在 update 中调用
+        不传参数表示整屏重绘
+        """
+        if x is None:
+            self.dirty.add_full()
+        else:
+            self.dirty.add(x, y, w, h)
+        self.generation += 1
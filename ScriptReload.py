@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+py 壁纸热重载：监视脚本文件的修改时间，变化后重新执行脚本，
+在运行中的窗口上替换 update / draw，不关闭窗口、不重新 init
+"""
+import os
+import logging
+import threading
+
+from ScriptHost import load_script, is_wx_script
+
+logger = logging.getLogger(__name__)
+
+# 脚本可定义的状态迁移钩子：on_reload(target, old_module)，在替换 update / draw 之前调用
+MIGRATE_HOOK = 'on_reload'
+
+def get_mtime(path):
+    """文件修改时间，文件不存在（编辑器保存时可能短暂删除）返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+# ========== 文件监视 ==========
+class ScriptWatcher:
+    """
+    后台线程定期比较脚本的修改时间，变化后调用 on_change(path)
+    修改时间需在连续两次查询中保持不变才通知，避免编辑器分多次写入时读到半个文件
+    """
+    def __init__(self, path, on_change, interval=0.5):
+        """
+        :param on_change: 回调 on_change(path)，在监视线程中调用
+        :param interval:  查询间隔（秒）
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.mtime = get_mtime(path)
+        self._pending = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """查询一次，确认文件已修改时触发回调；返回是否触发"""
+        mtime = get_mtime(self.path)
+        if mtime is None or mtime == self.mtime:
+            self._pending = None
+            return False
+        if mtime != self._pending:
+            # 第一次看到新的修改时间，等下一次查询确认写入已结束
+            self._pending = mtime
+            return False
+        self._pending = None
+        self.mtime = mtime
+        logger.info(f"脚本已修改：{self.path}")
+        try:
+            self.on_change(self.path)
+        except Exception:
+            logger.exception("处理脚本修改时出错")
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2 + 1)
+            self._thread = None
+
+# ========== 重载 ==========
+def reload_script(host, py_path, old_module, overrides=None):
+    """
+    重新执行脚本并替换 host（WallpaperFrame / HeadlessFrame）上的 update / draw
+    脚本在新的模块对象中执行，旧模块保持不变：加载出错、缺少函数或迁移钩子出错时旧代码继续运行
+    新模块定义了 on_reload(target, old_module) 时，在替换前调用，用于迁移或补充 target 上的状态；
+    未定义时沿用 target 上已有的状态，不再调用 init
+    :param overrides: 同 load_script，无窗口运行时传入 {'wx': HeadlessWx}
+    :return: 新模块，失败返回 None
+    """
+    try:
+        module = load_script(py_path, overrides)
+    except Exception:
+        logger.exception(f"重载脚本失败，继续运行旧代码：{py_path}")
+        return None
+    if module is None:
+        return None
+    if not is_wx_script(module):
+        logger.error(f"重载后的脚本缺少 init/update/draw，继续运行旧代码：{py_path}")
+        return None
+    old_version = getattr(old_module, 'SCRIPT_VERSION', 1)
+    if getattr(module, 'SCRIPT_VERSION', 1) != old_version:
+        logger.error(f"热重载不支持修改 SCRIPT_VERSION，请重新选择脚本：{py_path}")
+        return None
+
+    migrate = getattr(module, MIGRATE_HOOK, None)
+    if migrate is not None and not callable(migrate):
+        migrate = None
+    try:
+        host.replace_script(module.update, module.draw,
+                            migrate=(lambda target: migrate(target, old_module)) if migrate else None)
+    except Exception:
+        logger.exception(f"{MIGRATE_HOOK} 出错，继续运行旧代码：{py_path}")
+        return None
+    host.base_fps = getattr(module, 'FPS', host.base_fps)
+    host.set_fps_cap(host.fps_cap)
+    logger.info(f"脚本已热重载：{py_path}")
+    return module
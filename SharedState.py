@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import array
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+
+from FrameScheduler import FrameScheduler, FixedTimestep
+
+logger = logging.getLogger(__name__)
+
+# 共享内存头部：5 个 int64
+_BACK, _MIDDLE, _FRONT, _FRESH, _SEQ = range(5)
+_HEADER_SIZE = 5 * 8
+
+class StateLayout:
+    """
+    共享状态的内存布局，由脚本中的 STATE_LAYOUT 描述：
+        STATE_LAYOUT = {'x': ('d', 1000), 'y': ('d', 1000), 'count': ('i', 1)}
+    每个字段为 (array 类型码, 元素个数)，按 8 字节对齐依次排列
+    """
+    def __init__(self, fields: dict):
+        self.fields = []
+        offset = 0
+        for name, (typecode, length) in fields.items():
+            itemsize = array.array(typecode).itemsize
+            self.fields.append((name, typecode, length, offset))
+            offset += itemsize * length
+            offset = (offset + 7) // 8 * 8
+        self.size = max(offset, 8)
+
+    def views(self, buffer: memoryview):
+        """在一段缓冲上按布局生成 {字段名: 类型化 memoryview}，不复制数据"""
+        result = {}
+        for name, typecode, length, offset in self.fields:
+            itemsize = array.array(typecode).itemsize
+            result[name] = buffer[offset:offset + itemsize * length].cast(typecode)
+        return result
+
+    def allocate(self):
+        """生成与布局一致的本地数组（模拟进程内的工作副本）"""
+        return {name: array.array(typecode, bytes(array.array(typecode).itemsize * length))
+                for name, typecode, length, _ in self.fields}
+
+class SharedTripleBuffer:
+    """
+    跨进程的三缓冲：共享内存中放三个槽和一个头部
+    写端（模拟进程）写 back 槽后发布，读端（绘制线程）取 front 槽直接读取，不复制；
+    下标交换由一把进程间锁保护，只在交换时持有
+    """
+    def __init__(self, slot_size, lock, name=None):
+        """
+        :param slot_size: 每个槽的字节数
+        :param lock:      multiprocessing.Lock，两端共用
+        :param name:      None 表示新建共享内存，否则连接已有的共享内存
+        """
+        self.slot_size = slot_size
+        self.lock = lock
+        total = _HEADER_SIZE + 3 * slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=total)
+            self._owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._header = self.shm.buf[:_HEADER_SIZE].cast('q')
+        if self._owner:
+            self._header[_BACK], self._header[_MIDDLE], self._header[_FRONT] = 0, 1, 2
+            self._header[_FRESH] = 0
+            self._header[_SEQ] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def seq(self):
+        """已发布的次数"""
+        return self._header[_SEQ]
+
+    def _slot(self, index):
+        start = _HEADER_SIZE + index * self.slot_size
+        return self.shm.buf[start:start + self.slot_size]
+
+    def back(self):
+        """写端持有的槽（只有写端会修改 back 下标，因此无需加锁）"""
+        return self._slot(self._header[_BACK])
+
+    def publish(self):
+        with self.lock:
+            h = self._header
+            h[_BACK], h[_MIDDLE] = h[_MIDDLE], h[_BACK]
+            h[_FRESH] = 1
+            h[_SEQ] += 1
+
+    def consume(self):
+        """读端：切换到最新的槽并返回其 memoryview；从未发布过时返回 None"""
+        h = self._header
+        if h[_FRESH]:
+            with self.lock:
+                h[_FRONT], h[_MIDDLE] = h[_MIDDLE], h[_FRONT]
+                h[_FRESH] = 0
+        if h[_SEQ] == 0:
+            return None
+        return self._slot(h[_FRONT])
+
+    def close(self):
+        self._header.release()
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+class SimulationTarget:
+    """模拟进程中传给 init/update 的 target：提供画面尺寸和本地状态数组"""
+    def __init__(self, width, height, layout: StateLayout):
+        self.width = width
+        self.height = height
+        self.state = layout.allocate()
+
+    def GetSize(self):
+        return self.width, self.height
+
+    GetClientSize = GetSize
+
+def _load_child_script(py_path, required, role):
+    """
+    子进程中导入脚本，加载出错或缺少 required 中的函数时记录日志并返回 None（子进程随即正常退出）
+    :param role: 日志中的进程名称
+    """
+    from ScriptHost import load_script
+
+    try:
+        module = load_script(py_path)
+    except Exception:
+        logger.exception(f"{role}导入脚本失败：{py_path}")
+        return None
+    if module is None:
+        logger.error(f"{role}无法加载脚本：{py_path}")
+        return None
+    missing = [name for name in required if not callable(getattr(module, name, None))]
+    if missing:
+        logger.error(f"{role}的脚本缺少 {'/'.join(missing)}：{py_path}")
+        return None
+    return module
+
+def _simulation_main(py_path, shm_name, fields, lock, stop_event, running, width, height, fps, script_version, sim_hz):
+    """模拟进程入口：导入脚本，循环执行 init/update 并把状态写入共享内存"""
+    module = _load_child_script(py_path, ('init', 'update'), "模拟进程")
+    if module is None:
+        return
+    layout = StateLayout(fields)
+    buffer = SharedTripleBuffer(layout.size, lock, name=shm_name)
+    target = SimulationTarget(width, height, layout)
+    module.init(target)
+
+    scheduler = FrameScheduler(fps)
+    timestep = FixedTimestep(sim_hz) if script_version >= 2 else None
+    scheduler.start()
+    try:
+        while not stop_event.is_set():
+            if not running.is_set():
+                # 暂停：定期检查停止信号，恢复后不补跑暂停期间的模拟
+                if running.wait(0.2):
+                    scheduler.start()
+                    if timestep is not None:
+                        timestep.resume()
+                continue
+            if timestep is None:
+                module.update(target)
+            else:
+                for _ in range(timestep.advance()):
+                    module.update(target, timestep.dt)
+            views = layout.views(buffer.back())
+            for name, values in target.state.items():
+                views[name][:] = values
+            for view in views.values():
+                view.release()
+            buffer.publish()
+            scheduler.wait()
+    finally:
+        buffer.close()
+
+class SimulationProcess:
+    """
+    在独立进程中运行脚本的 init/update（不与 UI 线程争用 GIL），
+    状态经共享内存三缓冲交给本进程的 draw 零拷贝读取
+    """
+    def __init__(self, py_path, module, width, height, fps=60, script_version=1, sim_hz=60):
+        """
+        :param module: 已在本进程导入的脚本模块，用于读取 STATE_LAYOUT
+        """
+        fields = getattr(module, 'STATE_LAYOUT', None)
+        if not fields:
+            raise ValueError(f"进程模式的脚本必须定义 STATE_LAYOUT：{py_path}")
+        self.layout = StateLayout(fields)
+        self._lock = multiprocessing.Lock()
+        self.buffer = SharedTripleBuffer(self.layout.size, self._lock)
+        self._stop_event = multiprocessing.Event()
+        self._running = multiprocessing.Event()   # 清除时模拟进程暂停
+        self._running.set()
+        self._last_seq = 0
+        self._views = None
+        self.process = multiprocessing.Process(
+            target=_simulation_main,
+            args=(py_path, self.buffer.name, fields, self._lock, self._stop_event, self._running,
+                  width, height, fps, script_version, sim_hz),
+            daemon=True
+        )
+        self.process.start()
+        logger.info(f"模拟进程已启动 (PID: {self.process.pid})，共享状态 {self.layout.size} 字节 x3")
+
+    def host_update(self, target, dt=None):
+        """作为 WallpaperFrame 的 update_func：只在模拟进程发布了新状态时请求重绘"""
+        seq = self.buffer.seq
+        if seq == self._last_seq:
+            return []
+        self._last_seq = seq
+        return None
+
+    def consume(self):
+        """在绘制线程调用：返回 {字段名: memoryview}，直到下一次 consume 之前都不会被改写"""
+        slot = self.buffer.consume()
+        if slot is None:
+            return None
+        self._release_views()
+        self._views = self.layout.views(slot)
+        return self._views
+
+    def wrap_draw(self, draw_func):
+        """包装脚本的 draw：绘制前把最新的共享状态放到 target.snapshot"""
+        def draw(gc, width, height, target, *args):
+            target.snapshot = self.consume()
+            if target.snapshot is not None:
+                draw_func(gc, width, height, target, *args)
+        return draw
+
+    def _release_views(self):
+        if self._views:
+            for view in self._views.values():
+                view.release()
+        self._views = None
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        self._running.set()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            logger.warning("模拟进程未按时退出，强制终止")
+            self.process.terminate()
+        self._release_views()
+        self.buffer.close()
+
+# ========== 渲染进程（共享内存帧缓冲） ==========
+class RenderTarget:
+    """渲染进程中传给 init/render 的 target"""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.frame_index = 0   # 已发布的帧数
+
+    def GetSize(self):
+        return self.width, self.height
+
+    GetClientSize = GetSize
+
+def _renderer_main(py_path, shm_name, lock, stop_event, running, width, height):
+    """渲染进程入口：导入脚本，循环调用 render 把整帧 RGBA 写入共享内存"""
+    module = _load_child_script(py_path, ('render',), "渲染进程")
+    if module is None:
+        return
+    render = module.render
+    buffer = SharedTripleBuffer(width * height * 4, lock, name=shm_name)
+    target = RenderTarget(width, height)
+    if callable(getattr(module, 'init', None)):
+        module.init(target)
+
+    scheduler = FrameScheduler(getattr(module, 'FPS', 60))
+    scheduler.start()
+    try:
+        while not stop_event.is_set():
+            if not running.is_set():
+                if running.wait(0.2):
+                    scheduler.start()
+                continue
+            # 直接写入 back 槽，不经过本地缓冲
+            pixels = buffer.back()
+            changed = render(target, pixels)
+            pixels.release()
+            if changed is not False:
+                buffer.publish()
+                target.frame_index += 1
+            scheduler.wait()
+    finally:
+        buffer.close()
+
+class RendererProcess:
+    """
+    在独立进程中运行 NOT_USE_WX 脚本的 render，整帧 RGBA 经共享内存三缓冲交给 WallpaperFrame 贴图
+    脚本崩溃只结束渲染进程，壁纸停留在最后一帧
+    """
+    def __init__(self, py_path, width, height):
+        """
+        :param width, height: 帧尺寸（屏幕尺寸），贴图时拉伸到窗口
+        """
+        self.py_path = py_path
+        self.width = width
+        self.height = height
+        self._lock = multiprocessing.Lock()
+        self.buffer = SharedTripleBuffer(width * height * 4, self._lock)
+        # 三个槽的 alpha 预先填为不透明，脚本可以只写 RGB
+        pixels = self.buffer.shm.buf[_HEADER_SIZE:]
+        pixels[3::4] = b'\xff' * (len(pixels) // 4)
+        pixels.release()
+        self._stop_event = multiprocessing.Event()
+        self._running = multiprocessing.Event()   # 清除时渲染进程暂停
+        self._running.set()
+        self._last_seq = 0
+        self._exited = False
+        self._bitmap = None
+        self.process = multiprocessing.Process(
+            target=_renderer_main,
+            args=(py_path, self.buffer.name, self._lock, self._stop_event, self._running, width, height),
+            daemon=True
+        )
+        self.process.start()
+        logger.info(f"渲染进程已启动 (PID: {self.process.pid})，帧缓冲 {width}x{height} x3")
+
+    def host_update(self, target):
+        """作为 WallpaperFrame 的 update_func：渲染进程发布了新帧时才重绘"""
+        seq = self.buffer.seq
+        if seq != self._last_seq:
+            self._last_seq = seq
+            return None
+        if not self._exited and not self.process.is_alive():
+            self._exited = True
+            logger.error(f"渲染进程已退出 (exitcode={self.process.exitcode})，保留最后一帧：{self.py_path}")
+        return False
+
+    def draw(self, gc, width, height, target):
+        """作为 WallpaperFrame 的 draw_func：从共享内存直接复制到复用的位图后一次贴图"""
+        slot = self.buffer.consume()
+        if slot is None:
+            return
+        wx = target.resources.wx
+        if self._bitmap is None:
+            self._bitmap = wx.Bitmap.FromBufferRGBA(self.width, self.height, slot)
+        else:
+            self._bitmap.CopyFromBuffer(slot, wx.BitmapBufferFormat_RGBA)
+        slot.release()
+        gc.DrawBitmap(self._bitmap, 0, 0, width, height)
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        self._running.set()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            logger.warning("渲染进程未按时退出，强制终止")
+            self.process.terminate()
+        self._bitmap = None
+        self.buffer.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+均匀网格空间索引：把粒子按所在格子排序存放，按半径查询邻居时只检查附近的格子，
+碰撞、群聚、近邻连线等粒子间作用不必两两比较（O(n²)）
+"""
+import sys
+import time
+import numpy as np
+
+class SpatialGrid:
+    """
+    覆盖 [0, width) x [0, height) 的均匀网格，格子边长 cell_size（取常用查询半径最合适）
+    越界的点归入最近的边缘格子，查询结果仍按真实距离过滤
+    每帧调用 rebuild() 后再查询；索引保存的是 rebuild 时传入数组的下标
+    """
+    def __init__(self, width, height, cell_size):
+        self.cell_size = float(cell_size)
+        self.resize(width, height)
+        self.count = 0
+        self.x = self.y = None
+        self.cell = np.zeros(0, np.int32)     # 每个点所在格子
+        self.order = np.zeros(0, np.int32)    # 按格子排序后的点下标
+        self.moved = 0                        # 上一次 rebuild 中换了格子的点数
+
+    def resize(self, width, height):
+        """区域尺寸变化时调用，下一次 rebuild 会完整重建"""
+        self.width, self.height = width, height
+        self.cols = max(int(np.ceil(width / self.cell_size)), 1)
+        self.rows = max(int(np.ceil(height / self.cell_size)), 1)
+        self.start = np.zeros(self.cols * self.rows + 1, np.int32)   # 每个格子在 order 中的起止位置
+        self.cell = np.zeros(0, np.int32)
+
+    def _cells_of(self, x, y):
+        cx = np.floor_divide(x, self.cell_size).astype(np.int32)
+        cy = np.floor_divide(y, self.cell_size).astype(np.int32)
+        np.clip(cx, 0, self.cols - 1, out=cx)
+        np.clip(cy, 0, self.rows - 1, out=cy)
+        cy *= self.cols
+        cy += cx
+        return cy
+
+    def rebuild(self, x, y, count=None):
+        """
+        按当前坐标更新索引
+        增量更新：没有点换格子时直接沿用上次的排序；只有少量点换格子时，在上次的顺序上做稳定排序
+        （接近有序的数据，timsort 近似线性）；点数变化时完整重建
+        :param x, y:  坐标数组（如 ParticleSystem.x / y），只使用前 count 个
+        """
+        n = len(x) if count is None else count
+        self.x, self.y = x[:n], y[:n]
+        cell = self._cells_of(self.x, self.y)
+
+        if n != len(self.cell):
+            self.moved = n
+            self.order = np.argsort(cell, kind='stable').astype(np.int32)
+        else:
+            changed = cell != self.cell
+            self.moved = int(np.count_nonzero(changed))
+            if self.moved == 0:
+                self.count = n
+                return
+            keys = cell[self.order]
+            self.order = self.order[np.argsort(keys, kind='stable')]
+
+        self.cell = cell
+        self.count = n
+        # 每个格子的点数累加得到起始位置
+        counts = np.bincount(cell, minlength=self.cols * self.rows)
+        self.start[0] = 0
+        np.cumsum(counts, out=self.start[1:])
+
+    def _reach(self, radius):
+        return max(int(np.ceil(radius / self.cell_size)), 1)
+
+    def query(self, px, py, radius):
+        """返回与点 (px, py) 距离不超过 radius 的点下标数组"""
+        if self.count == 0:
+            return np.zeros(0, np.int32)
+        reach = self._reach(radius)
+        cx = min(max(int(px // self.cell_size), 0), self.cols - 1)
+        cy = min(max(int(py // self.cell_size), 0), self.rows - 1)
+        parts = []
+        for row in range(max(cy - reach, 0), min(cy + reach, self.rows - 1) + 1):
+            first = row * self.cols + max(cx - reach, 0)
+            last = row * self.cols + min(cx + reach, self.cols - 1)
+            # 同一行相邻格子在 order 中是连续的一段
+            parts.append(self.order[self.start[first]:self.start[last + 1]])
+        candidates = np.concatenate(parts)
+        dx = self.x[candidates] - px
+        dy = self.y[candidates] - py
+        return candidates[dx * dx + dy * dy <= radius * radius]
+
+    def pairs(self, radius):
+        """
+        返回所有距离不超过 radius 的点对 (i, j)，每对只出现一次
+        只检查“半邻域”（右侧与下方的格子及本格），整体向量化，不逐点循环
+        :return: (i, j) 两个下标数组
+        """
+        if self.count < 2:
+            empty = np.zeros(0, np.int32)
+            return empty, empty
+        reach = self._reach(radius)
+        r2 = radius * radius
+        order, start = self.order, self.start
+        sorted_cell = self.cell[order]
+        col, row = sorted_cell % self.cols, sorted_cell // self.cols
+        positions = np.arange(self.count, dtype=np.int32)
+        # 坐标也按格子顺序排列，候选点对在排序后的位置上计算距离，访问更连续
+        xs, ys = self.x[order], self.y[order]
+        out_i, out_j = [], []
+
+        for dy in range(0, reach + 1):
+            # 同一行只取本格和右侧，本格内只取排在自己后面的点
+            for dx in range(0 if dy == 0 else -reach, reach + 1):
+                valid = (col + dx >= 0) & (col + dx < self.cols) & (row + dy < self.rows)
+                src = positions[valid]
+                if src.size == 0:
+                    continue
+                neighbour = sorted_cell[valid] + (dy * self.cols + dx)
+                first, last = start[neighbour], start[neighbour + 1]
+                if dx == 0 and dy == 0:
+                    first = src + 1
+                lengths = np.maximum(last - first, 0)
+                total = int(lengths.sum())
+                if total == 0:
+                    continue
+                # 把每个点对应的 [first, last) 区间展开为扁平的候选列表
+                a = np.repeat(src, lengths)
+                b = np.arange(total, dtype=np.int32)
+                b += np.repeat(first - (np.cumsum(lengths) - lengths), lengths)
+                ddx = xs[a] - xs[b]
+                ddy = ys[a] - ys[b]
+                ddx *= ddx
+                ddy *= ddy
+                ddx += ddy
+                close = ddx <= r2
+                out_i.append(order[a[close]])
+                out_j.append(order[b[close]])
+
+        if not out_i:
+            empty = np.zeros(0, np.int32)
+            return empty, empty
+        return np.concatenate(out_i), np.concatenate(out_j)
+
+# ========== 基准测试 ==========
+def benchmark(counts=(1000, 5000, 10000, 20000, 50000), width=1920, height=1080, radius=None,
+              frames=30, seed=0, out=sys.stdout):
+    """
+    随机运动的点：每帧 rebuild + pairs 的平均耗时，点的密度随数量增加，radius 默认使每个点平均约 8 个邻居
+    """
+    rng = np.random.default_rng(seed)
+    out.write(f"{'点数':>8} {'半径':>6} {'rebuild ms':>11} {'pairs ms':>9} {'点对数':>9} {'换格比例':>8}\n")
+    for n in counts:
+        r = radius or float(np.sqrt(8 * width * height / (np.pi * n)))
+        grid = SpatialGrid(width, height, r)
+        x = rng.random(n, dtype=np.float32) * width
+        y = rng.random(n, dtype=np.float32) * height
+        vx = rng.standard_normal(n).astype(np.float32)
+        vy = rng.standard_normal(n).astype(np.float32)
+        grid.rebuild(x, y)
+        t_rebuild = t_pairs = 0.0
+        pair_count = moved = 0
+        for _ in range(frames):
+            x += vx
+            y += vy
+            np.mod(x, width, out=x)
+            np.mod(y, height, out=y)
+            t0 = time.perf_counter()
+            grid.rebuild(x, y)
+            t1 = time.perf_counter()
+            i, _ = grid.pairs(r)
+            t2 = time.perf_counter()
+            t_rebuild += t1 - t0
+            t_pairs += t2 - t1
+            pair_count += len(i)
+            moved += grid.moved
+        out.write(f"{n:>8} {r:>6.1f} {t_rebuild / frames * 1000:>11.2f} {t_pairs / frames * 1000:>9.2f} "
+                  f"{pair_count // frames:>9} {moved / frames / n:>8.1%}\n")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="均匀网格空间索引基准测试")
+    parser.add_argument("--counts", default="1000,5000,10000,20000,50000", help="点数，逗号分隔")
+    parser.add_argument("--radius", type=float, default=None, help="查询半径，默认按密度自动选择")
+    parser.add_argument("--frames", type=int, default=30, help="每组测量帧数")
+    args = parser.parse_args()
+    benchmark([int(v) for v in args.counts.split(",")], radius=args.radius, frames=args.frames)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import threading
+
+class TripleBuffer:
+    """
+    update 线程与绘制线程之间的三缓冲状态交换
+    写端持有 back 槽、读端持有 front 槽，中间槽用于交换：
+    写端随时发布、读端随时取最新，双方都不会等待对方的 update 或绘制完成，也不会读到写了一半的状态。
+    交换只是两个下标互换，用一把只保护下标的锁完成（持有时间为几条字节码）
+    """
+    def __init__(self, initial=None):
+        """
+        :param initial: 三个槽的初始状态（读端在第一次发布前拿到的值）
+        """
+        self._slots = [initial, initial, initial]
+        self._back = 0
+        self._middle = 1
+        self._front = 2
+        self._fresh = False
+        self._swap_lock = threading.Lock()
+        self.published = 0   # 发布次数
+        self.consumed = 0    # 读端取到新状态的次数
+
+    def back(self):
+        """写端当前持有的槽（可在其中原地构造下一份状态以复用对象）"""
+        return self._slots[self._back]
+
+    def publish(self, state):
+        """写端：发布一份完整的状态，之后不应再修改它"""
+        self._slots[self._back] = state
+        with self._swap_lock:
+            self._back, self._middle = self._middle, self._back
+            self._fresh = True
+        self.published += 1
+
+    def consume(self):
+        """读端：取最新发布的状态；没有新状态时返回上一次的状态"""
+        if self._fresh:
+            with self._swap_lock:
+                self._front, self._middle = self._middle, self._front
+                self._fresh = False
+            self.consumed += 1
+        return self._slots[self._front]
+
+    @property
+    def has_state(self):
+        return self.published > 0
@@ -1,38 +1,127 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import wx
+import math
+import time
 import threading
 
 from WorkerW import get_screen_size
+from ScriptHost import ScriptHost
+from RenderSurface import BatchContext, ScaleController
 
-class WallpaperFrame(wx.Frame):
-    def __init__(self, update_func, init_func=None, draw_func=None):
+class BackBuffer:
+    """
+    持久后台缓冲：跨帧复用同一张位图及其 MemoryDC / GraphicsContext，
+    仅在尺寸变化时重新分配；内容在帧之间保留，可用于拖尾等累积效果
+    """
+    def __init__(self, background=wx.BLACK):
+        self.background = background
+        self._background_brush = wx.Brush(background)
+        self.bitmap = None
+        self.dc = None
+        self.gc = None
+        self.size = (0, 0)
+        self.allocations = 0   # 重新分配次数，便于排查
+
+    def ensure(self, width, height):
+        """
+        确保缓冲区与给定尺寸一致
+        :return: 是否重新分配（新缓冲区已用背景色填充）
+        """
+        if self.bitmap is not None and self.size == (width, height):
+            return False
+        self.release()
+        self.bitmap = wx.Bitmap(width, height, 32)
+        self.dc = wx.MemoryDC(self.bitmap)
+        self.dc.SetBackground(self._background_brush)
+        self.dc.Clear()
+        self.gc = wx.GraphicsContext.Create(self.dc)
+        self.size = (width, height)
+        self.allocations += 1
+        return True
+
+    def clear(self, x, y, w, h):
+        """用背景色填充指定区域"""
+        self.gc.SetPen(wx.TRANSPARENT_PEN)
+        self.gc.SetBrush(self._background_brush)
+        self.gc.DrawRectangle(x, y, w, h)
+
+    def blit(self, dc, x, y, w, h, scale=1.0):
+        """
+        将缓冲区的指定区域复制到目标 DC
+        :param scale: 缓冲区相对屏幕的缩放比例，不为 1 时拉伸到屏幕尺寸
         """
-        :param update_func: 更新函数，将在后台线程中循环调用，接收 self，仅修改数据
+        self.gc.Flush()
+        if scale == 1.0:
+            dc.Blit(x, y, w, h, self.dc, x, y)
+            return
+        sx, sy = int(x * scale), int(y * scale)
+        sw = min(int(math.ceil((x + w) * scale)), self.size[0]) - sx
+        sh = min(int(math.ceil((y + h) * scale)), self.size[1]) - sy
+        dc.StretchBlit(x, y, w, h, self.dc, sx, sy, sw, sh)
+
+    def release(self):
+        if self.dc is not None:
+            self.gc = None
+            self.dc.SelectObject(wx.NullBitmap)
+            self.dc = None
+        self.bitmap = None
+
+class WallpaperFrame(wx.Frame, ScriptHost):
+    def __init__(self, update_func, init_func=None, draw_func=None, fps=60,
+                 script_version=1, sim_hz=60, accumulate=False, stats=False, stats_overlay=False,
+                 dynamic_scale=True, show=True):
+        """
+        :param update_func: 更新函数，将在后台线程中循环调用，接收 self，仅修改数据；
+                            可返回脏矩形列表 [(x, y, w, h), ...]，只重绘这些区域；
+                            返回 False（或空列表）表示画面没有变化，本帧不绘制；
+                            可调用 self.publish(state) 发布快照，draw 中读取 self.snapshot
         :param init_func:   初始化函数，接收 self，在主线程中调用
         :param draw_func:   绘制函数，接收 (gc, width, height, self)，在主线程中调用
+        :param fps:         目标帧率，由 FrameScheduler 按绝对截止时间调度
+        :param script_version: 脚本协议版本，2 表示固定步长：
+                               update 接收 (self, dt)，draw 额外接收插值系数 alpha
+        :param sim_hz:      v2 协议下的模拟频率
+        :param accumulate:  累积模式：后台缓冲在帧之间不清空，半透明覆盖即可形成拖尾，
+                            运行中也可通过 self.accumulate 切换
+        :param stats:       是否启用逐帧计时统计（update / paint 耗时、帧间隔、丢帧），定期写入日志
+        :param stats_overlay: 是否在画面左下角显示统计叠加层（会同时启用统计）
+        :param dynamic_scale: 绘制超出帧预算时降低内部渲染分辨率（1 / 0.75 / 0.5），
+                              有余量时再恢复；draw 收到的坐标和尺寸始终是屏幕尺寸
+        :param show:        是否立即显示窗口；False 时先在后台初始化（切换壁纸时嵌入桌面后再显示）
         """
         screen_width, screen_height = get_screen_size()
         super().__init__(None, style=wx.NO_BORDER)
         self.SetSize(screen_width, screen_height)
         self.SetBackgroundColour(wx.BLACK)
 
-        self.update_func = update_func
-        self.draw_func = draw_func
+        # 帧调度、v1/v2 协议与脏矩形
+        self._setup_host(update_func, draw_func, screen_width, screen_height,
+                         fps=fps, script_version=script_version, sim_hz=sim_hz,
+                         stats=stats or stats_overlay, wx_module=wx)
+        self.stats_overlay = stats_overlay
+        self._overlay_rect = None
+        self._overlay_refreshed = 0.0
 
-        # 线程同步标志
+        # 线程同步标志（update 与绘制之间的数据交换见 self.publish / self.snapshot）
         self._alive = True
-        self._data_lock = threading.Lock()
+        self._redraw_pending = False   # 合并重绘请求，保证最多只有一个待处理
+        self._running = threading.Event()   # 清除时暂停：更新线程阻塞等待，不再 update 和重绘
+        self._running.set()
+
+        # 持久后台缓冲，取代每帧新建的 BufferedPaintDC
+        self._back_buffer = BackBuffer(wx.BLACK)
+        self.accumulate = accumulate
+        self._surface_size = (0, 0)   # 上次绘制时的窗口尺寸（不受渲染缩放影响）
+
+        # 动态分辨率：后台缓冲按 render_scale 缩小，复制到屏幕时拉伸
+        self.scaler = ScaleController(self.scheduler.interval) if dynamic_scale else None
+        self.render_scale = 1.0
 
         # 绑定事件
         self.Bind(wx.EVT_PAINT, self.on_paint)
-        self.Bind(wx.EVT_TIMER, self.on_timer)
         self.Bind(wx.EVT_CLOSE, self.on_close)
 
-        # 创建定时器，仅用于触发重绘（可选）
-        self.timer = wx.Timer(self)
-        self.timer.Start(16)
-
         # 调用初始化函数（在主线程中执行）
         if callable(init_func):
             init_func(self)
@@ -41,50 +130,187 @@ class WallpaperFrame(wx.Frame):
         self._update_thread = threading.Thread(target=self._update_loop, daemon=True)
         self._update_thread.start()
 
-        self.SetDoubleBuffered(True)
-        self.Show()
+        # 所有像素都来自后台缓冲，不需要擦除背景和系统双缓冲
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        if show:
+            self.Show()
 
     def _update_loop(self):
         """后台线程：循环调用 update_func，并通过 wx.CallAfter 通知主线程重绘"""
+        self.scheduler.start()
+        dropped = 0
         while self._alive:
+            if not self._running.is_set():
+                # 暂停：阻塞到 resume() 或关闭，期间不占用 CPU，屏幕保留最后一帧
+                self._running.wait()
+                if not self._alive:
+                    break
+                self._resume_timing()
+                dropped = 0
+            stats = self.stats.enabled
+            if stats:
+                self.stats.record_frame(dropped)
+                t0 = time.perf_counter()
+            need_redraw = True
             if callable(self.update_func):
-                self.update_func(self)   # 注意：update_func 应只修改数据，不操作 GUI
-            # 请求主线程重绘
-            wx.CallAfter(self._request_redraw)
-            # 控制更新频率（例如与定时器同步）
-            wx.MilliSleep(16)   # 约 60 FPS，可调整
+                need_redraw = self._run_update()   # 注意：update_func 应只修改数据，不操作 GUI
+            if stats:
+                self.stats.record_update(time.perf_counter() - t0)
+                # 画面静止时统计叠加层每秒刷新一次，其余帧不绘制
+                if not need_redraw and self.stats_overlay and self._overlay_rect:
+                    now = time.perf_counter()
+                    if now - self._overlay_refreshed >= 1.0:
+                        self._overlay_refreshed = now
+                        self.dirty.add(*self._overlay_rect)
+                        need_redraw = True
+            # 请求主线程重绘（update 报告没有变化的帧只有 update 本身的开销）
+            if need_redraw:
+                self._post_redraw()
+            # 按绝对截止时间休眠，落后时跳帧
+            dropped = self.scheduler.wait()
+
+    def _post_redraw(self):
+        """在后台线程中调用：已有待处理的重绘时不再重复投递"""
+        if self._redraw_pending:
+            return
+        self._redraw_pending = True
+        wx.CallAfter(self._request_redraw)
 
     def _request_redraw(self):
         """在主线程中调用，请求重绘（检查窗口是否存活）"""
         if not self._alive:
             return
-        self.Refresh(False)
-
-    def on_timer(self, event):
-        """定时器事件：可留空，重绘由 _request_redraw 触发"""
-        pass
+        rects = self.dirty.take()
+        if rects is None:
+            self.Refresh(False)
+        else:
+            for rect in rects:
+                self.RefreshRect(wx.Rect(*rect), False)
+            if self.stats_overlay and self._overlay_rect:
+                self.RefreshRect(wx.Rect(*self._overlay_rect), False)
 
     def on_paint(self, event):
-        """绘图事件：使用双缓冲和 GraphicsContext 绘制"""
-        dc = wx.BufferedPaintDC(self)
-        gc = wx.GraphicsContext.Create(dc)
+        """绘图事件：在持久后台缓冲上用 GraphicsContext 绘制，再复制更新区域到屏幕"""
+        self._redraw_pending = False
+        t0 = time.perf_counter()
+        dc = wx.PaintDC(self)
+        w, h = self.GetClientSize()
+        if w <= 0 or h <= 0:
+            return
+        scale = self.render_scale
+        if self._back_buffer.ensure(max(int(w * scale + 0.5), 1), max(int(h * scale + 0.5), 1)):
+            self.dirty.resize(w, h)
+            if (w, h) != self._surface_size:
+                self._surface_size = (w, h)
+                self.layers.invalidate()
+        gc = self._back_buffer.gc
+
+        # 只在更新区域内绘制，区域外的像素不会被刷新到屏幕上
+        region = self.GetUpdateRegion()
+        box = region.GetBox()
+        self.update_rect = (box.x, box.y, box.width, box.height)
+
         if gc and callable(self.draw_func):
-            w, h = self.GetSize()
-            self.draw_func(gc, w, h, self)
+            gc.PushState()
+            if scale != 1.0:
+                gc.Scale(scale, scale)   # 脚本仍按屏幕坐标绘制
+            if box.width < w or box.height < h:
+                gc.Clip(region)
+            # 最底层是 static 图层时，其不透明缓存会覆盖整个区域，无需先清空
+            if not self.accumulate and self.layers.base is None:
+                self._back_buffer.clear(*self.update_rect)
+            self._run_draw(gc, w, h)
+            gc.PopState()
+            gc.ResetClip()
+
+        if self.stats_overlay:
+            gc.PushState()
+            gc.Scale(scale, scale)
+            self._draw_stats_overlay(gc, h)
+            gc.PopState()
+        self._back_buffer.blit(dc, *self.update_rect, scale=scale)
+
+        elapsed = time.perf_counter() - t0
+        if self.stats.enabled:
+            self.stats.record_paint(elapsed)
+        if self.scaler is not None:
+            self.scaler.budget = self.scheduler.interval
+            if self.scaler.record(elapsed):
+                # 下一帧按新尺寸重新分配缓冲并整屏重绘
+                self.render_scale = self.scaler.scale
+                self.dirty.add_full()
+
+    def _render_layer(self, layer, width, height, opaque):
+        """把 static 图层绘制到缓存位图（尺寸不变时复用旧位图）"""
+        bitmap = layer.cache
+        if bitmap is None or tuple(bitmap.GetSize()) != (width, height):
+            bitmap = wx.Bitmap(width, height, 32)
+            if not opaque:
+                bitmap.UseAlpha()
+        dc = wx.MemoryDC(bitmap)
+        gc = wx.GraphicsContext.Create(dc)
+        gc.SetPen(wx.TRANSPARENT_PEN)
+        if opaque:
+            gc.SetBrush(self.resources.brush(self._back_buffer.background))
+            gc.DrawRectangle(0, 0, width, height)
+        else:
+            # 清为全透明，叠加时保留下层内容
+            gc.SetCompositionMode(wx.COMPOSITION_CLEAR)
+            gc.DrawRectangle(0, 0, width, height)
+            gc.SetCompositionMode(wx.COMPOSITION_OVER)
+        layer.draw_func(BatchContext(gc, self.resources), width, height, self)
+        gc.Flush()
+        del gc
+        dc.SelectObject(wx.NullBitmap)
+        return bitmap
+
+    def _layer_drawable(self, gc, bitmap):
+        """转换为 GraphicsBitmap，之后每帧贴图不再转换"""
+        return gc.CreateBitmap(bitmap)
+
+    def _draw_stats_overlay(self, gc, height):
+        """在左下角绘制统计信息（绘制到缓冲上，并把该区域加入本次刷新）"""
+        text = self.stats.format_summary() + "\n" + self.resources.format_summary()
+        if self.scaler is not None:
+            text += f"\n渲染缩放 {self.render_scale:.2f}（已调整 {self.scaler.changes} 次）"
+        gc.SetFont(self.resources.font(10, wx.FONTFAMILY_MODERN), wx.WHITE)
+        tw, th = gc.GetTextExtent(text)
+        x, y = 10, height - th - 10
+        gc.SetPen(wx.TRANSPARENT_PEN)
+        gc.SetBrush(self.resources.brush((0, 0, 0, 160)))
+        gc.DrawRectangle(x - 4, y - 2, tw + 8, th + 4)
+        gc.DrawText(text, x, y)
+        # 记录叠加层区域，只刷新脏矩形时也一并刷新这里
+        self._overlay_rect = (int(x - 4), int(y - 2), int(tw + 8) + 1, int(th + 4) + 1)
+
+    def pause(self):
+        """暂停 update 与重绘（可在任意线程调用），画面停留在最后一帧"""
+        self._running.clear()
+
+    def resume(self):
+        """从暂停处继续；v2 脚本不会补跑暂停期间的模拟步"""
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
 
     def on_close(self, event):
         """窗口关闭时安全停止后台线程"""
         self._alive = False
-        self.timer.Stop()
+        self._running.set()
         if self._update_thread.is_alive():
             self._update_thread.join(timeout=1.0)
+        self._back_buffer.release()
+        for layer in self.layers:
+            self._release_layer(layer)
         self.Destroy()
 
     def stop(self):
         """供外部调用的停止方法（例如在切换壁纸时）"""
         if self._alive:
             self._alive = False
-            self.timer.Stop()
+            self._running.set()
             if self._update_thread.is_alive():
                 self._update_thread.join(timeout=1.0)
             self.Close()
@@ -101,42 +327,39 @@ rect = {
     'color': wx.Colour(0, 150, 255)  # 亮蓝色
 }
 
-# 帧率统计
-frame_count = 0
-last_time = None
-fps = 0
 
 def init(target):
-    pass
+    # 网格不会变化：作为 static 图层只绘制一次，之后每帧直接贴图
+    target.add_layer('grid', draw_grid)
 
 def update(target):
-    pass
+    # 场景静止：返回 False 表示画面没有变化，跳过绘制
+    return False
 
 def draw(gc, width, height, target):
     """绘制函数：使用 GraphicsContext 绘制矩形和调试信息"""
+    res = target.resources   # 画笔、画刷、字体只在第一次使用时创建
     # 绘制矩形
-    gc.SetPen(wx.Pen(wx.WHITE, 2))          # 白色边框
-    gc.SetBrush(wx.Brush(rect['color']))    # 蓝色填充
+    gc.SetPen(res.pen(wx.WHITE, 2))          # 白色边框
+    gc.SetBrush(res.brush(rect['color']))    # 蓝色填充
     x = rect['x'] - rect['size'] / 2
     y = rect['y'] - rect['size'] / 2
     gc.DrawRectangle(x, y, rect['size'], rect['size'])
 
     # 绘制文字信息
-    gc.SetFont(wx.Font(14, wx.FONTFAMILY_DEFAULT,
-                       wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL), wx.WHITE)
-    info = f"FPS: {fps}\nPos: ({rect['x']:.1f}, {rect['y']:.1f})"
+    gc.SetFont(res.font(14), wx.WHITE)
+    info = f"FPS: {target.stats.fps:.1f}\nPos: ({rect['x']:.1f}, {rect['y']:.1f})"
     gc.DrawText(info, 20, 20)
 
-    # 绘制辅助网格（可选）
-    gc.SetPen(wx.Pen(wx.Colour(80, 80, 80), 1))
-    for y in range(0, height, 50):
-        gc.StrokeLine(0, y, width, y)
-    for x in range(0, width, 50):
-        gc.StrokeLine(x, 0, x, height)
+def draw_grid(gc, width, height, target):
+    """辅助网格图层：所有线段合并为一条路径"""
+    grid = [(0, y, width, y) for y in range(0, height, 50)]
+    grid += [(x, 0, x, height) for x in range(0, width, 50)]
+    gc.draw_lines(grid, (80, 80, 80), 1)
 
 
 # ========== 独立运行测试 ==========
 if __name__ == "__main__":
     app = wx.App(False)
-    frame = WallpaperFrame(update, init, draw)
+    frame = WallpaperFrame(update, init, draw, stats_overlay=True)
     app.MainLoop()
\ No newline at end of file
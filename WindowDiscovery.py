@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import sys
+import time
+import ctypes
+import logging
+import threading
+
+if sys.platform.startswith("win"):
+    import win32api
+    import win32con
+    import win32gui
+
+logger = logging.getLogger(__name__)
+
+# ========== 窗口出现通知源 ==========
+class WindowEventSource:
+    """
+    窗口出现通知源接口：start(on_window) 之后，有窗口创建、显示或改名时调用 on_window(hwnd)（任意线程）；
+    stop() 停止通知
+    """
+    def start(self, on_window):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+class FakeWindowEventSource(WindowEventSource):
+    """测试用：由 emit(hwnd) 手动触发通知，并记录启动 / 停止次数"""
+    def __init__(self):
+        self.on_window = None
+        self.starts = 0
+        self.stops = 0
+
+    def start(self, on_window):
+        self.on_window = on_window
+        self.starts += 1
+
+    def stop(self):
+        self.on_window = None
+        self.stops += 1
+
+    def emit(self, hwnd=0):
+        if self.on_window is not None:
+            self.on_window(hwnd)
+
+class Win32WindowEventSource(WindowEventSource):
+    """
+    SetWinEventHook 监听窗口创建（EVENT_OBJECT_CREATE，以隐藏方式启动的窗口不会触发显示事件）、
+    显示（EVENT_OBJECT_SHOW）与标题变化（EVENT_OBJECT_NAMECHANGE），钩子以 WINEVENT_OUTOFCONTEXT 方式安装在单独的线程上，该线程运行消息循环接收回调
+    """
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_SHOW = 0x8002
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._thread = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+
+    def start(self, on_window):
+        if not sys.platform.startswith("win") or self._thread is not None:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(on_window,), daemon=True)
+        self._thread.start()
+        # 钩子装好后才返回，之后出现的窗口不会漏掉
+        self._ready.wait(1.0)
+
+    def _run(self, on_window):
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            # 只关心窗口本身，忽略窗口内的控件、光标等对象
+            if hwnd and id_object == self.OBJID_WINDOW and id_child == 0:
+                try:
+                    on_window(hwnd)
+                except Exception:
+                    logger.exception("处理窗口通知时出错")
+
+        proc = WinEventProc(callback)   # 保持引用，防止回调被回收
+        hooks = [user32.SetWinEventHook(event, event, 0, proc, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+                 for event in (self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_SHOW,
+                               self.EVENT_OBJECT_NAMECHANGE)]
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._ready.set()
+        if not all(hooks):
+            logger.warning("安装窗口事件钩子失败，改为定时查找窗口")
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self._thread_id = 0
+
+# ========== 桌面拓扑变化通知源 ==========
+# 事件类型
+EVENT_EXPLORER = 'explorer'   # 资源管理器重启，WorkerW 重新创建
+EVENT_DISPLAY = 'display'     # 分辨率、DPI 或显示器变化
+
+class TopologyEventSource:
+    """拓扑事件源接口：start(on_event) 之后，发生变化时调用 on_event(EVENT_EXPLORER / EVENT_DISPLAY)；stop() 停止"""
+    def start(self, on_event):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+class FakeTopologyEventSource(TopologyEventSource):
+    """测试用：由 emit(event) 手动触发"""
+    def __init__(self):
+        self.on_event = None
+
+    def start(self, on_event):
+        self.on_event = on_event
+
+    def stop(self):
+        self.on_event = None
+
+    def emit(self, event):
+        if self.on_event is not None:
+            self.on_event(event)
+
+class Win32TopologyEventSource(TopologyEventSource):
+    """
+    在单独的线程上创建一个不可见的顶层窗口接收广播消息
+    （TaskbarCreated 与 WM_DISPLAYCHANGE 只发给顶层窗口，仅接收消息的窗口收不到）
+    """
+    CLASS_NAME = "PythonWallpaperTopology"
+    WM_DPICHANGED = 0x02E0
+
+    def __init__(self):
+        self._thread = None
+        self._hwnd = 0
+        self._ready = threading.Event()
+
+    def start(self, on_event):
+        if not sys.platform.startswith("win") or self._thread is not None:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(on_event,), daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def _run(self, on_event):
+        taskbar_created = win32gui.RegisterWindowMessage("TaskbarCreated")
+
+        def wndproc(hwnd, msg, wparam, lparam):
+            event = None
+            if msg == taskbar_created:
+                event = EVENT_EXPLORER
+            elif msg in (win32con.WM_DISPLAYCHANGE, self.WM_DPICHANGED):
+                event = EVENT_DISPLAY
+            elif msg == win32con.WM_DESTROY:
+                win32gui.PostQuitMessage(0)
+                return 0
+            if event is not None:
+                try:
+                    on_event(event)
+                except Exception:
+                    logger.exception("处理桌面拓扑变化时出错")
+            return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+        try:
+            wc = win32gui.WNDCLASS()
+            wc.lpfnWndProc = wndproc
+            wc.lpszClassName = self.CLASS_NAME
+            wc.hInstance = win32api.GetModuleHandle(None)
+            try:
+                atom = win32gui.RegisterClass(wc)
+            except win32gui.error:
+                atom = self.CLASS_NAME   # 已注册（停止后再次启动）
+            # 不带 WS_VISIBLE 的顶层窗口，永远不显示
+            self._hwnd = win32gui.CreateWindow(atom, "", 0, 0, 0, 0, 0, 0, 0, wc.hInstance, None)
+        except Exception:
+            logger.exception("创建桌面拓扑监听窗口失败，拓扑缓存只在 WorkerW 失效时刷新")
+            return
+        finally:
+            self._ready.set()
+        win32gui.PumpMessages()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._hwnd:
+            win32gui.PostMessage(self._hwnd, win32con.WM_CLOSE, 0, 0)
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        self._hwnd = 0
+
+# ========== 等待窗口 ==========
+def wait_for_window(attempt, source: WindowEventSource, deadline=15.0, backoff=(0.05, 1.0),
+                    clock=time.monotonic, wait=None):
+    """
+    等待窗口出现并完成操作：先立即尝试一次，之后每当 source 通知有窗口出现就再尝试；
+    通知可能漏掉（如标题在显示之前设置），因此没有通知时也按退避间隔重试，间隔从 backoff[0] 每次翻倍到 backoff[1]
+    :param attempt:  attempt() 尝试一次（如查找并嵌入窗口），成功返回真值
+    :param deadline: 总时限（秒）
+    :param clock:    时钟函数，测试时可传入虚拟时钟
+    :param wait:     wait(event, timeout) 等待通知，默认 event.wait；与 clock 一起替换即可在虚拟时间中运行
+    :return: (attempt 的返回值，失败为 None, 尝试次数)
+    """
+    wake = threading.Event()
+    if wait is None:
+        wait = lambda event, timeout: event.wait(timeout)
+    source.start(lambda hwnd: wake.set())
+    try:
+        end = clock() + deadline
+        interval = backoff[0]
+        tries = 0
+        while True:
+            wake.clear()
+            tries += 1
+            result = attempt()
+            if result:
+                return result, tries
+            remaining = end - clock()
+            if remaining <= 0:
+                return None, tries
+            if wait(wake, min(interval, remaining)):
+                # 有新窗口出现：立即重试，退避间隔重新开始
+                interval = backoff[0]
+            else:
+                interval = min(interval * 2, backoff[1])
+    finally:
+        source.stop()
@@ -32,6 +32,8 @@ class Particle:
 
 def init(target):
     """初始化粒子数据"""
+    # 累积模式：后台缓冲不清空，draw 中的半透明背景形成拖尾
+    target.accumulate = True
     target.particles = []
     w, h = target.GetSize()
     for _ in range(10):
@@ -64,22 +66,26 @@ def update(target):
         if (p.age >= 1000 and p.flag > 0) or (p.age <= 0 and p.flag < 0):
             p.flag = -p.flag
 
+    # 发布本帧的不可变快照，draw 只读取快照，不会与 update 线程争用粒子对象
+    target.publish(tuple((p.x, p.y, p.size + p.age * 0.05, p.color) for p in target.particles))
+
 def draw(gc, width, height, target):
     """使用 GraphicsContext 绘制所有粒子"""
-    # 清除背景
-    bgColor = wx.Colour(0, 0, 0, 20)
-    gc.SetPen(wx.Pen(bgColor, 1))
-    gc.SetBrush(wx.Brush(bgColor))
+    # 半透明背景：淡化上一帧，形成拖尾
+    # target.resources 缓存画笔和画刷，相同颜色只创建一次
+    res = target.resources
+    bgColor = (0, 0, 0, 20)
+    gc.SetPen(res.pen(bgColor, 1))
+    gc.SetBrush(res.brush(bgColor))
     gc.DrawRectangle(0, 0, width, height)
 
-    for p in target.particles:
+    # 第一次 update 之前还没有快照
+    for x, y, r, color in target.snapshot or ():
         # 设置画笔和画刷
-        gc.SetPen(wx.Pen(p.color, 1))   # 边框用同色细线
-        gc.SetBrush(wx.Brush(p.color))
-        
-        # 计算当前大小（带 age 微调）
-        r = p.size + p.age * 0.05
+        gc.SetPen(res.pen(color, 1))   # 边框用同色细线
+        gc.SetBrush(res.brush(color))
         
+        # r 为当前大小（已带 age 微调）
         # 绘制圆形（左上角坐标模式，gc 的 DrawEllipse 需要左上角和宽高）
         # 注意：GraphicsContext 默认坐标原点在窗口左上角
-        gc.DrawEllipse(p.x - r/2, p.y - r/2, r, r)
\ No newline at end of file
+        gc.DrawEllipse(x - r/2, y - r/2, r, r)
\ No newline at end of file
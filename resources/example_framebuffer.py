@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# 独立进程渲染：render 把整帧 RGBA 写入共享内存，主程序的窗口直接贴图
+# 不创建窗口，可以使用任意能输出像素的库
+NOT_USE_WX = True
+FPS = 30
+
+# 以 1/4 分辨率计算等离子图案，再放大写入帧缓冲
+STEP = 4
+
+def init(target):
+    """预先计算坐标网格"""
+    w, h = target.GetSize()
+    ys, xs = np.mgrid[0:h:STEP, 0:w:STEP].astype(np.float32)
+    target.xs = xs / 160.0
+    target.ys = ys / 120.0
+    target.t = 0.0
+
+def render(target, pixels):
+    """pixels：width * height * 4 字节的共享内存（RGBA），每次都写入整帧"""
+    w, h = target.GetSize()
+    target.t += 1.0 / FPS
+    t, xs, ys = target.t, target.xs, target.ys
+    v = np.sin(xs + t) + np.sin(ys * 1.3 - t * 0.7) + np.sin((xs + ys) * 0.8 + t * 1.1)
+    small = np.empty(v.shape + (3,), np.uint8)
+    small[..., 0] = (np.sin(v * 1.2) * 60 + 70).astype(np.uint8)
+    small[..., 1] = (np.sin(v * 1.2 + 2.0) * 40 + 50).astype(np.uint8)
+    small[..., 2] = (np.sin(v * 1.2 + 4.0) * 80 + 120).astype(np.uint8)
+    frame = np.frombuffer(pixels, np.uint8).reshape(h, w, 4)
+    big = small.repeat(STEP, axis=0).repeat(STEP, axis=1)
+    # alpha 通道已预先填为不透明，只写 RGB
+    frame[..., :3] = big[:h, :w]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from ParticleEngine import ParticleSystem
+from SpatialGrid import SpatialGrid
+
+# 距离小于 LINK_RADIUS 的点之间连线：两两比较是 O(n²)，
+# 用 SpatialGrid 按格子查找邻居，每帧只检查附近的点
+COUNT = 1500
+LINK_RADIUS = 70
+
+palette = [
+    (120, 180, 255),   # 浅蓝
+    (180, 140, 255),   # 淡紫
+]
+
+def init(target):
+    """初始化点和空间索引"""
+    w, h = target.GetSize()
+    target.system = ParticleSystem(COUNT, palette, age_max=1.0, pulse=0.0)
+    target.system.emit(COUNT, (0, w), (0, h), speed=(0.3, 1.0), size=(3.0, 5.0))
+    target.grid = SpatialGrid(w, h, LINK_RADIUS)
+
+# 警告：update()采用多线程调用，请勿写死循环，sleep，不应操作GUI
+def update(target):
+    """移动点，找出相邻点对并发布线段"""
+    w, h = target.GetSize()
+    system, grid = target.system, target.grid
+    system.step(1, w, h, age_rate=0.0)
+    if (grid.width, grid.height) != (w, h):
+        grid.resize(w, h)
+    grid.rebuild(system.x, system.y, system.count)
+    i, j = grid.pairs(LINK_RADIUS)
+
+    n = system.count
+    x, y = system.x[:n].copy(), system.y[:n].copy()
+    segments = np.stack([x[i], y[i], x[j], y[j]], axis=1)
+    target.publish((x, y, system.color[:n].copy(), segments))
+
+def draw(gc, width, height, target):
+    """先画连线，再画点"""
+    snapshot = target.snapshot
+    if snapshot is None:
+        return
+    x, y, color, segments = snapshot
+    res = target.resources
+    gc.SetBrush(res.brush((10, 12, 24)))
+    gc.SetPen(res.pen((10, 12, 24)))
+    gc.DrawRectangle(0, 0, width, height)
+    gc.draw_lines(segments, (90, 110, 170, 160))
+    for index, rgb in enumerate(palette):
+        sel = color == index
+        gc.draw_circles(x[sel], y[sel], 2.5, rgb)
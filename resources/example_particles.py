@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import wx
+import numpy as np
+
+from ParticleEngine import ParticleSystem
+
+# 五万个小粒子：状态保存在 NumPy 数组中整体更新，
+# 绘制时直接光栅化到一张 RGBA 图像，再一次性贴到屏幕
+COUNT = 50000
+
+palette = [
+    (255, 0, 0),      # 红
+    (0, 255, 0),      # 绿
+    (0, 0, 255),      # 蓝
+    (255, 255, 0),    # 黄
+    (0, 255, 255),    # 青
+    (255, 215, 0),    # 金
+]
+
+def init(target):
+    """初始化粒子系统和绘制用的图像"""
+    w, h = target.GetSize()
+    target.system = ParticleSystem(COUNT, palette)
+    target.system.emit(COUNT, (0, w), (0, h), speed=(1.0, 3.0), size=(1.0, 2.5))
+    # 绘制线程持有的图像与位图，每帧复用
+    target.image = None
+    target.bitmap = None
+
+# 警告：update()采用多线程调用，请勿写死循环，sleep，不应操作GUI
+def update(target):
+    """整体推进所有粒子并发布快照"""
+    w, h = target.GetSize()
+    target.system.step(1, w, h)
+    target.system.publish(target)
+
+def draw(gc, width, height, target):
+    """光栅化粒子（带拖尾）后一次贴图"""
+    snapshot = target.snapshot
+    if snapshot is None:
+        return
+    if target.image is None or target.image.shape[:2] != (height, width):
+        target.image = np.zeros((height, width, 4), np.uint8)
+        target.image[..., 3] = 255
+        target.bitmap = wx.Bitmap.FromBufferRGBA(width, height, target.image)
+    target.system.render(target.image, snapshot, fade_shift=3)
+    target.bitmap.CopyFromBuffer(target.image, wx.BitmapBufferFormat_RGBA)
+    gc.DrawBitmap(target.bitmap, 0, 0, width, height)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import wx
+import math
+import random
+
+# 进程模式：init/update 在独立进程中运行，不与界面线程争用 GIL
+# 状态按 STATE_LAYOUT 放在共享内存中，draw 通过 target.snapshot 直接读取
+USE_PROCESS = True
+
+COUNT = 2000
+STATE_LAYOUT = {
+    'x':  ('d', COUNT),
+    'y':  ('d', COUNT),
+    'vx': ('d', COUNT),
+    'vy': ('d', COUNT),
+}
+
+def init(target):
+    """在模拟进程中调用：target.state 为按 STATE_LAYOUT 分配的数组"""
+    w, h = target.GetSize()
+    s = target.state
+    for i in range(COUNT):
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(1, 3)
+        s['x'][i] = random.uniform(0, w)
+        s['y'][i] = random.uniform(0, h)
+        s['vx'][i] = speed * math.cos(angle)
+        s['vy'][i] = speed * math.sin(angle)
+
+# 在模拟进程中调用，可以放心做耗时计算
+def update(target):
+    w, h = target.GetSize()
+    s = target.state
+    xs, ys, vxs, vys = s['x'], s['y'], s['vx'], s['vy']
+    for i in range(COUNT):
+        xs[i] += vxs[i]
+        ys[i] += vys[i]
+        if xs[i] < 0 or xs[i] > w:
+            vxs[i] = -vxs[i]
+        if ys[i] < 0 or ys[i] > h:
+            vys[i] = -vys[i]
+
+# 在界面进程中调用：target.snapshot 为 {字段名: memoryview}，不会被模拟进程同时改写
+def draw(gc, width, height, target):
+    gc.SetBrush(target.resources.brush(wx.BLACK))
+    gc.DrawRectangle(0, 0, width, height)
+
+    s = target.snapshot
+    path = gc.CreatePath()
+    for x, y in zip(s['x'], s['y']):
+        path.AddCircle(x, y, 2)
+    gc.SetPen(wx.TRANSPARENT_PEN)
+    gc.SetBrush(target.resources.brush((0, 200, 255)))
+    gc.FillPath(path)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import wx
+import math
+import random
+
+# 使用 v2 固定步长协议：
+# update(target, dt) 以固定频率调用，dt 单位为秒
+# draw(gc, width, height, target, alpha) 中 alpha 为插值系数
+SCRIPT_VERSION = 2
+SIM_HZ = 60
+
+colors = [
+    wx.Colour(255, 0, 0),
+    wx.Colour(0, 255, 0),
+    wx.Colour(0, 0, 255),
+    wx.Colour(255, 255, 0),
+    wx.Colour(0, 255, 255),
+    wx.Colour(255, 215, 0),
+]
+
+class Particle:
+    def __init__(self, x, y, vx, vy, size, color):
+        self.x = x
+        self.y = y
+        self.px = x      # 上一步的位置，用于插值
+        self.py = y
+        self.vx = vx     # 速度，单位：像素/秒
+        self.vy = vy
+        self.size = size
+        self.color = color
+
+def init(target):
+    """初始化粒子数据"""
+    target.particles = []
+    w, h = target.GetSize()
+    for _ in range(10):
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(180, 300)
+        target.particles.append(Particle(
+            random.uniform(0, w), random.uniform(0, h),
+            speed * math.cos(angle), speed * math.sin(angle),
+            random.uniform(30, 40), random.choice(colors)))
+
+def update(target, dt):
+    """按 dt 推进粒子，速度与帧率无关"""
+    w, h = target.GetSize()
+    for p in target.particles:
+        p.px, p.py = p.x, p.y
+        p.x += p.vx * dt
+        p.y += p.vy * dt
+        if p.x < 0 or p.x > w:
+            p.vx = -p.vx
+        if p.y < 0 or p.y > h:
+            p.vy = -p.vy
+    # 发布快照：上一步与当前步的位置，draw 在两者之间插值
+    target.publish(tuple((p.px, p.py, p.x, p.y, p.size, p.color) for p in target.particles))
+
+def draw(gc, width, height, target, alpha):
+    """在上一步与当前步之间插值绘制"""
+    res = target.resources
+    gc.SetBrush(res.brush(wx.BLACK))
+    gc.DrawRectangle(0, 0, width, height)
+
+    for px, py, cx, cy, size, color in target.snapshot or ():
+        x = px + (cx - px) * alpha
+        y = py + (cy - py) * alpha
+        gc.SetPen(res.pen(color, 1))
+        gc.SetBrush(res.brush(color))
+        gc.DrawEllipse(x - size / 2, y - size / 2, size, size)
@@ -19,7 +19,12 @@ include_files = [
     ("resources/ffmpeg", "resources/ffmpeg"),
     ("resources/icons", "resources/icons"),
     ("resources/mp4", "resources/mp4"),
-    ("resources/example.py", "resources/example.py")
+    ("resources/example.py", "resources/example.py"),
+    ("resources/example_v2.py", "resources/example_v2.py"),
+    ("resources/example_process.py", "resources/example_process.py"),
+    ("resources/example_particles.py", "resources/example_particles.py"),
+    ("resources/example_links.py", "resources/example_links.py"),
+    ("resources/example_framebuffer.py", "resources/example_framebuffer.py")
 ]
 
 # 可执行文件配置
@@ -38,6 +43,8 @@ build_exe_options = {
     "includes": [
         "FreeSimpleGUIWx",
         "wx",                # wxPython 核心
+        "numpy", "ParticleEngine", "SpatialGrid",   # 向量化粒子引擎与空间索引（脚本按需导入）
+        "Headless", "HeadlessWx",    # 预渲染帧缓存时在后台进程中导入
         "win32gui", "win32con", "subprocess", "ctypes",
         "json", "logging", "os", "sys", "typing", "functools"
     ],
@@ -59,7 +66,7 @@ build_exe_options = {
         "http", "xml",
         "concurrent",
         # === 未使用的第三方库 ===
-        "PIL", "mulitprocressing", "numpy", "matplotlib", "requests"
+        "PIL", "mulitprocressing", "matplotlib", "requests"
     ],
     "optimize": 2,
     "zip_include_packages": ["*"],
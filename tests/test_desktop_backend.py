@@ -0,0 +1,125 @@
+import pytest
+
+import DesktopBackend
+from DesktopBackend import FakeDesktopBackend, WS_CHILD
+from DesktopTopology import DesktopTopology, set_topology
+from WorkerW import embed_window, get_workerw, kill_process_by_hwnd
+
+
+@pytest.fixture
+def desktop():
+    fake = FakeDesktopBackend()
+    topology = DesktopTopology(events=fake.topology_events)
+    previous = DesktopBackend.set_backend(fake)
+    previous_topology = set_topology(topology)
+    topology.start()
+    yield fake, topology
+    topology.events.stop()
+    set_topology(previous_topology)
+    DesktopBackend.set_backend(previous)
+
+
+def _embed(fake, title, delay=0.0):
+    fake.launch(title, delay, visible=False)
+    hwnd, _ = embed_window(title, fake.events, clock=fake.clock, wait=fake.wait)
+    assert hwnd
+    return hwnd
+
+
+def test_embed_hidden_window(desktop):
+    fake, _ = desktop
+    hwnd = _embed(fake, "WALLPAPER", delay=0.3)
+    window = fake.windows[hwnd]
+
+    assert window.parent == get_workerw()
+    assert window.style & WS_CHILD
+    assert window.rect == (0, 0, 1920, 1080)
+    # 以隐藏方式启动，嵌入后才显示
+    assert fake.is_window_visible(hwnd)
+    assert fake.calls['show_window'] == 2
+    assert fake.now == 0.3
+
+
+def test_new_wallpaper_covers_old(desktop):
+    fake, _ = desktop
+    old = _embed(fake, "OLD")
+    new = _embed(fake, "NEW")
+    workerw = get_workerw()
+
+    assert fake.windows[old].parent == fake.windows[new].parent == workerw
+    assert kill_process_by_hwnd(old)
+    assert old not in fake.windows
+    assert fake.children(workerw) == [new]
+
+
+def test_teardown_keeps_desktop(desktop):
+    fake, _ = desktop
+    hwnd = _embed(fake, "WALLPAPER")
+    pid = fake.get_window_pid(hwnd)
+    workerw = get_workerw()
+
+    assert kill_process_by_hwnd(hwnd)
+    assert pid not in fake.processes
+    assert not fake.is_window(hwnd)
+    assert fake.is_window(workerw)
+    assert fake.children(workerw) == []
+    # 再次终止已不存在的进程
+    assert not fake.terminate_process(pid)
+
+
+def test_workerw_is_cached(desktop):
+    fake, topology = desktop
+    _embed(fake, "A")
+    fake.calls.clear()
+    _embed(fake, "B")
+
+    assert 'enum_windows' not in fake.calls
+    assert 'send_message_timeout' not in fake.calls
+    assert topology.hits['workerw'] >= 1
+
+
+def test_restart_explorer_rescans(desktop):
+    fake, topology = desktop
+    hwnd = _embed(fake, "OLD")
+    old_workerw = get_workerw()
+    invalidations = topology.invalidations
+
+    fake.restart_explorer()
+
+    # 嵌入在旧 WorkerW 中的窗口随资源管理器一起销毁，缓存已失效
+    assert not fake.is_window(old_workerw)
+    assert not fake.is_window(hwnd)
+    assert topology.invalidations == invalidations + 1
+
+    fake.calls.clear()
+    misses = topology.misses['workerw']
+    new = _embed(fake, "NEW")
+    workerw = get_workerw()
+
+    assert workerw != old_workerw and fake.is_window(workerw)
+    assert fake.windows[new].parent == workerw
+    assert fake.calls['send_message_timeout'] == 1
+    assert fake.calls['enum_windows'] >= 1
+    assert topology.misses['workerw'] == misses + 1
+
+
+def test_destroyed_workerw_without_event(desktop):
+    fake, topology = desktop
+    _embed(fake, "OLD")
+    old_workerw = get_workerw()
+    # 没有广播 TaskbarCreated 的情况下 WorkerW 被销毁：IsWindow 校验失败后重新查找
+    fake._destroy(old_workerw)
+
+    new = _embed(fake, "NEW")
+    assert fake.windows[new].parent == get_workerw() != old_workerw
+    assert topology.invalidations == 0
+
+
+def test_change_display(desktop):
+    fake, topology = desktop
+    _embed(fake, "OLD")
+    fake.change_display((2560, 1440))
+
+    hwnd = _embed(fake, "NEW")
+    assert fake.windows[hwnd].rect == (0, 0, 2560, 1440)
+    assert topology.misses['screen'] == 2
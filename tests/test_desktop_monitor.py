@@ -0,0 +1,94 @@
+import pytest
+
+from DesktopMonitor import DesktopVisibilityMonitor, FakeVisibilityDetector, Win32VisibilityDetector
+
+WS_EX_LAYERED = 0x00080000
+WS_EX_TRANSPARENT = 0x00000020
+WS_EX_TOOLWINDOW = 0x00000080
+WS_EX_WINDOWEDGE = 0x00000100
+WORK_AREA = (0, 0, 1920, 1040)
+
+
+class ScriptedDetector(FakeVisibilityDetector):
+    """按虚拟时间返回预先安排的可见性：timeline 为 [(开始时刻, 是否可见)]"""
+    def __init__(self, clock, timeline):
+        super().__init__()
+        self.clock = clock
+        self.timeline = timeline
+
+    def is_desktop_visible(self):
+        self.visible = [visible for start, visible in self.timeline if start <= self.clock.now][-1]
+        return super().is_desktop_visible()
+
+
+class VirtualClock:
+    """monitor 的等待函数：前进 timeout 秒，到达 end 时让监视循环退出"""
+    def __init__(self, end):
+        self.now = 0.0
+        self.end = end
+
+    def wait(self, event, timeout):
+        self.now += timeout
+        if self.now > self.end:
+            event.set()
+        return event.is_set()
+
+
+def _run(timeline, end, **kwargs):
+    clock = VirtualClock(end)
+    changes = []
+    monitor = DesktopVisibilityMonitor(ScriptedDetector(clock, timeline),
+                                       lambda visible: changes.append((clock.now, visible)),
+                                       wait=clock.wait, **kwargs)
+    monitor._run()
+    return monitor, changes
+
+
+def test_pause_after_two_confirmations_resume_after_one():
+    monitor, changes = _run([(0, True), (1.0, False), (3.0, True)], end=5.0,
+                            interval=0.5, pause_after=2, resume_after=1)
+    # 1.0 s 第一次看到遮挡，1.5 s 确认；3.0 s 恢复可见立即通知
+    assert changes == [(1.5, False), (3.0, True)]
+    assert monitor.visible
+
+
+def test_brief_occlusion_is_ignored():
+    monitor, changes = _run([(0, True), (1.0, False), (1.5, True)], end=4.0,
+                            interval=0.5, pause_after=2, resume_after=1)
+    assert changes == []
+    assert monitor.visible
+
+
+def test_polls_once_per_interval():
+    monitor, _ = _run([(0, True)], end=10.0, interval=0.5)
+    assert monitor.detector.queries == 20
+
+
+def test_detector_error_counts_as_visible():
+    class Broken(FakeVisibilityDetector):
+        def is_desktop_visible(self):
+            raise OSError("EnumWindows failed")
+
+    changes = []
+    monitor = DesktopVisibilityMonitor(Broken(), changes.append, pause_after=1)
+    monitor.visible = False
+    assert monitor.poll()
+    assert changes == [True]
+
+
+@pytest.mark.parametrize("ex_style", [WS_EX_LAYERED, WS_EX_TRANSPARENT, WS_EX_TOOLWINDOW,
+                                      WS_EX_LAYERED | WS_EX_TRANSPARENT | WS_EX_WINDOWEDGE])
+def test_overlays_do_not_cover(ex_style):
+    detector = Win32VisibilityDetector()
+    assert not detector.covers("Overlay", ex_style, (0, 0, 1920, 1080), WORK_AREA)
+
+
+def test_fullscreen_window_covers():
+    detector = Win32VisibilityDetector()
+    assert detector.covers("Chrome_WidgetWin_1", WS_EX_WINDOWEDGE, (-8, -8, 1928, 1048), WORK_AREA)
+    assert not detector.covers("Chrome_WidgetWin_1", WS_EX_WINDOWEDGE, (0, 0, 1200, 800), WORK_AREA)
+
+
+@pytest.mark.parametrize("class_name", ["Progman", "WorkerW", "Shell_TrayWnd"])
+def test_desktop_and_taskbar_do_not_cover(class_name):
+    assert not Win32VisibilityDetector().covers(class_name, 0, (0, 0, 1920, 1080), WORK_AREA)
@@ -0,0 +1,160 @@
+import os
+import sys
+
+import pytest
+
+from FrameCache import FrameCacheReader, FrameCacheWriter, bake, is_fresh, read_info
+
+WIDTH, HEIGHT = 8, 4
+
+
+def _frame(value):
+    return bytes([value % 256]) * (WIDTH * HEIGHT * 4)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip_with_repeated_frames(tmp_path, compress):
+    path = str(tmp_path / "test.frames")
+    writer = FrameCacheWriter(path, WIDTH, HEIGHT, 30.0, compress=compress)
+    # 帧 1、2 与帧 0 相同，帧 4 与帧 3 相同
+    frames = [_frame(1), _frame(1), _frame(1), _frame(2), _frame(2), _frame(3)]
+    changed = [True, False, False, True, False, True]
+    for pixels, flag in zip(frames, changed):
+        writer.add(pixels, changed=flag)
+    writer.close()
+
+    assert os.path.exists(path)
+    assert not os.path.exists(path + ".tmp")
+    if not compress:
+        # 相同的帧只保存一次
+        assert writer.bytes_written == 3 * WIDTH * HEIGHT * 4
+
+    reader = FrameCacheReader(path)
+    try:
+        assert (reader.width, reader.height, reader.fps) == (WIDTH, HEIGHT, 30.0)
+        assert len(reader) == len(frames)
+        for i, pixels in enumerate(frames):
+            assert bytes(reader.frame(i)) == pixels
+        assert reader.same_frame(0, 2)
+        assert reader.same_frame(3, 4)
+        assert not reader.same_frame(2, 3)
+        assert not reader.same_frame(0, len(frames))
+    finally:
+        reader.close()
+
+
+def test_first_frame_unchanged_is_stored(tmp_path):
+    """第一帧即使标记为未变化也要保存数据"""
+    path = str(tmp_path / "test.frames")
+    writer = FrameCacheWriter(path, WIDTH, HEIGHT, 10.0)
+    writer.add(_frame(7), changed=False)
+    writer.close()
+
+    reader = FrameCacheReader(path)
+    try:
+        assert len(reader) == 1
+        assert bytes(reader.frame(0)) == _frame(7)
+    finally:
+        reader.close()
+
+
+def test_wrong_frame_size(tmp_path):
+    writer = FrameCacheWriter(str(tmp_path / "test.frames"), WIDTH, HEIGHT, 10.0)
+    with pytest.raises(ValueError):
+        writer.add(b"\0" * 10)
+    writer.abort()
+
+
+def test_abort_leaves_nothing(tmp_path):
+    path = str(tmp_path / "test.frames")
+    writer = FrameCacheWriter(path, WIDTH, HEIGHT, 10.0)
+    writer.add(_frame(1))
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "bad.frames"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        FrameCacheReader(str(path))
+
+
+def _write_cache(path, sources, seconds=10.0, target=(16, 8)):
+    writer = FrameCacheWriter(str(path), WIDTH, HEIGHT, 10.0, seconds=seconds, target=target, sources=sources)
+    writer.add(_frame(1))
+    writer.close()
+
+
+def test_header_records_bake_parameters(tmp_path):
+    script = tmp_path / "wallpaper.py"
+    script.write_text("")
+    cache = tmp_path / "wallpaper.frames"
+    _write_cache(cache, [str(script)])
+
+    info = read_info(str(cache))
+    assert (info['width'], info['height'], info['seconds'], info['target']) == (WIDTH, HEIGHT, 10.0, (16, 8))
+    reader = FrameCacheReader(str(cache))
+    try:
+        assert reader.target == (16, 8)
+        assert [path for path, _, _ in reader.sources] == [str(script)]
+    finally:
+        reader.close()
+
+
+def test_is_fresh_compares_parameters(tmp_path):
+    script = tmp_path / "wallpaper.py"
+    script.write_text("")
+    cache = tmp_path / "wallpaper.frames"
+    _write_cache(cache, [str(script)])
+
+    assert is_fresh(str(cache), str(script))
+    assert is_fresh(str(cache), str(script), seconds=10, width=WIDTH, height=HEIGHT, target=(16, 8))
+    assert not is_fresh(str(cache), str(script), seconds=5)
+    assert not is_fresh(str(cache), str(script), width=WIDTH * 2, height=HEIGHT * 2)
+    assert not is_fresh(str(cache), str(script), target=(32, 16))
+
+
+def test_is_fresh_checks_every_source(tmp_path):
+    script = tmp_path / "wallpaper.py"
+    helper = tmp_path / "helper.py"
+    script.write_text("import helper\n")
+    helper.write_text("VALUE = 1\n")
+    cache = tmp_path / "wallpaper.frames"
+    _write_cache(cache, [str(script), str(helper)])
+    assert is_fresh(str(cache), str(script))
+
+    helper.write_text("VALUE = 22\n")
+    assert not is_fresh(str(cache), str(script))
+    # 缓存不是为这个脚本生成的
+    _write_cache(cache, [str(helper)])
+    assert not is_fresh(str(cache), str(script))
+
+
+def test_is_fresh_rejects_missing_and_invalid(tmp_path):
+    script = tmp_path / "wallpaper.py"
+    script.write_text("")
+    assert not is_fresh(str(tmp_path / "missing.frames"), str(script))
+    bad = tmp_path / "bad.frames"
+    bad.write_bytes(b"PWFC\x01\x00")
+    assert not is_fresh(str(bad), str(script))
+
+
+def test_bake_records_imported_local_modules(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "bake_helper.py").write_text("COLOUR = (255, 0, 0)\n")
+    script = tmp_path / "baked.py"
+    script.write_text(
+        "import bake_helper\n"
+        "FPS = 10\n"
+        "def init(target):\n    pass\n"
+        "def update(target):\n    pass\n"
+        "def draw(gc, width, height, target):\n"
+        "    gc.SetBrush(gc.CreateBrush(target.resources.wx.Brush(bake_helper.COLOUR)))\n"
+        "    gc.DrawRectangle(0, 0, width, height)\n")
+    monkeypatch.delitem(sys.modules, "bake_helper", raising=False)
+
+    cache = bake(str(script), seconds=0.5, width=WIDTH, height=HEIGHT, target=(80, 40))
+    assert is_fresh(cache, str(script), seconds=0.5, width=WIDTH, height=HEIGHT, target=(80, 40))
+    recorded = [os.path.basename(path) for path, _, _ in read_info(cache)['sources']]
+    assert "baked.py" in recorded and "bake_helper.py" in recorded
@@ -0,0 +1,133 @@
+import pytest
+
+from FrameScheduler import FixedTimestep, FrameScheduler
+from Headless import HeadlessFrame
+
+
+class FakeClock:
+    """虚拟时钟：sleep 直接前进时间，记录每次休眠时长"""
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(fps=10):
+    clock = FakeClock()
+    scheduler = FrameScheduler(fps, clock=clock, sleep=clock.sleep)
+    scheduler.start()
+    return scheduler, clock
+
+
+def test_deadlines_do_not_drift():
+    scheduler, clock = _scheduler(fps=10)
+    for work in [0.03, 0.05, 0.01, 0.09]:
+        clock.now += work
+        assert scheduler.wait() == 0
+    # 每帧都对齐到起始时刻的整数倍，与每帧工作耗时无关
+    assert clock.now == pytest.approx(100.4)
+    assert clock.sleeps == pytest.approx([0.07, 0.05, 0.09, 0.01])
+    assert scheduler.frame_index == 4
+
+
+def test_missed_deadlines_are_skipped_not_queued():
+    scheduler, clock = _scheduler(fps=10)
+    clock.now += 0.35   # 第 1~3 帧的截止时间都已错过
+    assert scheduler.wait() == 3
+    assert clock.now == pytest.approx(100.4)
+    assert scheduler.missed_frames == 3
+    assert scheduler.frame_index == 4
+
+    # 之后按新的截止时间继续，不补帧
+    clock.now += 0.02
+    assert scheduler.wait() == 0
+    assert clock.now == pytest.approx(100.5)
+
+
+def test_exact_deadline_counts_as_missed():
+    scheduler, clock = _scheduler(fps=10)
+    clock.now += 0.1
+    assert scheduler.wait() == 1
+    assert clock.now == pytest.approx(100.2)
+
+
+def test_set_fps_applies_from_next_frame():
+    scheduler, clock = _scheduler(fps=10)
+    scheduler.wait()
+    scheduler.set_fps(20)
+    scheduler.wait()
+    scheduler.wait()
+    assert clock.now == pytest.approx(100.25)
+    with pytest.raises(ValueError):
+        scheduler.set_fps(0)
+
+
+def test_first_advance_runs_one_step():
+    clock = FakeClock()
+    timestep = FixedTimestep(hz=10, clock=clock)
+    assert timestep.advance() == 1
+    assert timestep.alpha == 0.0
+
+
+def test_accumulator_carries_remainder_into_alpha():
+    clock = FakeClock()
+    timestep = FixedTimestep(hz=10, clock=clock)
+    timestep.advance()
+
+    clock.now += 0.25
+    assert timestep.advance() == 2
+    assert timestep.alpha == pytest.approx(0.5)
+    clock.now += 0.04
+    assert timestep.advance() == 0
+    assert timestep.alpha == pytest.approx(0.9)
+    clock.now += 0.01
+    assert timestep.advance() == 1
+    assert timestep.alpha == pytest.approx(0.0, abs=1e-9)
+
+
+def test_catch_up_is_clamped_to_max_steps():
+    clock = FakeClock()
+    timestep = FixedTimestep(hz=10, max_steps=3, clock=clock)
+    timestep.advance()
+
+    clock.now += 1.05   # 10 步，只补 3 步
+    assert timestep.advance() == 3
+    assert timestep.dropped_time == pytest.approx(0.7)
+    assert timestep.alpha == pytest.approx(0.5)
+
+
+def test_resume_discards_paused_time():
+    clock = FakeClock()
+    timestep = FixedTimestep(hz=10, clock=clock)
+    timestep.advance()
+    clock.now += 0.05
+    assert timestep.advance() == 0
+
+    clock.now += 30.0   # 暂停
+    timestep.resume()
+    assert timestep.advance() == 0
+    assert timestep.alpha == pytest.approx(0.5)
+
+
+def test_draw_receives_interpolation_alpha():
+    alphas, steps = [], []
+
+    def update(target, dt):
+        steps.append(dt)
+
+    def draw(gc, width, height, target, alpha):
+        alphas.append(alpha)
+
+    # 渲染 40 FPS、模拟 10 Hz：每 4 帧一步，alpha 依次为 0、0.25、0.5、0.75
+    frame = HeadlessFrame(update, draw_func=draw, fps=40, script_version=2, sim_hz=10,
+                          width=16, height=8, rasterize=False)
+    frame.run(9)
+    assert alphas == pytest.approx([0.0, 0.25, 0.5, 0.75, 0.0, 0.25, 0.5, 0.75, 0.0])
+    assert len(steps) == 3
+    assert steps == pytest.approx([0.1] * 3)
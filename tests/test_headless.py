@@ -0,0 +1,73 @@
+import pytest
+
+# 向量化描边需要 NumPy，没有时 Headless 退回逐条扫描线
+pytest.importorskip("numpy")
+
+import random
+
+import Headless
+import HeadlessWx
+from Headless import RasterGraphicsContext
+
+
+def _stroke(segments, width=1, colour=HeadlessWx.Colour(255, 0, 0), clip=None, scale=None):
+    gc = RasterGraphicsContext(64, 48)
+    gc.SetPen(HeadlessWx.Pen(colour, width))
+    if scale is not None:
+        gc.Scale(*scale)
+    if clip is not None:
+        gc.Clip(*clip)
+    # 逐条描边：比较的是单条线段的覆盖范围，不受批量去重影响
+    for segment in segments:
+        gc.StrokeLine(*segment)
+    return bytes(gc.pixels)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_vectorised_stroke_matches_scanline(seed, monkeypatch):
+    rng = random.Random(seed)
+    for _ in range(200):
+        ax, ay, bx, by = (rng.uniform(-10, 74) for _ in range(4))
+        kind = rng.random()
+        if kind < 0.15:
+            bx = ax   # 竖直
+        elif kind < 0.3:
+            by = ay   # 水平
+        segment = (ax, ay, bx, by)
+        options = dict(width=rng.choice([1, 2, 3, 5]),
+                       colour=rng.choice([HeadlessWx.Colour(255, 0, 0), HeadlessWx.Colour(0, 255, 0, 128)]),
+                       clip=rng.choice([None, (5, 7, 40, 30)]),
+                       scale=rng.choice([None, (1.5, 0.75)]))
+        vectorised = _stroke([segment], **options)
+        with monkeypatch.context() as patch:
+            patch.setattr(Headless, "np", None)
+            assert _stroke([segment], **options) == vectorised, (segment, options)
+
+
+def test_axis_aligned_and_point_segments_get_square_caps():
+    gc = RasterGraphicsContext(16, 16, background=(0, 0, 0, 0))
+    gc.SetPen(HeadlessWx.Pen(HeadlessWx.Colour(255, 255, 255), 3))
+    path = gc.CreatePath()
+    path.MoveToPoint(4, 3)
+    path.AddLineToPoint(10, 3)
+    path.MoveToPoint(8, 10)
+    path.AddLineToPoint(8, 10)
+    gc.StrokePath(path)
+    alpha = gc.pixels[3::4]
+    covered = {(i % 16, i // 16) for i, a in enumerate(alpha) if a}
+    horizontal = {(x, y) for x in range(3, 12) for y in range(2, 5)}
+    point = {(x, y) for x in range(7, 10) for y in range(9, 12)}
+    assert covered == horizontal | point
+
+
+def test_overlapping_segments_in_one_path_blend_once():
+    gc = RasterGraphicsContext(8, 8)
+    gc.SetPen(HeadlessWx.Pen(HeadlessWx.Colour(255, 255, 255, 128), 1))
+    path = gc.CreatePath()
+    for _ in range(3):
+        path.MoveToPoint(0, 4)
+        path.AddLineToPoint(8, 4)
+    gc.StrokePath(path)
+    row = bytes(gc.pixels[4 * 8 * 4:5 * 8 * 4])
+    assert row == bytes((128, 128, 128, 255)) * 8
+    assert gc.calls['StrokePath'] == 1
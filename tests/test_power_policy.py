@@ -0,0 +1,91 @@
+from PowerPolicy import BATTERY_FREEZE, Decision, FakeSource, PolicyEngine, Rule, default_rules
+
+
+def _engine(rules=None, cpu=0.0, on_battery=False, idle=0.0, confirm=2):
+    sources = {'cpu': FakeSource(cpu), 'on_battery': FakeSource(on_battery), 'idle': FakeSource(idle)}
+    changes = []
+    engine = PolicyEngine(sources, default_rules() if rules is None else rules, changes.append,
+                          confirm=confirm)
+    return engine, sources, changes
+
+
+def _poll(engine, times):
+    for _ in range(times):
+        engine.poll()
+    return engine.decision
+
+
+def test_cpu_cap_enters_at_70_and_releases_below_55():
+    engine, sources, changes = _engine()
+
+    sources['cpu'].value = 69
+    assert _poll(engine, 3) == Decision()
+    sources['cpu'].value = 70
+    assert _poll(engine, 2) == Decision(fps=30)
+    # 55% ~ 70% 之间保持限帧
+    sources['cpu'].value = 60
+    assert _poll(engine, 3) == Decision(fps=30)
+    sources['cpu'].value = 55
+    assert _poll(engine, 3) == Decision(fps=30)
+    sources['cpu'].value = 54
+    assert _poll(engine, 2) == Decision()
+    assert changes == [Decision(fps=30), Decision()]
+
+
+def test_flapping_does_not_trigger_on_change():
+    engine, sources, changes = _engine()
+    # 每次只持续一次采样，达不到 confirm=2
+    for cpu in [80, 40, 80, 40, 80, 40]:
+        sources['cpu'].value = cpu
+        engine.poll()
+    assert changes == []
+    assert engine.decision == Decision()
+
+
+def test_new_decision_needs_confirmation():
+    engine, sources, changes = _engine()
+    sources['cpu'].value = 90
+    engine.poll()
+    assert changes == []
+    engine.poll()
+    assert changes == [Decision(fps=30)]
+
+
+def test_unchanged_decision_is_not_reported_again():
+    engine, sources, changes = _engine(cpu=90)
+    _poll(engine, 10)
+    assert changes == [Decision(fps=30)]
+
+
+def test_freeze_and_lowest_fps_combine():
+    engine, sources, changes = _engine(default_rules(battery_freeze=True), cpu=90, on_battery=True, idle=600)
+    decision = _poll(engine, 2)
+    assert decision.freeze
+    assert decision.fps == 15
+    assert set(decision.rules) == {"高负载限帧", BATTERY_FREEZE, "长时间空闲降帧"}
+
+    # 冻结解除后仍保留帧率上限
+    sources['on_battery'].value = False
+    assert _poll(engine, 2) == Decision(fps=15)
+
+
+def test_battery_freeze_is_off_by_default():
+    engine, sources, changes = _engine(on_battery=True)
+    assert _poll(engine, 3) == Decision()
+
+    assert engine.set_enabled(BATTERY_FREEZE, True)
+    assert _poll(engine, 2) == Decision(freeze=True)
+    engine.set_enabled(BATTERY_FREEZE, False)
+    assert _poll(engine, 2) == Decision()
+    assert not engine.set_enabled("不存在的规则", True)
+
+
+def test_failing_source_reads_as_zero():
+    class Broken(FakeSource):
+        def read(self):
+            raise OSError("no /proc")
+
+    engine = PolicyEngine({'cpu': Broken(None)}, [Rule("cpu", lambda s: s['cpu'] >= 70, fps=30)],
+                          lambda decision: None, confirm=1)
+    assert engine.poll() == Decision()
+    assert engine.sample == {'cpu': 0}
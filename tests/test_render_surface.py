@@ -0,0 +1,101 @@
+import HeadlessWx
+from RenderSurface import BatchContext, ResourceCache, ScaleController
+
+
+def _groups(colors, n):
+    return BatchContext(None, ResourceCache(HeadlessWx))._groups(colors, n)
+
+
+def test_single_colour_tuple():
+    assert _groups((255, 0, 0), 3) == [((255, 0, 0, 255), range(3))]
+
+
+def test_tuple_of_colours_is_per_item():
+    groups = _groups(((255, 0, 0), (0, 255, 0), (255, 0, 0)), 3)
+    assert [indices for _, indices in groups] == [[0, 2], [1]]
+
+
+def test_list_of_colours_is_per_item():
+    groups = _groups([(1, 2, 3), (4, 5, 6)], 2)
+    assert len(groups) == 2
+
+
+def _record(controller, seconds, frames):
+    return [controller.record(seconds) for _ in range(frames)]
+
+
+def test_scale_down_when_over_budget():
+    controller = ScaleController(budget=0.010, window=4)
+    # 判断需要满 window 帧
+    assert _record(controller, 0.02, 3) == [False] * 3
+    assert controller.record(0.02)
+    assert controller.scale == 0.75
+
+
+def test_scale_clamped_to_levels():
+    controller = ScaleController(budget=0.010, window=2)
+    _record(controller, 0.05, 20)
+    assert controller.scale == 0.5
+    assert controller.changes == 2
+    _record(controller, 0.0001, 20)
+    assert controller.scale == 1.0
+    assert controller.changes == 4
+
+
+def test_scale_up_needs_sustained_slack():
+    controller = ScaleController(budget=0.010, window=4, up_ratio=0.5)
+    _record(controller, 0.02, 4)
+    assert controller.scale == 0.75
+    # 低于预算但高于 budget * up_ratio：保持不变
+    assert not any(_record(controller, 0.007, 12))
+    # 窗口内偶尔很快的帧不够，平均仍高于阈值
+    assert not any(_record(controller, 0.001, 1) + _record(controller, 0.008, 3))
+    assert controller.scale == 0.75
+    assert any(_record(controller, 0.004, 4))
+    assert controller.scale == 1.0
+
+
+def test_scale_reset():
+    controller = ScaleController(budget=0.010, window=2)
+    _record(controller, 0.05, 2)
+    controller.record(0.05)
+    controller.reset()
+    assert controller.scale == 1.0
+    # 重置时丢弃未满窗口的采样
+    assert not controller.record(0.05)
+
+
+def test_resource_cache_reuses_objects():
+    cache = ResourceCache(HeadlessWx)
+    pen = cache.pen((255, 0, 0), 2)
+    assert cache.pen((255, 0, 0, 255), 2) is pen
+    assert cache.pen((255, 0, 0), 3) is not pen
+    # 第三支 pen 复用已缓存的颜色
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_resource_cache_evicts_least_recently_used():
+    cache = ResourceCache(HeadlessWx, max_size=3)
+    created = []
+
+    def get(key):
+        return cache.get(key, lambda: created.append(key) or object())
+
+    a, b, c = get('a'), get('b'), get('c')
+    assert get('a') is a      # a 变为最近使用
+    get('d')                  # 淘汰最久未使用的 b
+    assert cache.evictions == 1
+    assert get('a') is a and get('c') is c and get('d') is not None
+    assert created == ['a', 'b', 'c', 'd']
+    get('b')                  # b 已被淘汰，重新创建
+    assert created == ['a', 'b', 'c', 'd', 'b']
+    assert len(cache._items) == 3
+
+
+def test_resource_cache_capacity():
+    cache = ResourceCache(HeadlessWx, max_size=8)
+    for i in range(50):
+        cache.colour((i, 0, 0))
+    assert len(cache._items) == 8
+    assert cache.evictions == 42
+    assert (cache.hits, cache.misses) == (0, 50)
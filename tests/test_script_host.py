@@ -0,0 +1,69 @@
+from Headless import HeadlessFrame
+
+
+def _frame(update):
+    return HeadlessFrame(update, draw_func=lambda gc, w, h, target: None,
+                         width=200, height=100, rasterize=False)
+
+
+def test_update_may_return_a_single_rect():
+    frame = _frame(lambda target: (10, 20, 30, 40))
+    assert frame._run_update()
+    assert frame.dirty.take() == [(8, 18, 35, 45)]
+
+
+def test_update_may_return_a_list_of_rects():
+    frame = _frame(lambda target: [(0, 0, 5, 5), (50, 50, 5, 5)])
+    assert frame._run_update()
+    assert len(frame.dirty.take()) == 2
+
+
+def test_malformed_rect_falls_back_to_full_redraw():
+    frame = _frame(lambda target: [(0, 0, 5, 5), "oops"])
+    assert frame._run_update()
+    assert frame.dirty.take() is None
+
+
+def test_empty_list_means_unchanged():
+    frame = _frame(lambda target: [])
+    frame._run_update()   # 第一帧总是绘制
+    assert not frame._run_update()
+
+
+def test_invalidating_an_unknown_layer_is_ignored():
+    invalidate = []
+
+    def update(target):
+        for name in invalidate:
+            target.invalidate_layer(name)
+
+    frame = _frame(update)
+    frame.add_layer('background', lambda gc, w, h, target: None)
+    frame.add_layer('grid', lambda gc, w, h, target: None)
+    frame.remove_layer('grid')
+    frame.run(2)
+    background = frame.layers.get('background')
+    drawable = background.drawable
+    assert background.valid and background.renders == 1
+
+    invalidate[:] = ['missing', 'grid']
+    frame.step()
+
+    assert [layer.name for layer in frame.layers.below()] == ['background']
+    assert frame.layers.get('grid') is None
+    # 其余图层的缓存不受影响，也没有标记需要重绘
+    assert background.valid and background.renders == 1
+    assert background.drawable is drawable
+    assert not frame.layers.take_changed()
+
+
+def test_static_layer_is_converted_once():
+    frame = _frame(lambda target: None)
+    converted = []
+    frame._layer_drawable = lambda gc, bitmap: converted.append(bitmap) or bitmap
+    frame.add_layer('grid', lambda gc, w, h, target: None)
+    frame.run(3)
+    assert len(converted) == 1
+    frame.invalidate_layer('grid')
+    frame.run(2)
+    assert len(converted) == 2
@@ -0,0 +1,49 @@
+import pytest
+
+from Headless import HeadlessFrame
+
+
+def _draw(gc, width, height, target, alpha):
+    pass
+
+
+@pytest.mark.parametrize("phase", range(5))
+def test_broken_update_rolls_back_after_frames_without_steps(phase):
+    """渲染帧率高于模拟频率时，没有模拟步的帧不能让新 update 提前通过试用"""
+    def update(target, dt):
+        target.steps += 1
+
+    def broken(target, dt):
+        raise RuntimeError("broken reload")
+
+    frame = HeadlessFrame(update, draw_func=_draw, fps=240, script_version=2, sim_hz=60,
+                          width=32, height=24, rasterize=False)
+    frame.steps = 0
+    for _ in range(phase):
+        frame.step()
+    frame.replace_script(broken, _draw)
+    for _ in range(8):
+        frame.step()
+
+    assert frame.update_func is update
+    assert frame._fallback is None
+    assert frame.steps > 0
+
+
+def test_reload_keeps_new_code_once_it_runs():
+    def update(target, dt):
+        target.version = 1
+
+    def replacement(target, dt):
+        target.version = 2
+
+    frame = HeadlessFrame(update, draw_func=_draw, fps=240, script_version=2, sim_hz=60,
+                          width=32, height=24, rasterize=False)
+    frame.step()
+    frame.replace_script(replacement, _draw)
+    for _ in range(8):
+        frame.step()
+
+    assert frame.update_func is replacement
+    assert frame._fallback is None
+    assert frame.version == 2
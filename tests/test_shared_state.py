@@ -0,0 +1,123 @@
+import logging
+import multiprocessing
+import threading
+
+import pytest
+
+from SharedState import SharedTripleBuffer, _renderer_main, _simulation_main
+from StateBuffer import TripleBuffer
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    broken = tmp_path / "broken.py"
+    broken.write_text("raise ImportError('missing dependency')\n")
+    no_update = tmp_path / "no_update.py"
+    no_update.write_text("def init(target):\n    pass\n")
+    return broken, no_update
+
+
+def test_simulation_exits_cleanly_when_script_fails_to_load(scripts, caplog):
+    broken, no_update = scripts
+    with caplog.at_level(logging.ERROR, logger="SharedState"):
+        # 加载失败时在创建共享内存之前返回，其余参数不会被使用
+        assert _simulation_main(str(broken), None, None, None, None, None, 0, 0, 60, 1, 60) is None
+        assert _simulation_main(str(no_update), None, None, None, None, None, 0, 0, 60, 1, 60) is None
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("导入脚本失败" in message for message in messages)
+    assert any("缺少 update" in message for message in messages)
+
+
+def test_renderer_exits_cleanly_when_script_fails_to_load(scripts, caplog):
+    broken, no_update = scripts
+    with caplog.at_level(logging.ERROR, logger="SharedState"):
+        assert _renderer_main(str(broken), None, None, None, None, 0, 0) is None
+        assert _renderer_main(str(no_update), None, None, None, None, 0, 0) is None
+    assert any("缺少 render" in record.getMessage() for record in caplog.records)
+
+
+# ========== 三缓冲 ==========
+def test_triple_buffer_initial_state():
+    buffer = TripleBuffer(initial="empty")
+    assert buffer.consume() == "empty"
+    assert not buffer.has_state
+    assert buffer.consumed == 0
+
+
+def test_triple_buffer_newest_snapshot_wins():
+    buffer = TripleBuffer()
+    buffer.publish("a")
+    buffer.publish("b")
+    assert buffer.consume() == "b"
+    # 没有新发布时重复返回同一份
+    assert buffer.consume() == "b"
+    assert (buffer.published, buffer.consumed) == (2, 1)
+
+    buffer.publish("c")
+    assert buffer.consume() == "c"
+    assert buffer.consumed == 2
+
+
+def test_triple_buffer_writer_never_touches_front():
+    buffer = TripleBuffer()
+    for i in range(10):
+        buffer.publish([i])
+        front = buffer.consume()
+        # 写端拿到的槽不是读端正在读的槽
+        assert buffer.back() is not front
+        assert front == [i]
+
+
+def test_triple_buffer_no_torn_reads_across_threads():
+    buffer = TripleBuffer(initial=(0, 0))
+    done = threading.Event()
+
+    def writer():
+        for i in range(1, 20001):
+            buffer.publish((i, -i))
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    last = 0
+    while not done.is_set() or buffer._fresh:
+        a, b = buffer.consume()
+        assert a == -b
+        assert a >= last
+        last = a
+    thread.join()
+    assert buffer.consume() == (20000, -20000)
+
+
+def test_shared_triple_buffer_second_handle():
+    lock = multiprocessing.Lock()
+    owner = SharedTripleBuffer(8, lock)
+    reader = SharedTripleBuffer(8, lock, name=owner.name)
+    try:
+        assert reader.consume() is None
+
+        for value in (b"first___", b"second__"):
+            back = owner.back()
+            back[:] = value
+            back.release()
+            owner.publish()
+        assert reader.seq == 2
+
+        # 连接同一块共享内存的第二个句柄读到最新发布的一份
+        front = reader.consume()
+        assert bytes(front) == b"second__"
+        front.release()
+
+        back = owner.back()
+        back[:] = b"third___"
+        back.release()
+        front = reader.consume()
+        assert bytes(front) == b"second__"   # 未发布的内容不可见
+        front.release()
+        owner.publish()
+        front = reader.consume()
+        assert bytes(front) == b"third___"
+        front.release()
+    finally:
+        reader.close()
+        owner.close()
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from SpatialGrid import SpatialGrid
+
+
+def _points(n, width, height, seed):
+    rng = np.random.default_rng(seed)
+    # 含少量越界的点：归入边缘格子，结果仍按真实距离过滤
+    x = rng.uniform(-20, width + 20, n).astype(np.float32)
+    y = rng.uniform(-20, height + 20, n).astype(np.float32)
+    return x, y
+
+
+def _brute_pairs(x, y, radius):
+    dx = x[:, None] - x[None, :]
+    dy = y[:, None] - y[None, :]
+    i, j = np.nonzero(np.triu(dx * dx + dy * dy <= radius * radius, k=1))
+    return {(int(a), int(b)) for a, b in zip(i, j)}
+
+
+def _grid_pairs(grid, radius):
+    i, j = grid.pairs(radius)
+    pairs = {(int(min(a, b)), int(max(a, b))) for a, b in zip(i, j)}
+    # 每对只出现一次
+    assert len(pairs) == len(i)
+    return pairs
+
+
+@pytest.mark.parametrize("radius", [5.0, 12.0, 30.0])
+def test_pairs_match_brute_force(radius):
+    x, y = _points(600, 200, 120, seed=1)
+    grid = SpatialGrid(200, 120, cell_size=12.0)
+    grid.rebuild(x, y)
+    assert _grid_pairs(grid, radius) == _brute_pairs(x, y, radius)
+
+
+@pytest.mark.parametrize("radius", [4.0, 12.0, 40.0])
+def test_query_matches_brute_force(radius):
+    x, y = _points(500, 200, 120, seed=2)
+    grid = SpatialGrid(200, 120, cell_size=12.0)
+    grid.rebuild(x, y)
+    for px, py in [(0, 0), (100, 60), (199, 119), (-10, 130), (57.5, 3.25)]:
+        expected = np.nonzero((x - px) ** 2 + (y - py) ** 2 <= radius * radius)[0]
+        assert sorted(grid.query(px, py, radius).tolist()) == expected.tolist()
+
+
+def test_incremental_rebuild():
+    x, y = _points(400, 200, 120, seed=3)
+    grid = SpatialGrid(200, 120, cell_size=10.0)
+    grid.rebuild(x, y)
+
+    # 没有点换格子时沿用原来的顺序
+    grid.rebuild(x, y)
+    assert grid.moved == 0
+
+    # 少量点移动后与完整重建的结果一致
+    rng = np.random.default_rng(4)
+    moved = rng.choice(400, 25, replace=False)
+    x[moved] = rng.uniform(0, 200, 25)
+    y[moved] = rng.uniform(0, 120, 25)
+    grid.rebuild(x, y)
+    assert 0 < grid.moved <= 25
+    assert _grid_pairs(grid, 10.0) == _brute_pairs(x, y, 10.0)
+
+    fresh = SpatialGrid(200, 120, cell_size=10.0)
+    fresh.rebuild(x, y)
+    assert np.array_equal(grid.start, fresh.start)
+    assert np.array_equal(np.sort(grid.cell[grid.order]), grid.cell[grid.order])
+
+
+def test_count_limits_points():
+    x, y = _points(300, 100, 100, seed=5)
+    grid = SpatialGrid(100, 100, cell_size=8.0)
+    grid.rebuild(x, y, count=120)
+    assert _grid_pairs(grid, 8.0) == _brute_pairs(x[:120], y[:120], 8.0)
+    assert all(i < 120 for i in grid.query(50, 50, 100).tolist())
+
+
+def test_fewer_than_two_points():
+    grid = SpatialGrid(100, 100, cell_size=8.0)
+    grid.rebuild(np.zeros(1, np.float32), np.zeros(1, np.float32))
+    i, j = grid.pairs(8.0)
+    assert i.size == j.size == 0
+    assert grid.query(0, 0, 8.0).tolist() == [0]
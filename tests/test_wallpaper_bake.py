@@ -0,0 +1,51 @@
+import pytest
+
+# WallpaperProc 依赖 wx、FreeSimpleGUIWx 和 pywin32，缺少时跳过
+pytest.importorskip("wx")
+pytest.importorskip("FreeSimpleGUIWx")
+pytest.importorskip("win32com")
+
+import os
+import types
+
+import wallpaper_window
+from DesktopMonitor import FakeVisibilityDetector
+from PowerPolicy import FakeSource
+from WindowDiscovery import FakeWindowEventSource
+
+
+class FailingProcess:
+    """代替 multiprocessing.Process：立即以退出码 1 结束"""
+    started = []
+
+    def __init__(self, target, args, kwargs=None, daemon=None):
+        self.exitcode = None
+
+    def start(self):
+        FailingProcess.started.append(self)
+        self.exitcode = 1
+
+    def is_alive(self):
+        return False
+
+
+def test_failed_bake_is_not_respawned(tmp_path, monkeypatch):
+    script = tmp_path / "text.py"
+    script.write_text("BAKE_SECONDS = 1\n")
+    module = types.SimpleNamespace(BAKE_SECONDS=1)
+    FailingProcess.started = []
+    monkeypatch.setattr(wallpaper_window, "Process", FailingProcess)
+    monkeypatch.setattr(wallpaper_window, "get_screen_size", lambda: (64, 32))
+    proc = wallpaper_window.WallpaperProc(visibility_detector=FakeVisibilityDetector(),
+                                          policy_sources={'cpu': FakeSource(0.0)}, policy_rules=[],
+                                          window_events=FakeWindowEventSource())
+
+    for _ in range(3):
+        assert proc._open_frame_cache(str(script), module) is None
+    assert len(FailingProcess.started) == 1
+
+    # 修改脚本后重新尝试
+    script.write_text("BAKE_SECONDS = 1\n# changed\n")
+    os.utime(script, (0, 12345))
+    proc._open_frame_cache(str(script), module)
+    assert len(FailingProcess.started) == 2
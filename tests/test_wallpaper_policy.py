@@ -0,0 +1,77 @@
+import pytest
+
+# WallpaperProc 依赖 wx、FreeSimpleGUIWx 和 pywin32，缺少时跳过
+pytest.importorskip("wx")
+pytest.importorskip("FreeSimpleGUIWx")
+pytest.importorskip("win32com")
+
+import DesktopBackend
+from DesktopBackend import FakeDesktopBackend
+from DesktopMonitor import FakeVisibilityDetector
+from PowerPolicy import FakeSource, default_rules
+from WindowDiscovery import FakeWindowEventSource
+from wallpaper_window import WallpaperProc
+
+
+class FakeProcess:
+    """代替 subprocess.Popen：记录是否被终止"""
+    def __init__(self, pid):
+        self.pid = pid
+        self.terminated = False
+
+    def poll(self):
+        return 0 if self.terminated else None
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def video():
+    fake = FakeDesktopBackend()
+    previous = DesktopBackend.set_backend(fake)
+    sources = {'cpu': FakeSource(0.0), 'on_battery': FakeSource(False), 'idle': FakeSource(0.0)}
+    proc = WallpaperProc(visibility_detector=FakeVisibilityDetector(), policy_sources=sources,
+                         policy_rules=default_rules(battery_freeze=True), window_events=FakeWindowEventSource())
+    restarts = []
+    proc.switch = lambda type_, path: restarts.append((type_, path))
+    proc.start = lambda type_, path: restarts.append((type_, path))
+    process = FakeProcess(fake.launch("FFPLAY_WALLPAPER_test.mp4"))
+    proc.process, proc.kind, proc.path = process, 'video', "test.mp4"
+    yield proc, sources, process, restarts, fake
+    DesktopBackend.set_backend(previous)
+
+
+def test_fps_cap_does_not_restart_video(video):
+    proc, sources, process, restarts, fake = video
+    for cpu in [90, 90, 90, 90, 30, 30, 30]:
+        sources['cpu'].value = cpu
+        proc.policy.poll()
+
+    assert restarts == []
+    assert not process.terminated
+    assert proc.fps_cap is None
+
+
+def test_unchanged_decision_restarts_nothing(video):
+    proc, sources, process, restarts, fake = video
+    sources['cpu'].value = 90
+    for _ in range(10):
+        proc.policy.poll()
+    proc.apply_policy(proc.policy.decision)
+
+    assert proc.fps_cap == 30
+    assert restarts == []
+    assert not process.terminated
+    assert not proc.paused
+
+
+def test_freeze_suspends_video(video):
+    proc, sources, process, restarts, fake = video
+    sources['on_battery'].value = True
+    proc.policy.poll()
+    proc.policy.poll()
+
+    assert proc.paused
+    assert fake.processes[process.pid]
+    assert restarts == []
@@ -0,0 +1,92 @@
+import pytest
+
+from DesktopBackend import FakeDesktopBackend
+from WindowDiscovery import FakeWindowEventSource, wait_for_window
+
+
+class VirtualClock:
+    """只在 wait 中前进的时钟，记录每次等待的时长"""
+    def __init__(self):
+        self.now = 0.0
+        self.timeouts = []
+
+    def clock(self):
+        return self.now
+
+    def wait(self, event, timeout):
+        self.timeouts.append(timeout)
+        self.now += timeout
+        return event.is_set()
+
+
+def test_backoff_doubles_until_deadline():
+    clock = VirtualClock()
+    result, tries = wait_for_window(lambda: None, FakeWindowEventSource(), deadline=3.0,
+                                    backoff=(0.05, 1.0), clock=clock.clock, wait=clock.wait)
+
+    assert result is None
+    # 间隔翻倍到上限，最后一次等待截断到总时限
+    assert clock.timeouts == pytest.approx([0.05, 0.1, 0.2, 0.4, 0.8, 1.0, 0.45])
+    assert clock.now == pytest.approx(3.0)
+    assert tries == len(clock.timeouts) + 1
+
+
+def test_zero_deadline_tries_once():
+    clock = VirtualClock()
+    result, tries = wait_for_window(lambda: None, FakeWindowEventSource(), deadline=0.0,
+                                    clock=clock.clock, wait=clock.wait)
+    assert (result, tries) == (None, 1)
+    assert clock.timeouts == []
+
+
+def test_window_event_wakes_immediately():
+    fake = FakeDesktopBackend()
+    timeouts = []
+
+    def wait(event, timeout):
+        timeouts.append(timeout)
+        return fake.wait(event, timeout)
+
+    fake.launch("WALLPAPER", delay=0.3)
+    result, tries = wait_for_window(lambda: fake.find_window(None, "WALLPAPER"), fake.events,
+                                    deadline=15.0, clock=fake.clock, wait=wait)
+
+    assert result
+    # 窗口出现的时刻即找到，不必等到下一次退避重试
+    assert fake.now == 0.3
+    assert timeouts == [0.05, 0.1, 0.2]
+    assert tries == 4
+
+
+def test_event_resets_backoff():
+    fake = FakeDesktopBackend()
+    timeouts = []
+    found = []
+
+    def wait(event, timeout):
+        timeouts.append(timeout)
+        return fake.wait(event, timeout)
+
+    def attempt():
+        # 第一个窗口不是目标，只唤醒一次重试
+        found.append(fake.now)
+        return fake.find_window(None, "TARGET")
+
+    fake.launch("OTHER", delay=0.3)
+    fake.launch("TARGET", delay=2.0)
+    result, _ = wait_for_window(attempt, fake.events, deadline=15.0, backoff=(0.05, 1.0),
+                                clock=fake.clock, wait=wait)
+
+    assert result
+    assert fake.now == 2.0
+    assert 0.3 in found
+    # 0.3 秒的通知之后间隔重新从 0.05 开始
+    assert timeouts[3] == 0.05
+
+
+def test_source_is_stopped():
+    source = FakeWindowEventSource()
+    clock = VirtualClock()
+    assert wait_for_window(lambda: True, source, clock=clock.clock, wait=clock.wait) == (True, 1)
+    assert (source.starts, source.stops) == (1, 1)
+    assert source.on_window is None
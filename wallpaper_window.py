@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import importlib.util
-from multiprocessing import Process, Queue
+from multiprocessing import Process, freeze_support
 import sys
 import os
+import time
+import threading
 import subprocess
 from typing import Optional, Callable
 from functools import wraps
 
+import wx
 import FreeSimpleGUIWx as sg
 
 from FileEdit import *
 from WallpaperFrame import WallpaperFrame
+from ScriptHost import load_script, is_wx_script, script_options
+from SharedState import SimulationProcess, RendererProcess
+from ScriptReload import ScriptWatcher, reload_script
+from DesktopMonitor import DesktopVisibilityMonitor, Win32VisibilityDetector
+from PowerPolicy import PolicyEngine, default_sources, default_rules, BATTERY_FREEZE
+from WindowDiscovery import Win32WindowEventSource
+from DesktopBackend import get_backend
+from DesktopTopology import get_topology
+import FrameCache
 from WorkerW import *
 
 # ========== 装饰器与类型映射==========
@@ -43,23 +54,76 @@ def on_event(event_name: str):
         return func
     return decorator
 
+def _hidden_startupinfo():
+    """外部程序以隐藏窗口启动（SW_HIDE），嵌入桌面后再显示，避免以顶层窗口闪现"""
+    if not sys.platform.startswith("win"):
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = 0   # SW_HIDE
+    return startupinfo
+
 # ========== WallpaperProc 类==========
 class WallpaperProc:
     """壁纸进程管理类"""
-    def __init__(self):
+    def __init__(self, visibility_detector=None, policy_sources=None, policy_rules=None,
+                 window_events=None, embed_deadline=15.0):
+        """
+        :param visibility_detector: 桌面可见性检测器，None 使用 Win32VisibilityDetector
+        :param policy_sources:      功耗策略数据源 {名称: Source}，None 按平台选择
+        :param policy_rules:        功耗策略规则，None 使用 default_rules()
+        :param window_events:       窗口出现通知源，None 使用 Win32WindowEventSource
+        :param embed_deadline:      等待壁纸窗口出现并嵌入的总时限（秒）
+        """
+        self.window_events = window_events or Win32WindowEventSource()
+        self.embed_deadline = embed_deadline
         self.ffplay_path = os.path.abspath(os.path.join(get_app_root_path(), "resources", "ffmpeg", "ffplay.exe"))
-        self.screen_w, self.screen_h = get_screen_size()
+        # 帧统计设置在切换壁纸时保留
+        self.stats_enabled = False
+        self.stats_overlay = False
+        # 桌面被最大化/全屏窗口遮挡时暂停壁纸（监视线程由 main 启动）
+        self.occluded = False
+        self._pause_lock = threading.RLock()
+        self.visibility = DesktopVisibilityMonitor(visibility_detector or Win32VisibilityDetector(),
+                                                   self.set_desktop_visible)
+        # 功耗与负载策略：限制帧率上限或冻结画面（监视线程由 main 启动）
+        # 电池供电冻结默认关闭，由托盘菜单开启
+        self.fps_cap = None
+        self.frozen = False
+        self.battery_freeze = False
+        self.policy = PolicyEngine(policy_sources or default_sources(),
+                                   policy_rules if policy_rules is not None else default_rules(),
+                                   self.apply_policy)
+        # 后台预渲染帧缓存的进程 {脚本路径: (Process, 启动时脚本的修改时间)}，切换壁纸时不中断
+        self._bake_processes = {}
+        # 预渲染失败的脚本 {脚本路径: 修改时间}，脚本修改之前不再重试
+        self._bake_failures = {}
+        # 热重载：监视当前 py 脚本，修改后在运行中的窗口上替换 update/draw
+        self.hot_reload = False
+        # 无缝切换：新壁纸在后台准备期间为 True，py 壁纸的窗口先不显示
+        self._standby = False
+        self.last_switch = None   # 最近一次切换的耗时 {'prepare', 'teardown', 'gap', 'overlap'}（秒）
+        self._shown_at = None     # 最近一次嵌入完成并显示的时刻（perf_counter）
         self.reset()
 
+    # reset() 管理的、属于当前壁纸的状态（切换时整体取出）
+    _STATE_FIELDS = ('process', 'title', 'path', 'kind', 'Hwnd', '_py_module', 'frame', '_simulation',
+                     '_renderer', '_frame_cache', '_watcher', 'paused', '_suspended_pid')
+
     def reset(self):
         self.process: Optional[subprocess.Popen] = None
         self.title = None
         self.path = None
+        self.kind = None   # 当前壁纸类型：'video' / 'exe' / 'py'
         self.Hwnd = -1
         self._py_module = None
         self.frame = None
-        self._script_process = None
-        self.queue = Queue()
+        self._simulation = None
+        self._renderer = None
+        self._frame_cache = None
+        self._watcher = None
+        self.paused = False
+        self._suspended_pid = None
 
     def start(self, type_: Optional[str], path: Optional[str]) -> bool:
         """统一启动入口"""
@@ -109,10 +173,12 @@ class WallpaperProc:
         """启动ffplay播放视频作为壁纸"""
         self.stop()
         self.title = f"FFPLAY_WALLPAPER_{os.path.basename(video_path)}"
+        # 每次启动时读取（拓扑缓存命中时无系统调用），分辨率变化后新启动的壁纸使用新尺寸
+        screen_w, screen_h = get_screen_size()
         cmd = [
             self.ffplay_path,
-            "-x", str(self.screen_w),
-            "-y", str(self.screen_h),
+            "-x", str(screen_w),
+            "-y", str(screen_h),
             "-loop", "0",
             "-noborder",
             "-fs",
@@ -121,14 +187,19 @@ class WallpaperProc:
             "-loglevel", "quiet",
             "-i", video_path
         ]
-        logger.info(f"启动video壁纸（分辨率：{self.screen_w}x{self.screen_h}）：" + " ".join(cmd))
+        if self.fps_cap:
+            # 功耗策略限制了帧率：由 ffplay 的 fps 滤镜丢帧
+            cmd[-2:-2] = ["-vf", f"fps={self.fps_cap}"]
+        logger.info(f"启动video壁纸（分辨率：{screen_w}x{screen_h}）：" + " ".join(cmd))
         self.process = subprocess.Popen(
             cmd,
             creationflags=subprocess.CREATE_NO_WINDOW,
+            startupinfo=_hidden_startupinfo(),
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
         self.path = video_path
+        self.kind = 'video'
 
         return self.title
 
@@ -143,10 +214,12 @@ class WallpaperProc:
         self.process = subprocess.Popen(
             EXE_path,
             creationflags=subprocess.CREATE_NO_WINDOW,
+            startupinfo=_hidden_startupinfo(),
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
         self.path = EXE_path
+        self.kind = 'exe'
 
         return self.title
 
@@ -159,99 +232,371 @@ class WallpaperProc:
         is_non_wx = check_NOT_USE_WX(py_path)
 
         try:
-            # if not is_non_wx:
-                module_name = os.path.splitext(os.path.basename(py_path))[0]
-                spec = importlib.util.spec_from_file_location(module_name, py_path)
-                if spec is None:
-                    logger.error(f"无法加载脚本: {py_path}")
+            if is_non_wx:
+                # NOT_USE_WX 脚本不在本进程导入：render 在渲染进程中运行，
+                # 整帧经共享内存交给窗口贴图，脚本崩溃不影响主程序
+                logger.info("脚本使用非 wx 库，在渲染进程中运行")
+                self._renderer = RendererProcess(py_path, *get_screen_size())
+                update_func, init_func, draw_func = self._renderer.host_update, None, self._renderer.draw
+                options = {}
+                dynamic_scale = False
+            else:
+                # 执行模块代码
+                module = load_script(py_path)
+                if module is None:
                     return
-                module = importlib.util.module_from_spec(spec)
                 self._py_module = module
-                # 执行模块代码
-                spec.loader.exec_module(module)  # type: ignore
-
-                if hasattr(module, 'update') and callable(module.update) \
-                and hasattr(module, 'init') and callable(module.init) \
-                and hasattr(module, 'draw') and callable(module.draw):
-                    # 创建窗口
-                    self.frame = WallpaperFrame(module.update, module.init, module.draw)
-                    # 获取句柄
-                    self.Hwnd = self.frame.GetHandle()
-                else:
-                    logger.error(f"获取update(), init()失败：{module}")
 
-            # else:
-            #     logger.info("脚本使用非 wx 库")
-
-            #     # 更加自定义的导入
-            #     self._script_process = Process(
-            #         target=run_script_in_process,
-            #         args=(py_path, self.queue),
-            #         daemon=True
-            #     )
-            #     self._script_process.start()
-
-            #     # 等待获取窗口句柄（最多5秒）
-            #     try:
-            #         _hwnd = self.queue.get(timeout=5)
-            #     except Exception as e:
-            #         logger.exception(f"获取窗口句柄出错")
-            #         _hwnd = -1
-
-            #     if _hwnd >0:
-            #         self.Hwnd = _hwnd
-            #     else:
-            #         logger.error(f"hwnd无效：{_hwnd}")
+                if not is_wx_script(module):
+                    logger.error(f"获取update(), init()失败：{module}")
+                    return self.Hwnd
+
+                options = script_options(module)
+                update_func, init_func, draw_func = module.update, module.init, module.draw
+                dynamic_scale = getattr(module, 'DYNAMIC_SCALE', True)
+                # BAKE_SECONDS：预渲染为循环帧缓存，之后直接播放缓存
+                cache = self._open_frame_cache(py_path, module)
+                if cache is not None:
+                    self._frame_cache = cache
+                    init_func, update_func, draw_func = FrameCache.playback_functions(cache)
+                    options = {'fps': max(int(round(cache.fps)), 1)}
+                    dynamic_scale = False
+                elif getattr(module, 'USE_PROCESS', False):
+                    # init/update 在独立进程中运行，状态经共享内存交给 draw
+                    screen_w, screen_h = get_screen_size()
+                    self._simulation = SimulationProcess(py_path, module, screen_w, screen_h, **options)
+                    update_func, init_func = self._simulation.host_update, None
+                    draw_func = self._simulation.wrap_draw(module.draw)
+
+            # 创建窗口（脚本可通过 FPS / SCRIPT_VERSION / SIM_HZ 调整帧率与协议，
+            # DYNAMIC_SCALE = False 关闭动态分辨率）
+            self.frame = WallpaperFrame(update_func, init_func, draw_func,
+                                        stats=self.stats_enabled,
+                                        stats_overlay=self.stats_overlay,
+                                        dynamic_scale=dynamic_scale,
+                                        show=not self._standby,
+                                        **options)
+            self.frame.set_fps_cap(self.fps_cap)
+            self.kind = 'py'
+            self.path = py_path
+            if self.hot_reload:
+                self._watch_script(py_path)
+            # 获取句柄
+            self.Hwnd = self.frame.GetHandle()
 
         except Exception as e:
             logger.exception(f"运行Python脚本出错: {e}")
 
         return self.Hwnd
 
+    # ---------- 热重载 ----------
+    def set_hot_reload(self, enabled: bool):
+        """开关热重载，立即作用于当前的 py 壁纸"""
+        self.hot_reload = enabled
+        if not enabled and self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+        elif enabled and self.kind == 'py' and self.path and not self._watcher:
+            self._watch_script(self.path)
+        logger.info(f"脚本热重载：{'启用' if enabled else '禁用'}")
+
+    def _watch_script(self, py_path):
+        # 回调在监视线程中，交给 wx 主线程执行（update 与 draw 不会与替换同时进行）
+        self._watcher = ScriptWatcher(py_path, lambda path: wx.CallAfter(self.reload_py, path))
+        self._watcher.start()
+
+    def reload_py(self, py_path):
+        """
+        脚本修改后调用（wx 主线程）：普通脚本在运行中的窗口上替换 update/draw，失败时继续运行旧代码；
+        进程模式和帧缓存播放的脚本无法原地替换，重新启动壁纸
+        """
+        with self._pause_lock:
+            if self.kind != 'py' or self.path != py_path or not self.frame:
+                return
+            if self._simulation or self._renderer or self._frame_cache:
+                logger.info(f"进程模式、渲染进程或帧缓存脚本不支持原地重载，重新启动：{py_path}")
+                self.switch('py', py_path)
+                return
+            module = reload_script(self.frame, py_path, self._py_module)
+            if module is not None:
+                self._py_module = module
+
+    def _open_frame_cache(self, py_path, module):
+        """
+        脚本定义了 BAKE_SECONDS 时：帧缓存已是最新（脚本与依赖的本地模块未修改，时长、渲染尺寸与屏幕尺寸一致）则打开返回 FrameCacheReader；
+        否则本次照常实时运行，同时在后台进程中预渲染（渲染尺寸为屏幕的 BAKE_SCALE 倍，默认 0.5），下次启动即使用缓存
+        """
+        seconds = getattr(module, 'BAKE_SECONDS', None)
+        if not seconds:
+            return None
+        scale = getattr(module, 'BAKE_SCALE', 0.5)
+        screen = get_screen_size()
+        width, height = max(int(screen[0] * scale), 1), max(int(screen[1] * scale), 1)
+        cache_path = FrameCache.cache_path_for(py_path)
+        if FrameCache.is_fresh(cache_path, py_path, seconds=seconds, width=width, height=height, target=screen):
+            try:
+                cache = FrameCache.FrameCacheReader(cache_path)
+                logger.info(f"播放帧缓存：{cache_path}（{cache.count} 帧，{cache.width}x{cache.height}@{cache.fps:g}）")
+                return cache
+            except Exception as e:
+                logger.warning(f"帧缓存无法读取，重新预渲染：\n\t {e}")
+
+        try:
+            mtime = os.path.getmtime(py_path)
+        except OSError:
+            return None
+        if self._bake_failures.get(py_path) == mtime:
+            return None
+        baking, baked_mtime = self._bake_processes.get(py_path, (None, None))
+        if baking is not None:
+            if baking.is_alive():
+                return None
+            if baking.exitcode != 0 and baked_mtime == mtime:
+                # 如脚本使用了无窗口渲染不支持的调用：记住失败，只记录一次
+                self._bake_failures[py_path] = mtime
+                logger.warning(f"帧缓存预渲染失败（退出码 {baking.exitcode}），脚本修改前不再重试，"
+                               f"继续实时运行：{py_path}")
+                return None
+        baking = Process(target=FrameCache.bake, args=(py_path, cache_path, seconds, width, height),
+                         kwargs={'target': screen}, daemon=True)
+        baking.start()
+        self._bake_processes[py_path] = (baking, mtime)
+        logger.info(f"后台预渲染帧缓存：{cache_path}（{seconds} 秒，{width}x{height}）")
+        return None
+
+    # ---------- 无缝切换 ----------
+    def switch(self, type_: Optional[str], path: Optional[str]) -> bool:
+        """
+        切换壁纸：旧壁纸保持显示，新壁纸在后台启动、初始化并嵌入桌面（位于旧壁纸之上）后，再关闭旧壁纸
+        新壁纸嵌入失败时关闭新壁纸，继续显示旧壁纸；耗时记录在 last_switch 并写入日志
+        :return: 新壁纸是否已嵌入桌面
+        """
+        with self._pause_lock:
+            t0 = time.perf_counter()
+            self._shown_at = None
+            old = self._detach()
+            self._standby = True
+            try:
+                embedded = self.embed_to_workerw(self.start(type_, path))
+            finally:
+                self._standby = False
+            prepare = time.perf_counter() - t0
+
+            if old['kind'] is None:
+                # 没有旧壁纸（启动时）：准备期间桌面本来就是空白
+                if self.frame and not self.frame.IsShown():
+                    self.frame.Show()
+                gap = (self._shown_at or time.perf_counter()) - t0
+                self.last_switch = {'prepare': prepare, 'teardown': 0.0, 'gap': gap, 'overlap': 0.0}
+                logger.info(f"壁纸已启动，耗时 {prepare * 1000:.0f} ms")
+                return embedded
+            if not embedded:
+                logger.error(f"新壁纸未能嵌入桌面，保留当前壁纸：{old['path']}")
+                self.stop()
+                self.__dict__.update(old)
+                return False
+
+            t1 = time.perf_counter()
+            self._stop_detached(old)
+            hidden_at = self._wait_hidden(old['Hwnd'])
+            teardown = hidden_at - t1
+            # 空白：旧窗口消失到新窗口显示之间的时间；重叠：两者同时显示的时间
+            shown_at = self._shown_at or t1
+            gap = max(0.0, shown_at - hidden_at)
+            overlap = max(0.0, hidden_at - shown_at)
+            self.last_switch = {'prepare': prepare, 'teardown': teardown, 'gap': gap, 'overlap': overlap}
+            logger.info(f"壁纸已切换：准备 {prepare * 1000:.0f} ms（期间旧壁纸保持显示），"
+                        f"关闭旧壁纸 {teardown * 1000:.0f} ms，空白 {gap * 1000:.0f} ms，"
+                        f"重叠 {overlap * 1000:.0f} ms")
+            return True
+
+    @staticmethod
+    def _wait_hidden(hwnd, timeout=1.0, interval=0.005):
+        """
+        等待窗口被隐藏或销毁（外部程序的窗口在进程结束后才消失），返回观察到的时刻（perf_counter）
+        超时则记录警告并返回当前时刻
+        """
+        backend = get_backend()
+        deadline = time.perf_counter() + timeout
+        while True:
+            now = time.perf_counter()
+            if not hwnd or not backend.available:
+                return now
+            if not backend.is_window(hwnd) or not backend.is_window_visible(hwnd):
+                return now
+            if now >= deadline:
+                logger.warning(f"旧壁纸窗口 {timeout:g} 秒后仍可见：{hwnd}")
+                return now
+            time.sleep(interval)
+
+    def _detach(self):
+        """取出当前壁纸的全部状态并清空，之后启动的新壁纸不会关闭它"""
+        state = {name: getattr(self, name) for name in self._STATE_FIELDS}
+        self.reset()
+        return state
+
+    def _stop_detached(self, state):
+        """关闭 _detach 取出的壁纸，当前壁纸不受影响"""
+        current = self._detach()
+        self.__dict__.update(state)
+        try:
+            self.stop()
+        finally:
+            self.reset()
+            self.__dict__.update(current)
+
     def embed_to_workerw(self, target):
         """将窗口嵌入到桌面底层"""
-        if not sys.platform.startswith("win"):
+        if not get_backend().available:
             return False
 
-        import time
-        for attempt in range(16):
-            result = set_windows_to_workerw(target)
-            if result >0:
-                logger.info("窗口已通过标题嵌入桌面 WorkerW")
-                self.Hwnd = result
-                return True
-            else:
-                logger.warning(f"第 {attempt+1} 次找到窗口但嵌入失败，稍后重试...")
-            time.sleep(0.1)
+        # 窗口出现（显示或改名）时立即重试，否则按退避间隔重试，直到总时限
+        t0 = time.perf_counter()
+        result, tries = embed_window(target, self.window_events, deadline=self.embed_deadline)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if not result:
+            logger.error(f"{self.embed_deadline:g} 秒内未能找到并嵌入窗口：{target}（尝试 {tries} 次）")
+            return False
 
-        logger.error("通过标题查找并嵌入失败")
-        return False
+        logger.info(f"窗口已嵌入桌面 WorkerW（等待 {elapsed:.0f} ms，尝试 {tries} 次）")
+        self.Hwnd = result
+        # 后台创建的 py 壁纸窗口嵌入后再显示（外部程序的窗口由 embed_window 显示）
+        if self.frame and not self.frame.IsShown():
+            self.frame.Show()
+        self._shown_at = time.perf_counter()
+        # 切换壁纸时桌面仍被遮挡或策略要求冻结：新壁纸直接进入暂停
+        self._apply_pause_state()
+        return True
+
+    def set_stats(self, enabled=None, overlay=None):
+        """修改帧统计设置，立即作用于当前的 py 壁纸"""
+        if enabled is not None:
+            self.stats_enabled = enabled
+        if overlay is not None:
+            self.stats_overlay = overlay
+            self.stats_enabled = self.stats_enabled or overlay
+        if self.frame:
+            self.frame.stats.enabled = self.stats_enabled
+            self.frame.stats_overlay = self.stats_overlay
+        logger.info(f"帧统计：启用={self.stats_enabled}，叠加层={self.stats_overlay}")
+
+    # ---------- 遮挡暂停与功耗策略 ----------
+    def set_desktop_visible(self, visible: bool):
+        """DesktopVisibilityMonitor 的回调（在监视线程中调用）"""
+        self.occluded = not visible
+        self._apply_pause_state()
+
+    def set_battery_freeze(self, enabled: bool):
+        """开关“电池供电时冻结”规则，下一次策略采样时生效"""
+        self.battery_freeze = enabled
+        if not self.policy.set_enabled(BATTERY_FREEZE, enabled):
+            logger.warning("当前功耗策略没有电池供电冻结规则")
+        logger.info(f"电池供电时冻结：{'启用' if enabled else '禁用'}")
+
+    def apply_policy(self, decision):
+        """
+        PolicyEngine 的回调（在策略线程中调用）
+        freeze 时暂停壁纸；fps 上限立即作用于 py 壁纸的帧调度
+        视频壁纸只响应 freeze：重启 ffplay 会从头播放，帧率上限在下次启动视频时以 fps 滤镜生效
+        """
+        with self._pause_lock:
+            self.frozen = decision.freeze
+            self.fps_cap = decision.fps
+            if self.frame:
+                self.frame.set_fps_cap(self.fps_cap)
+            self._apply_pause_state()
+
+    def _apply_pause_state(self):
+        """桌面被遮挡或策略要求冻结时暂停，两者都解除后恢复"""
+        if self.occluded or self.frozen:
+            self.pause()
+        else:
+            self.resume()
+
+    def _external_pid(self):
+        """视频 / EXE 壁纸实际绘制画面的进程（窗口所属进程优先，其次是启动的进程）"""
+        if self.frame:
+            return None
+        pid = get_window_pid(self.Hwnd)
+        if pid:
+            return pid
+        if self.process and self.process.poll() is None:
+            return self.process.pid
+        return None
+
+    def pause(self):
+        """
+        暂停当前壁纸：py 壁纸停止 update 与重绘（进程模式同时暂停模拟进程），
+        视频（ffplay）和 EXE 挂起进程；画面都停留在最后一帧
+        """
+        with self._pause_lock:
+            if self.paused:
+                return
+            if self.frame:
+                self.frame.pause()
+            if self._simulation:
+                self._simulation.pause()
+            if self._renderer:
+                self._renderer.pause()
+            pid = self._external_pid()
+            if pid and suspend_process(pid):
+                self._suspended_pid = pid
+            self.paused = True
+            logger.info(f"壁纸已暂停：{self.path}")
+
+    def resume(self):
+        """
+        恢复暂停的壁纸：py 壁纸从当前时刻重新调度，不补跑暂停期间的帧；
+        仅视频的 ffplay 以视频时钟同步，恢复后发现落后过多会重置计时，直接接着播放而不是快进追赶
+        """
+        with self._pause_lock:
+            if not self.paused:
+                return
+            if self._suspended_pid:
+                resume_process(self._suspended_pid)
+                self._suspended_pid = None
+            if self._simulation:
+                self._simulation.resume()
+            if self._renderer:
+                self._renderer.resume()
+            if self.frame:
+                self.frame.resume()
+            self.paused = False
+            logger.info(f"壁纸已恢复：{self.path}")
 
     def stop(self):
         """停止进程"""
-        if self.process and self.process.poll() is None:
-            logger.info(f"关闭进程{self.process}")
-            self.process.terminate()
+        # 与监视线程的 pause / resume 互斥，避免挂起正在关闭的壁纸
+        with self._pause_lock:
+            # 挂起的进程先恢复，保证能正常退出
+            self.resume()
+            if self.process and self.process.poll() is None:
+                logger.info(f"关闭进程{self.process}")
+                self.process.terminate()
 
-        if self._script_process:
-            self._script_process.terminate()
+            if self.frame:
+                self.frame.Close()
+                logger.info(f"已通过frame.Close()终止进程")
 
-        if self.frame:
-            self.frame.Close()
-            logger.info(f"已通过frame.Close()终止进程")
-        else:
-            try:
-                _, pid = win32process.GetWindowThreadProcessId(self.Hwnd)
-                if pid:
-                    handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, pid)
-                    win32api.TerminateProcess(handle, 0)
-                    win32api.CloseHandle(handle)
-                    logger.info(f"已终止进程 (PID: {pid})，窗口句柄: 0x{self.Hwnd:08X}")
+            # 窗口的更新线程退出后再停止模拟 / 渲染进程，避免读取已释放的共享内存
+            if self._simulation:
+                self._simulation.stop()
+
+            if self._renderer:
+                self._renderer.stop()
+
+            if self._frame_cache:
+                self._frame_cache.close()
+
+            if self._watcher:
+                self._watcher.stop()
+
+            if not self.frame and self.Hwnd > 0:
+                if kill_process_by_hwnd(self.Hwnd):
                     return True
-            except Exception as e:
-                logger.warning(f"通过窗口句柄终止进程失败: \n\t {e} \n\t 进程可能未结束")
+                logger.warning("通过窗口句柄终止进程失败，进程可能未结束")
 
-        self.reset()
+            self.reset()
 
 # ========== 使用 FreeSimpleGUIWx 重写的系统托盘管理类==========
 class SystemTrayManager:
@@ -284,7 +629,14 @@ class SystemTrayManager:
                                     [
                                         '关于',
                                         '---',
-                                        '设置'
+                                        '设置',
+                                        '---',
+                                        '帧统计',
+                                        self._overlay_menu_text(),
+                                        '---',
+                                        self._hot_reload_menu_text(),
+                                        '---',
+                                        self._battery_freeze_menu_text()
                                     ],
                                 '---',
                                 '退出程序'
@@ -312,8 +664,21 @@ class SystemTrayManager:
     def _autostart_menu_text(self):
         return "开机自启 ✓" if self.autostart_enabled else "开机自启"
 
+    def _overlay_menu_text(self):
+        return "帧统计叠加层 ✓" if self.wallproc.stats_overlay else "帧统计叠加层"
+
+    def _hot_reload_menu_text(self):
+        return "脚本热重载 ✓" if self.wallproc.hot_reload else "脚本热重载"
+
+    def _battery_freeze_menu_text(self):
+        return "电池供电时冻结 ✓" if self.wallproc.battery_freeze else "电池供电时冻结"
+
     def _update_menu(self):
         self.menu_def[1][0] = self._autostart_menu_text()
+        misc_menu = self.menu_def[1][self.menu_def[1].index('杂项') + 1]
+        misc_menu[-5] = self._overlay_menu_text()
+        misc_menu[-3] = self._hot_reload_menu_text()
+        misc_menu[-1] = self._battery_freeze_menu_text()
         self.tray.update(menu=self.menu_def)
         logger.debug(f"托盘菜单已更新，开机自启文本: {self.menu_def[1][0]}")
 
@@ -330,6 +695,12 @@ class SystemTrayManager:
 
                 if event.startswith('开机自启'):   # 用 startswith 匹配动态文本
                     self.toggle_autostart()
+                elif event.startswith('帧统计叠加层'):
+                    self.toggle_stats_overlay()
+                elif event.startswith('脚本热重载'):
+                    self.toggle_hot_reload()
+                elif event.startswith('电池供电时冻结'):
+                    self.toggle_battery_freeze()
                 else:
                     # 查找事件对应的处理方法
                     handler = self._handlers.get(event)
@@ -356,6 +727,18 @@ class SystemTrayManager:
             except Exception as e:
                 logger.exception("设置开机自启失败")
 
+    def toggle_stats_overlay(self):
+        self.wallproc.set_stats(overlay=not self.wallproc.stats_overlay)
+        self._update_menu()
+
+    def toggle_hot_reload(self):
+        self.wallproc.set_hot_reload(not self.wallproc.hot_reload)
+        self._update_menu()
+
+    def toggle_battery_freeze(self):
+        self.wallproc.set_battery_freeze(not self.wallproc.battery_freeze)
+        self._update_menu()
+
     # ---------- 事件处理方法（使用装饰器注册）----------
     @on_event('切换壁纸(视频文件)')
     def select_video(self):
@@ -374,7 +757,7 @@ class SystemTrayManager:
         )
 
         if file_path and os.path.isfile(file_path):
-            self.wallproc.embed_to_workerw(self.wallproc.start_by_video(file_path))
+            self.wallproc.switch("video", file_path)
             save_wallpaper_path(file_path, "video")
             logger.info(f"壁纸已切换：{file_path}")
         else:
@@ -397,7 +780,7 @@ class SystemTrayManager:
         )
 
         if file_path and os.path.isfile(file_path):
-            self.wallproc.embed_to_workerw(self.wallproc.start("exe", file_path))
+            self.wallproc.switch("exe", file_path)
             save_wallpaper_path(file_path, "exe")
             logger.info(f"壁纸已切换：{file_path}")
         else:
@@ -421,7 +804,7 @@ class SystemTrayManager:
         )
 
         if file_path and os.path.isfile(file_path):
-            self.wallproc.embed_to_workerw(self.wallproc.start("py", file_path))
+            self.wallproc.switch("py", file_path)
             save_wallpaper_path(file_path, "py")
             logger.info(f"壁纸已切换：{file_path}")
         else:
@@ -473,6 +856,23 @@ exe版本请到Github项目history文件夹中查找，或查看release
         
         window = sg.Window('关于', layout, finalize=True)
 
+    @on_event('帧统计')
+    def show_stats(self):
+        """显示当前 py 壁纸的帧统计"""
+        frame = self.wallproc.frame
+        if frame is None:
+            sg.popup("当前壁纸不是 Python 脚本，没有帧统计", title='帧统计')
+            return
+        if not frame.stats.enabled:
+            self.wallproc.set_stats(enabled=True)
+            sg.popup("已开始统计，请稍后再次查看", title='帧统计')
+            return
+        layout = [
+            [sg.Multiline(frame.stats.format_report(), size=(100, 20), disabled=True,
+                          font=("宋体", 12))]
+        ]
+        window = sg.Window('帧统计', layout, finalize=True)
+
     @on_event('退出程序')
     def exit(self):
         """退出程序"""
@@ -486,6 +886,9 @@ def main():
 
     wallproc = None  # 提前声明，便于 finally 中访问
     try:
+        # 缓存 WorkerW 句柄与屏幕尺寸，资源管理器重启或显示设置变化时失效
+        get_topology().start()
+
         # 初始化壁纸管理器
         wallproc = WallpaperProc()
 
@@ -496,7 +899,11 @@ def main():
         tray_manager = SystemTrayManager(wallproc)
 
         # 启动壁纸
-        wallproc.embed_to_workerw(wallproc.start(wallpaper_type, wallpaper_path))
+        wallproc.switch(wallpaper_type, wallpaper_path)
+
+        # 监视桌面是否被遮挡，遮挡时暂停壁纸；按 CPU 负载、电池、空闲时间限制帧率
+        wallproc.visibility.start()
+        wallproc.policy.start()
 
         tray_manager.run()  # 阻塞，直到退出
 
@@ -507,9 +914,13 @@ def main():
     finally:
         # 无论何种原因退出，都尝试停止壁纸进程
         if wallproc:
+            wallproc.visibility.stop()
+            wallproc.policy.stop()
             wallproc.stop()
-        win32gui.SystemParametersInfo(win32con.SPI_SETDESKWALLPAPER, None, win32con.SPIF_SENDCHANGE)
+        get_topology().stop()
+        refresh_desktop_wallpaper()
         logger.info("程序结束")
 
 if __name__ == '__main__':
+    freeze_support()   # 打包后的 exe 启动模拟进程需要
     main()
\ No newline at end of file